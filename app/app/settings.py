@@ -10,9 +10,13 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/3.2/ref/settings/
 """
 
+import importlib.util
 import os
+import tempfile
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -44,6 +48,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'core',
     'rest_framework',
     'rest_framework.authtoken',
@@ -54,6 +59,10 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.LoadSheddingMiddleware',
+    'core.middleware.CompressionMiddleware',
+    'core.middleware.QueryCountMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -86,16 +95,59 @@ WSGI_APPLICATION = 'app.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 
+# Connections are kept for DB_CONN_MAX_AGE seconds, 0 opens one per
+# request. DB_PGBOUNCER is for a PgBouncer in transaction pooling mode,
+# where a cursor may not outlive its transaction. psycopg2 does not use
+# prepared statements, but session settings do not stick either, so the
+# database role should have its timezone set to UTC.
+DB_PGBOUNCER = bool(int(os.environ.get('DB_PGBOUNCER', 0)))
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'core.db.postgresql',
         'HOST': os.environ.get('DB_HOST'),
+        'PORT': os.environ.get('DB_PORT', ''),
         'NAME': os.environ.get('DB_NAME'),
         'USER': os.environ.get('DB_USER'),
         'PASSWORD': os.environ.get('DB_PASS'),
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 600)),
+        'CONN_HEALTH_CHECKS': True,
+        'DISABLE_SERVER_SIDE_CURSORS': DB_PGBOUNCER,
     }
 }
 
+# Read replicas, as a comma separated list of hosts sharing the port,
+# name and credentials of the primary. Tests read them from the primary.
+DB_REPLICA_HOSTS = [
+    host.strip()
+    for host in os.environ.get('DB_REPLICA_HOSTS', '').split(',')
+    if host.strip()
+]
+REPLICA_DATABASES = []
+for index, host in enumerate(DB_REPLICA_HOSTS):
+    alias = f'replica_{index}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'TEST': {'MIRROR': 'default'},
+    }
+    REPLICA_DATABASES.append(alias)
+
+DATABASE_ROUTERS = ['core.replicas.ReplicaRouter']
+
+# Users are pinned to the primary for this many seconds after a write,
+# so they read their own writes. The pins are kept in a memory mapped
+# table in DB_REPLICA_PIN_DIR shared by the workers, point it at a
+# volume shared by the containers of a host. Pins expire on their own;
+# one is only dropped when all the slots it may use hold newer pins, so
+# size the slots well above the users writing within the pin time.
+REPLICA_PIN_SECONDS = int(os.environ.get('DB_REPLICA_PIN_SECONDS', 5))
+REPLICA_PIN_DIR = os.environ.get(
+    'DB_REPLICA_PIN_DIR',
+    os.path.join(tempfile.gettempdir(), 'replica-pins'),
+)
+REPLICA_PIN_SLOTS = int(os.environ.get('DB_REPLICA_PIN_SLOTS', 65536))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -116,6 +168,40 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# New passwords are hashed with PASSWORD_HASHER, pbkdf2 or argon2, and
+# the work factors below. Users are rehashed when they next log in once
+# these change.
+PASSWORD_HASHER = os.environ.get('PASSWORD_HASHER', 'pbkdf2')
+PASSWORD_PBKDF2_ITERATIONS = int(
+    os.environ.get('PASSWORD_PBKDF2_ITERATIONS', 260000)
+)
+PASSWORD_ARGON2_TIME_COST = int(os.environ.get('PASSWORD_ARGON2_TIME_COST', 2))
+PASSWORD_ARGON2_MEMORY_COST = int(
+    os.environ.get('PASSWORD_ARGON2_MEMORY_COST', 102400)
+)
+PASSWORD_ARGON2_PARALLELISM = int(
+    os.environ.get('PASSWORD_ARGON2_PARALLELISM', 8)
+)
+
+PASSWORD_HASHERS = [
+    'core.hashers.PBKDF2PasswordHasher',
+    'core.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+]
+if PASSWORD_HASHER == 'argon2':
+    PASSWORD_HASHERS.insert(0, PASSWORD_HASHERS.pop(1))
+elif PASSWORD_HASHER != 'pbkdf2':
+    raise ImproperlyConfigured(
+        f'PASSWORD_HASHER must be pbkdf2 or argon2, not {PASSWORD_HASHER}.'
+    )
+
+# Under ASGI, logins and sign ups run in a pool of this many threads per
+# worker, hashing in parallel off the event loop. 0 leaves them to
+# Django's shared thread for sync views.
+PASSWORD_HASH_THREADS = int(os.environ.get('PASSWORD_HASH_THREADS', 0))
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/3.2/topics/i18n/
 
@@ -139,6 +225,9 @@ MEDIA_URL = '/static/media/'
 MEDIA_ROOT = '/vol/web/media/'
 STATIC_ROOT = '/vol/web/static/'
 
+# Pre-generated OpenAPI schema, written by the build_schema command.
+SCHEMA_CACHE_DIR = os.environ.get('SCHEMA_CACHE_DIR', '/vol/web/schema/')
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
 
@@ -146,10 +235,125 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 AUTH_USER_MODEL = 'core.User'
 
+# Users log in with their email in any case.
+AUTHENTICATION_BACKENDS = ['core.backends.EmailBackend']
+
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'core.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+    'DEFAULT_THROTTLE_CLASSES': [
+        'core.throttling.AnonTokenBucketThrottle',
+        'core.throttling.UserTokenBucketThrottle',
+        'core.throttling.ScopedTokenBucketThrottle',
+    ],
+    # Bursts of this many requests, refilled evenly over the period.
+    'DEFAULT_THROTTLE_RATES': {
+        'anon': os.environ.get('THROTTLE_ANON_RATE', '300/min'),
+        'user': os.environ.get('THROTTLE_USER_RATE', '1200/min'),
+        'login': os.environ.get('THROTTLE_LOGIN_RATE', '20/min'),
+    },
+    # Proxies in front of the app whose X-Forwarded-For is trusted to
+    # tell the client address apart. Each must append to the header the
+    # address it was connected from, or clients can pick their own.
+    'NUM_PROXIES': int(os.environ.get('THROTTLE_NUM_PROXIES', 0)),
 }
 
+# MessagePack is negotiated through Accept and Content-Type when the
+# msgpack package is installed.
+if importlib.util.find_spec('msgpack'):
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'].insert(
+        1, 'core.renderers.MessagePackRenderer',
+    )
+    REST_FRAMEWORK['DEFAULT_PARSER_CLASSES'].insert(
+        1, 'core.parsers.MessagePackParser',
+    )
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'core': {
+            'handlers': ['console'],
+            'level': os.environ.get('LOG_LEVEL', 'WARNING'),
+        },
+    },
+}
+
+# Share of API requests answered with a Server-Timing breakdown.
+SERVER_TIMING_SAMPLE_RATE = float(
+    os.environ.get('SERVER_TIMING_SAMPLE_RATE', 1 if DEBUG else 0.01)
+)
+
+# Directory where each worker process keeps its metrics, summed by the
+# metrics endpoint. Without it metrics only cover the serving process.
+METRICS_DIR = os.environ.get('METRICS_DIR')
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
+# uwsgi or asgi, as picked by scripts/run.sh. Under ASGI the recipe
+# reads are served by async views running their database work in a
+# pool of ASYNC_DB_THREADS threads per worker.
+SERVER_MODE = os.environ.get('SERVER_MODE', 'uwsgi')
+ASYNC_READ_VIEWS = SERVER_MODE == 'asgi'
+ASYNC_DB_THREADS = int(os.environ.get('ASYNC_DB_THREADS', 8))
+
+# Token buckets of the rate limits live in a file in THROTTLE_DIR
+# shared by the workers, or per process without it.
+THROTTLE_ENABLED = bool(int(os.environ.get('THROTTLE_ENABLED', 1)))
+THROTTLE_DIR = os.environ.get('THROTTLE_DIR')
+THROTTLE_SLOTS = int(os.environ.get('THROTTLE_SLOTS', 65536))
+
+# Runs the tests with the rate limits off.
+TEST_RUNNER = 'core.testing.TestRunner'
+
+# Workers answer 503 to requests which queued longer than this many
+# seconds behind the proxy, or beyond this many served at once (0 for
+# no limit). uwsgi workers serve one request at a time.
+LOAD_SHED_MAX_QUEUE_SECONDS = float(
+    os.environ.get('LOAD_SHED_MAX_QUEUE_SECONDS', 2)
+)
+LOAD_SHED_MAX_CONCURRENCY = int(
+    os.environ.get('LOAD_SHED_MAX_CONCURRENCY', 64 if ASYNC_READ_VIEWS else 0)
+)
+LOAD_SHED_RETRY_AFTER = int(os.environ.get('LOAD_SHED_RETRY_AFTER', 1))
+LOAD_SHED_EXEMPT_PATHS = ['/api/metrics/']
+
+# Admin changelists and paginated API lists with more rows than this
+# report estimated counts rather than running a full COUNT(*).
+APPROXIMATE_COUNT_THRESHOLD = int(
+    os.environ.get('APPROXIMATE_COUNT_THRESHOLD', 10000)
+)
+
+# Autocomplete answers are kept per worker for this many seconds, for
+# the AUTOCOMPLETE_CACHE_SIZE most recently typed prefixes.
+AUTOCOMPLETE_CACHE_SECONDS = float(
+    os.environ.get('AUTOCOMPLETE_CACHE_SECONDS', 10)
+)
+AUTOCOMPLETE_CACHE_SIZE = int(os.environ.get('AUTOCOMPLETE_CACHE_SIZE', 4096))
+
+# Load the views, URL resolvers and serializers when the server loads
+# the app, in the uwsgi master before the workers fork.
+WARM_UP_ON_LOAD = bool(int(os.environ.get('WARM_UP_ON_LOAD', 1)))
+
+# Responses smaller than this many bytes are sent uncompressed.
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+COMPRESSION_GZIP_LEVEL = int(os.environ.get('COMPRESSION_GZIP_LEVEL', 6))
+COMPRESSION_BROTLI_QUALITY = int(
+    os.environ.get('COMPRESSION_BROTLI_QUALITY', 5)
+)
+
 SPECTACULAR_SETTINGS = {
     'COMPONENT_SPLIT_REQUEST': True,
 }
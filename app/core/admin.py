@@ -1,16 +1,67 @@
 """
 Django admin customization.
 """
+import csv
+
 from django.contrib import admin
+from django.contrib.auth import get_permission_codename
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.db import transaction
+from django.http import StreamingHttpResponse
 from django.utils.translation import gettext_lazy as _
 
 from core import models
+from core.deletion import delete_users, process_file_deletions
+from core.pagination import ApproximateCountPaginator
+
+OWNED_MODELS = (models.Recipe, models.Tag, models.Ingredient)
+
+
+class EchoBuffer:
+    """File-like object handing back what is written to it."""
+    def write(self, value):
+        return value
+
+
+@admin.action(description=_('Export selected %(verbose_name_plural)s as CSV'))
+def export_as_csv(modeladmin, request, queryset):
+    """Stream the csv_fields of the selected rows as CSV."""
+    fields = modeladmin.csv_fields
+    writer = csv.writer(EchoBuffer())
+    rows = queryset.order_by('pk').values_list(*fields).iterator(
+        chunk_size=2000,
+    )
+    response = StreamingHttpResponse(
+        (writer.writerow(row) for row in _with_header(fields, rows)),
+        content_type='text/csv',
+    )
+    filename = queryset.model._meta.model_name
+    response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+    return response
+
+
+def _with_header(fields, rows):
+    yield fields
+    yield from rows
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Admin for tables too large to count or list without care.
+
+    Counts are estimated above APPROXIMATE_COUNT_THRESHOLD rows, and the
+    unfiltered total is not counted at all.
+    """
+    paginator = ApproximateCountPaginator
+    show_full_result_count = False
+    actions = [export_as_csv]
+    csv_fields = ()
 
 
 class UserAdmin(BaseUserAdmin):
     """Define the admin for the users."""
     ordering = ['id']
+    paginator = ApproximateCountPaginator
+    show_full_result_count = False
     list_display = ['email', 'name']
     fieldsets = (
         (None, {'fields': ('email', 'password')}),
@@ -46,8 +97,75 @@ class UserAdmin(BaseUserAdmin):
         ),
     )
 
+    def get_deleted_objects(self, objs, request):
+        """Count the data of the users rather than listing all of it."""
+        pks = [obj.pk for obj in objs]
+        model_count = {
+            models.User._meta.verbose_name_plural: len(pks),
+        }
+        perms_needed = set()
+        for model in (models.User,) + OWNED_MODELS:
+            opts = model._meta
+            if model is not models.User:
+                model_count[opts.verbose_name_plural] = (
+                    model.objects.filter(user__in=pks).count()
+                )
+            codename = get_permission_codename('delete', opts)
+            if not request.user.has_perm(f'{opts.app_label}.{codename}'):
+                perms_needed.add(opts.verbose_name)
+        return [str(obj) for obj in objs], model_count, perms_needed, []
+
+    def delete_model(self, request, obj):
+        self.delete_queryset(request, models.User.objects.filter(pk=obj.pk))
+
+    def delete_queryset(self, request, queryset):
+        delete_users(queryset)
+        # A batch of the images, the file deletion worker removes the
+        # rest.
+        transaction.on_commit(process_file_deletions)
+
+
+class HasImageFilter(admin.SimpleListFilter):
+    """Filter recipes by whether they have an image."""
+    title = _('image')
+    parameter_name = 'has_image'
+
+    def lookups(self, request, model_admin):
+        return (('yes', _('Yes')), ('no', _('No')))
+
+    def queryset(self, request, queryset):
+        if self.value() == 'yes':
+            return queryset.filter(image__gt='')
+        if self.value() == 'no':
+            return queryset.exclude(image__gt='')
+        return queryset
+
+
+@admin.register(models.Recipe)
+class RecipeAdmin(LargeTableAdmin):
+    """Define the admin for the recipes."""
+    list_display = ['id', 'title', 'user', 'time_minutes', 'price']
+    list_select_related = ['user']
+    raw_id_fields = ['user', 'tags', 'ingredients']
+    # Served by the trigram index on UPPER(title).
+    search_fields = ['title']
+    list_filter = [HasImageFilter]
+    csv_fields = (
+        'id', 'title', 'user__email', 'time_minutes', 'price', 'link',
+        'image',
+    )
+
+
+class RecipeAttrAdmin(LargeTableAdmin):
+    """Define the admin for the tags and ingredients of recipes."""
+    list_display = ['id', 'name', 'user']
+    list_select_related = ['user']
+    raw_id_fields = ['user']
+    # Served by the trigram index on UPPER(name).
+    search_fields = ['name']
+    csv_fields = ('id', 'name', 'user__email')
+
 
 admin.site.register(models.User, UserAdmin)
-admin.site.register(models.Recipe)
-admin.site.register(models.Tag)
-admin.site.register(models.Ingredient)
+admin.site.register(models.Tag, RecipeAttrAdmin)
+admin.site.register(models.Ingredient, RecipeAttrAdmin)
@@ -0,0 +1,103 @@
+"""
+Async serving of the read-only API views under ASGI.
+
+The ORM and DRF views are synchronous. Django runs sync views under
+ASGI in one shared thread, so concurrent reads queue behind each other.
+The async views here run the read path in a bounded pool of database
+threads instead, while the event loop handles the clients, slow ones
+included. Writes keep going through Django's sync view adapter.
+"""
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.urls import URLPattern
+
+_executor = None
+
+
+def get_executor():
+    """Return the thread pool running database work of async views."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.ASYNC_DB_THREADS,
+            thread_name_prefix='db',
+        )
+    return _executor
+
+
+def _run_view(view, request, *args, **kwargs):
+    # Pool threads live across requests, so their connections are
+    # recycled here the way request_started and request_finished do
+    # for request threads.
+    close_old_connections()
+    try:
+        response = view(request, *args, **kwargs)
+        if hasattr(response, 'render') and not response.is_rendered:
+            response.render()
+        return response
+    finally:
+        close_old_connections()
+
+
+async def run_in_pool(executor, view, request, *args, **kwargs):
+    """Call a sync view in a thread of the pool and render it."""
+    return await sync_to_async(
+        _run_view,
+        thread_sensitive=False,
+        executor=executor,
+    )(view, request, *args, **kwargs)
+
+
+async def run_in_db_thread(view, request, *args, **kwargs):
+    """Call a sync view in the database thread pool and render it."""
+    return await run_in_pool(get_executor(), view, request, *args, **kwargs)
+
+
+def async_pool_view(view, get_pool):
+    """Return an async version of a view running in a thread pool.
+
+    For views doing CPU heavy work which releases the GIL, the size of
+    the pool returned by get_pool bounds how much of it runs at once.
+    """
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        return await run_in_pool(get_pool(), view, request, *args, **kwargs)
+
+    return wrapper
+
+
+def async_read_view(view):
+    """Return an async version of a view serving GET in the pool.
+
+    Other methods go to the sync view like Django would route them.
+    """
+    sync_view = sync_to_async(view)
+
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method in ('GET', 'HEAD'):
+            return await run_in_db_thread(view, request, *args, **kwargs)
+        return await sync_view(request, *args, **kwargs)
+
+    return wrapper
+
+
+def async_read_patterns(patterns):
+    """Return the patterns with async views for routes that have a GET."""
+    async_patterns = []
+    for pattern in patterns:
+        actions = getattr(pattern.callback, 'actions', {})
+        if isinstance(pattern, URLPattern) and 'get' in actions:
+            pattern = URLPattern(
+                pattern.pattern,
+                async_read_view(pattern.callback),
+                pattern.default_args,
+                pattern.name,
+            )
+        async_patterns.append(pattern)
+    return async_patterns
@@ -0,0 +1,255 @@
+"""
+Benchmark suite for the API hot paths.
+
+Apps declare benchmarks in a ``benchmarks`` module. Each benchmark is a
+function that receives a BenchmarkContext and returns a callable which
+performs one operation, usually a single API request.
+"""
+import gc
+import math
+import platform
+import random
+import statistics
+import subprocess
+import time
+import tracemalloc
+from decimal import Decimal
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils.module_loading import autodiscover_modules
+
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.models import (
+    Recipe,
+    Tag,
+    Ingredient,
+)
+
+BENCHMARK_PASSWORD = 'benchpass123'
+
+_registry = {}
+
+
+def benchmark(name, iterations=None):
+    """Register a benchmark, optionally capping its iterations."""
+    def decorator(func):
+        _registry[name] = (func, iterations)
+        return func
+    return decorator
+
+
+def get_benchmarks():
+    """Return all registered benchmarks by name."""
+    autodiscover_modules('benchmarks')
+    return dict(sorted(_registry.items()))
+
+
+class DataShape:
+    """Size of the data set seeded before running benchmarks."""
+    def __init__(self, users=10, recipes=100, tags=3, ingredients=5, seed=0):
+        self.users = users
+        self.recipes = recipes
+        self.tags = tags
+        self.ingredients = ingredients
+        self.seed = seed
+
+    def as_dict(self):
+        return {
+            'users': self.users,
+            'recipes_per_user': self.recipes,
+            'tags_per_recipe': self.tags,
+            'ingredients_per_recipe': self.ingredients,
+            'seed': self.seed,
+        }
+
+
+class BenchmarkContext:
+    """State shared by benchmarks: the seeded user and an API client."""
+    def __init__(self, user, shape):
+        self.user = user
+        self.shape = shape
+        self.token = Token.objects.get_or_create(user=user)[0]
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Token {self.token.key}',
+        )
+        self.anonymous_client = APIClient()
+
+
+def seed(shape):
+    """Create users, recipes, tags and ingredients for a data shape."""
+    rng = random.Random(shape.seed)
+    User = get_user_model()
+    password = make_password(BENCHMARK_PASSWORD)
+    User.objects.bulk_create([
+        User(
+            email=f'bench{i}@example.com',
+            name=f'Bench user {i}',
+            password=password,
+        )
+        for i in range(shape.users)
+    ])
+    users = User.objects.filter(email__startswith='bench').order_by('id')
+
+    users = list(users)
+    for user in users:
+        pool = max(shape.tags, shape.ingredients) * 3
+        tags = Tag.objects.bulk_create([
+            Tag(user=user, name=f'Tag {i}') for i in range(pool)
+        ])
+        ingredients = Ingredient.objects.bulk_create([
+            Ingredient(user=user, name=f'Ingredient {i}') for i in range(pool)
+        ])
+        recipes = Recipe.objects.bulk_create([
+            Recipe(
+                user=user,
+                title=f'Recipe {i}',
+                description='Benchmark recipe description.',
+                time_minutes=rng.randint(5, 180),
+                price=Decimal(rng.randint(100, 9999)) / 100,
+                link=f'https://example.com/recipe-{i}.pdf',
+            )
+            for i in range(shape.recipes)
+        ])
+        Recipe.tags.through.objects.bulk_create([
+            Recipe.tags.through(recipe_id=recipe.id, tag_id=tag.id)
+            for recipe in recipes
+            for tag in rng.sample(tags, min(shape.tags, len(tags)))
+        ])
+        Recipe.ingredients.through.objects.bulk_create([
+            Recipe.ingredients.through(
+                recipe_id=recipe.id,
+                ingredient_id=ingredient.id,
+            )
+            for recipe in recipes
+            for ingredient in rng.sample(
+                ingredients,
+                min(shape.ingredients, len(ingredients)),
+            )
+        ])
+
+    return users
+
+
+def _percentile(values, percent):
+    """Return the nearest-rank percentile of sorted values."""
+    rank = max(math.ceil(percent / 100 * len(values)) - 1, 0)
+    return values[rank]
+
+
+def run_benchmark(operation, iterations, warmup):
+    """Time an operation and record its queries and allocations."""
+    for _ in range(warmup):
+        operation()
+
+    timings = []
+    gc.collect()
+    for _ in range(iterations):
+        start = time.perf_counter()
+        operation()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+
+    # Queries and allocations are measured in a separate pass so that
+    # the instrumentation does not skew the latency numbers.
+    profile_runs = min(iterations, 20)
+    queries = []
+    peaks = []
+    for _ in range(profile_runs):
+        with CaptureQueriesContext(connection) as captured:
+            tracemalloc.start()
+            operation()
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        queries.append(len(captured))
+        peaks.append(peak / 1024)
+
+    return {
+        'iterations': iterations,
+        'mean_ms': round(statistics.mean(timings), 3),
+        'p50_ms': round(_percentile(timings, 50), 3),
+        'p90_ms': round(_percentile(timings, 90), 3),
+        'p99_ms': round(_percentile(timings, 99), 3),
+        'max_ms': round(timings[-1], 3),
+        'queries': max(queries),
+        'alloc_peak_kib': round(statistics.mean(peaks), 1),
+    }
+
+
+def run_benchmarks(context, names=None, iterations=100, warmup=5):
+    """Run the selected benchmarks and return their results by name."""
+    results = {}
+    with unthrottled():
+        for name, (func, max_iterations) in get_benchmarks().items():
+            if names and name not in names:
+                continue
+            # Roll back each benchmark so writes do not change the data
+            # set seen by the ones that follow.
+            with transaction.atomic():
+                operation = func(context)
+                results[name] = run_benchmark(
+                    operation,
+                    iterations=min(iterations, max_iterations or iterations),
+                    warmup=warmup,
+                )
+                transaction.set_rollback(True)
+    return results
+
+
+def unthrottled():
+    """Raise the rate limits above what the benchmarks request.
+
+    The throttles still run, so their cost is part of the results.
+    """
+    rest_framework = settings.REST_FRAMEWORK
+    rates = rest_framework.get('DEFAULT_THROTTLE_RATES', {})
+    return override_settings(REST_FRAMEWORK={
+        **rest_framework,
+        'DEFAULT_THROTTLE_RATES': {scope: '1000000/s' for scope in rates},
+    })
+
+
+def git_revision():
+    """Return the current git commit, if available."""
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            stderr=subprocess.DEVNULL,
+            text=True,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def report_metadata(shape):
+    """Describe the environment the results were produced in."""
+    return {
+        'revision': git_revision(),
+        'timestamp': int(time.time()),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'database': connection.vendor,
+        'shape': shape.as_dict(),
+    }
+
+
+def compare_results(baseline, current):
+    """Return the relative change of each metric against a baseline."""
+    changes = {}
+    for name, result in current.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        changes[name] = {
+            metric: round((value - base[metric]) / base[metric] * 100, 1)
+            for metric, value in result.items()
+            if metric != 'iterations' and base.get(metric)
+        }
+    return changes
@@ -0,0 +1,109 @@
+"""
+PostgreSQL backend with health checked persistent connections.
+
+Connections are kept for CONN_MAX_AGE seconds, their maximum lifetime.
+With CONN_HEALTH_CHECKS in the database settings, a reused connection
+is checked with a cheap query the first time a request uses it, and
+replaced when the server side went away. Opening and closing
+connections is recorded in the metrics.
+"""
+import time
+
+from django.db.backends.postgresql import base
+from django.utils.asyncio import async_unsafe
+
+from core import metrics
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    health_check_done = False
+
+    @property
+    def health_checks_enabled(self):
+        return bool(
+            self.settings_dict.get('CONN_HEALTH_CHECKS')
+            and self.settings_dict['CONN_MAX_AGE'] != 0
+        )
+
+    def _labels(self, **labels):
+        return (('alias', self.alias),) + tuple(labels.items())
+
+    def connect(self):
+        # A new connection needs no check, neither while it is set up
+        # nor on its first use.
+        self.health_check_done = True
+        start = time.perf_counter()
+        super().connect()
+        metrics.observe(
+            'db_connection_setup_seconds',
+            time.perf_counter() - start,
+            self._labels(),
+        )
+        metrics.inc('db_connections_opened_total', self._labels())
+
+    def close_if_unusable_or_obsolete(self):
+        if self.connection is None:
+            return
+
+        # get_autocommit() goes through ensure_connection(), which must
+        # not run the health check for it.
+        self.health_check_done = True
+        reason = None
+        if self.get_autocommit() != self.settings_dict['AUTOCOMMIT']:
+            reason = 'autocommit'
+        elif self.errors_occurred:
+            if self.is_usable():
+                self.errors_occurred = False
+            else:
+                reason = 'error'
+        elif self.close_at is not None and time.monotonic() >= self.close_at:
+            reason = 'max_age'
+
+        if reason:
+            self.close()
+            metrics.inc(
+                'db_connections_closed_total',
+                self._labels(reason=reason),
+            )
+        # Runs when requests start and finish. The next request checks
+        # the connection on its first query, if it makes any.
+        self.health_check_done = False
+
+    @async_unsafe
+    def ensure_connection(self):
+        if (
+            self.connection is not None
+            and not self.health_check_done
+            and not self.in_atomic_block
+        ):
+            # First use of a connection kept from an earlier request.
+            self.health_check_done = True
+            if self.health_checks_enabled and not self.is_usable():
+                self.close()
+                metrics.inc(
+                    'db_connections_closed_total',
+                    self._labels(reason='health_check'),
+                )
+            else:
+                metrics.inc('db_connections_reused_total', self._labels())
+        super().ensure_connection()
+
+
+metrics.describe(
+    'db_connections_opened_total', 'counter',
+    'Database connections opened, by alias.',
+)
+metrics.describe(
+    'db_connections_closed_total', 'counter',
+    'Database connections closed between requests, by alias and reason.',
+)
+metrics.describe(
+    'db_connections_reused_total', 'counter',
+    'Requests whose queries ran on a connection kept from an earlier '
+    'request.',
+)
+metrics.describe(
+    'db_connection_setup_seconds', 'histogram',
+    'Time spent opening database connections.',
+    buckets=metrics.LATENCY_BUCKETS,
+)
@@ -0,0 +1,166 @@
+"""
+Deletion of users and everything they own.
+
+Django's collector loads every recipe, tag, ingredient and through row
+of a user into Python before deleting them. Here they are deleted with
+set based statements, batch_size rows at a time, each batch in a
+transaction of its own so locks are held briefly. The image files of
+the deleted recipes are queued as FileDeletion rows, removed from the
+storage later by process_file_deletions: a batch right after the admin
+deletes users, the whole queue after purge_users, and what is left by
+the file deletion worker of the deployment, scripts/file_deletions.sh.
+
+An interrupted deletion leaves the users with part of their data, and
+running it again finishes it.
+"""
+import logging
+from collections import Counter
+
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Now
+
+from core.models import FileDeletion, Ingredient, Recipe, Tag
+
+logger = logging.getLogger(__name__)
+
+
+def _raw_delete(queryset):
+    # A single DELETE, without the collector looking for related rows
+    # and signal receivers. The callers remove the related rows first.
+    return queryset._raw_delete(queryset.db)
+
+
+def _batches(queryset, batch_size):
+    """Yield lists of up to batch_size primary keys of the queryset.
+
+    Each batch must be deleted before the next one is read.
+    """
+    while True:
+        pks = list(queryset.order_by('pk').values_list('pk', flat=True)[
+            :batch_size
+        ])
+        if not pks:
+            return
+        yield pks
+
+
+def _queue_images(recipe_pks):
+    """Queue the image files of the recipes for removal."""
+    images = (
+        Recipe.objects
+        .filter(pk__in=recipe_pks, image__gt='')
+        .values_list('image', Now(), Value(0))
+    )
+    sql, params = images.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {FileDeletion._meta.db_table} '
+            f'(name, queued_at, attempts) {sql}',
+            params,
+        )
+        return cursor.rowcount
+
+
+def delete_users(users, batch_size=1000):
+    """Delete the users of the queryset and the data they own.
+
+    Returns the number of rows deleted by model, and of files queued.
+    """
+    user_pks = list(users.values_list('pk', flat=True))
+    counts = Counter()
+
+    recipes = Recipe.objects.filter(user__in=user_pks)
+    for pks in _batches(recipes, batch_size):
+        with transaction.atomic():
+            counts['files'] += _queue_images(pks)
+            for through in (Recipe.tags.through, Recipe.ingredients.through):
+                counts[through._meta.label] += _raw_delete(
+                    through.objects.filter(recipe__in=pks),
+                )
+            counts[Recipe._meta.label] += _raw_delete(
+                Recipe.objects.filter(pk__in=pks),
+            )
+
+    for model, through, field in (
+        (Tag, Recipe.tags.through, 'tag__in'),
+        (Ingredient, Recipe.ingredients.through, 'ingredient__in'),
+    ):
+        owned = model.objects.filter(user__in=user_pks)
+        for pks in _batches(owned, batch_size):
+            with transaction.atomic():
+                # Recipes of other users may still use them.
+                counts[through._meta.label] += _raw_delete(
+                    through.objects.filter(**{field: pks}),
+                )
+                counts[model._meta.label] += _raw_delete(
+                    model.objects.filter(pk__in=pks),
+                )
+
+    # What is left is small, the collector deletes it along with the
+    # users: tokens, permissions and admin log entries.
+    user_model = users.model
+    for start in range(0, len(user_pks), batch_size):
+        with transaction.atomic():
+            _, deleted = user_model.objects.filter(
+                pk__in=user_pks[start:start + batch_size],
+            ).delete()
+        counts.update(deleted)
+
+    logger.info('deleted %d users', counts[user_model._meta.label])
+    return {label: count for label, count in counts.items() if count}
+
+
+def process_file_deletions(batch_size=100, storage=None):
+    """Remove up to batch_size queued files from the storage.
+
+    Rows are locked with SKIP LOCKED so several processes can share the
+    queue. Files which could not be removed stay queued with their
+    attempts counted. Returns the number of files removed.
+    """
+    if storage is None:
+        storage = default_storage
+    removed = 0
+    with transaction.atomic():
+        queued = list(
+            FileDeletion.objects
+            .select_for_update(skip_locked=True)
+            .order_by('attempts', 'pk')[:batch_size]
+        )
+        done = []
+        failed = []
+        for deletion in queued:
+            try:
+                storage.delete(deletion.name)
+            except OSError:
+                logger.warning(
+                    'could not remove %s', deletion.name, exc_info=True,
+                )
+                failed.append(deletion.pk)
+            else:
+                done.append(deletion.pk)
+                removed += 1
+        FileDeletion.objects.filter(pk__in=done).delete()
+        if failed:
+            FileDeletion.objects.filter(pk__in=failed).update(
+                attempts=F('attempts') + 1,
+            )
+    return removed
+
+
+def drain_file_deletions(batch_size=100, max_batches=None, storage=None):
+    """Remove queued files batch by batch, up to max_batches batches.
+
+    Stops early once the queue is empty or the files left cannot be
+    removed. Returns the number of files removed.
+    """
+    total = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        removed = process_file_deletions(batch_size, storage)
+        if not removed:
+            break
+        total += removed
+        batches += 1
+    return total
@@ -0,0 +1,83 @@
+"""
+Password hashers with their work factor taken from settings.
+
+Django rehashes a password when it is checked and the preferred hasher
+or its work factor changed, so raising PASSWORD_PBKDF2_ITERATIONS or
+switching PASSWORD_HASHER to argon2 upgrades users as they log in.
+"""
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+_executor = None
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    """PBKDF2 with PASSWORD_PBKDF2_ITERATIONS iterations."""
+
+    @property
+    def iterations(self):
+        return settings.PASSWORD_PBKDF2_ITERATIONS
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    """Argon2 with the costs of the PASSWORD_ARGON2 settings."""
+
+    @property
+    def time_cost(self):
+        return settings.PASSWORD_ARGON2_TIME_COST
+
+    @property
+    def memory_cost(self):
+        return settings.PASSWORD_ARGON2_MEMORY_COST
+
+    @property
+    def parallelism(self):
+        return settings.PASSWORD_ARGON2_PARALLELISM
+
+
+def get_hash_executor():
+    """Return the thread pool running the views which hash passwords.
+
+    Hashing releases the GIL, so PASSWORD_HASH_THREADS threads hash in
+    parallel while the event loop keeps serving other requests.
+    """
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.PASSWORD_HASH_THREADS,
+            thread_name_prefix='hash',
+        )
+    return _executor
+
+
+def measure_hashing(hasher, count=20, threads=1):
+    """Check count passwords with the hasher, threads at a time.
+
+    Returns the checks per second and the latency of one check.
+    """
+    password = 'benchmark-password'
+    encoded = hasher.encode(password, hasher.salt())
+    timings = []
+
+    def check(_):
+        start = time.perf_counter()
+        if not hasher.verify(password, encoded):
+            raise AssertionError('password check failed')
+        timings.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(check, range(count)))
+    elapsed = time.perf_counter() - start
+
+    return {
+        'hasher': hasher.algorithm,
+        'threads': threads,
+        'checks_per_second': round(count / elapsed, 1),
+        'p50_ms': round(statistics.median(timings), 2),
+        'max_ms': round(max(timings), 2),
+    }
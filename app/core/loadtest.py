@@ -0,0 +1,145 @@
+"""
+Load test of a running server with slow clients.
+
+Slow clients read their responses a few bytes at a time through a small
+receive buffer, keeping the server busy writing. Meanwhile fast clients
+measure the latency the remaining capacity gives everyone else. Running
+it against the uwsgi and the ASGI modes compares how each copes.
+"""
+import asyncio
+import dataclasses
+import socket
+import time
+from urllib.parse import urlsplit
+
+
+@dataclasses.dataclass
+class LoadOptions:
+    url: str
+    headers: dict
+    slow_clients: int = 50
+    fast_clients: int = 10
+    requests: int = 200
+    read_size: int = 1024
+    read_delay: float = 0.05
+    timeout: float = 60.0
+
+
+def percentile(values, fraction):
+    """Return the value below which the fraction of values falls."""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(fraction * len(ordered)))
+    return ordered[index]
+
+
+async def _open(options, receive_buffer=None):
+    parts = urlsplit(options.url)
+    host = parts.hostname
+    port = parts.port or 80
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    if receive_buffer:
+        # Must be set before connecting to shrink the TCP window.
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, receive_buffer)
+    sock.setblocking(False)
+    await asyncio.get_running_loop().sock_connect(sock, (host, port))
+    reader, writer = await asyncio.open_connection(sock=sock)
+
+    target = parts.path or '/'
+    if parts.query:
+        target += f'?{parts.query}'
+    lines = [f'GET {target} HTTP/1.1', f'Host: {parts.netloc}']
+    lines += [f'{name}: {value}' for name, value in options.headers.items()]
+    lines += ['Connection: close', '', '']
+    writer.write('\r\n'.join(lines).encode())
+    await writer.drain()
+    return reader, writer
+
+
+async def _request(options, read_size=None, read_delay=0.0, buffer=None):
+    """Make one request, returning its status code."""
+    reader, writer = await _open(options, buffer)
+    try:
+        status_line = await reader.readline()
+        while True:
+            chunk = await reader.read(read_size or 65536)
+            if not chunk:
+                break
+            if read_delay:
+                await asyncio.sleep(read_delay)
+        return int(status_line.split()[1])
+    finally:
+        writer.close()
+
+
+async def _slow_client(options, stop, results):
+    while not stop.is_set():
+        try:
+            status = await _request(
+                options,
+                read_size=options.read_size,
+                read_delay=options.read_delay,
+                buffer=4096,
+            )
+            results.append(status)
+        except (OSError, IndexError, ValueError):
+            results.append(None)
+
+
+async def _fast_client(options, queue, latencies, statuses):
+    while True:
+        try:
+            queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+        start = time.perf_counter()
+        try:
+            status = await asyncio.wait_for(
+                _request(options),
+                options.timeout,
+            )
+        except (OSError, IndexError, ValueError, asyncio.TimeoutError):
+            status = None
+        latencies.append(time.perf_counter() - start)
+        statuses.append(status)
+
+
+async def run_load(options):
+    """Run the load test and return its summary."""
+    stop = asyncio.Event()
+    slow_results = []
+    slow_tasks = [
+        asyncio.create_task(_slow_client(options, stop, slow_results))
+        for _ in range(options.slow_clients)
+    ]
+    # Give the slow clients time to occupy the server.
+    await asyncio.sleep(options.read_delay * 5)
+
+    queue = asyncio.Queue()
+    for i in range(options.requests):
+        queue.put_nowait(i)
+    latencies = []
+    statuses = []
+    start = time.perf_counter()
+    await asyncio.gather(*[
+        _fast_client(options, queue, latencies, statuses)
+        for _ in range(options.fast_clients)
+    ])
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    for task in slow_tasks:
+        task.cancel()
+    await asyncio.gather(*slow_tasks, return_exceptions=True)
+
+    return {
+        'requests': len(statuses),
+        'errors': sum(1 for status in statuses if status != 200),
+        'throughput_rps': round(len(statuses) / elapsed, 2),
+        'p50_ms': round(percentile(latencies, 0.5) * 1000, 2),
+        'p90_ms': round(percentile(latencies, 0.9) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+        'max_ms': round(max(latencies, default=0.0) * 1000, 2),
+        'slow_responses': sum(1 for status in slow_results if status),
+    }
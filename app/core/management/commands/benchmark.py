@@ -0,0 +1,134 @@
+"""
+Django command to benchmark the API hot paths.
+"""
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (
+    setup_test_environment,
+    teardown_test_environment,
+)
+
+from core.benchmark import (
+    BenchmarkContext,
+    DataShape,
+    compare_results,
+    get_benchmarks,
+    report_metadata,
+    run_benchmarks,
+    seed,
+)
+
+
+class Command(BaseCommand):
+    """Django command to seed a benchmark database and time requests."""
+    help = 'Run the API benchmarks against a freshly seeded database.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'names', nargs='*',
+            help='Benchmarks to run, all of them by default.',
+        )
+        parser.add_argument('--users', type=int, default=10)
+        parser.add_argument(
+            '--recipes', type=int, default=100,
+            help='Recipes per user.',
+        )
+        parser.add_argument(
+            '--tags', type=int, default=3,
+            help='Tags per recipe.',
+        )
+        parser.add_argument(
+            '--ingredients', type=int, default=5,
+            help='Ingredients per recipe.',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--iterations', type=int, default=100)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument(
+            '--output',
+            help='Write the results as JSON to this file.',
+        )
+        parser.add_argument(
+            '--compare',
+            help='JSON results of a previous run to compare against.',
+        )
+        parser.add_argument(
+            '--keepdb', action='store_true',
+            help='Keep the benchmark database between runs.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        unknown = set(options['names']) - set(get_benchmarks())
+        if unknown:
+            raise CommandError(f'Unknown benchmarks: {", ".join(unknown)}')
+
+        shape = DataShape(
+            users=options['users'],
+            recipes=options['recipes'],
+            tags=options['tags'],
+            ingredients=options['ingredients'],
+            seed=options['seed'],
+        )
+
+        setup_test_environment()
+        test_settings = connection.settings_dict['TEST']
+        test_settings['NAME'] = 'bench_' + connection.settings_dict['NAME']
+        old_name = connection.creation.create_test_db(
+            verbosity=0,
+            autoclobber=True,
+            keepdb=options['keepdb'],
+        )
+        try:
+            self.stdout.write('Seeding benchmark database...')
+            users = seed(shape)
+            context = BenchmarkContext(users[0], shape)
+            results = run_benchmarks(
+                context,
+                names=options['names'],
+                iterations=options['iterations'],
+                warmup=options['warmup'],
+            )
+        finally:
+            connection.creation.destroy_test_db(
+                old_name,
+                verbosity=0,
+                keepdb=options['keepdb'],
+            )
+            teardown_test_environment()
+
+        self._write_table(results)
+        report = {'meta': report_metadata(shape), 'results': results}
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f'Results written to {options["output"]}')
+        if options['compare']:
+            with open(options['compare']) as f:
+                baseline = json.load(f)['results']
+            self._write_comparison(compare_results(baseline, results))
+
+    def _write_table(self, results):
+        """Print one line of results per benchmark."""
+        header = (
+            f'{"benchmark":<28}{"p50 ms":>9}{"p90 ms":>9}{"p99 ms":>9}'
+            f'{"queries":>9}{"KiB":>9}'
+        )
+        self.stdout.write(header)
+        for name, result in results.items():
+            self.stdout.write(
+                f'{name:<28}{result["p50_ms"]:>9}{result["p90_ms"]:>9}'
+                f'{result["p99_ms"]:>9}{result["queries"]:>9}'
+                f'{result["alloc_peak_kib"]:>9}'
+            )
+
+    def _write_comparison(self, changes):
+        """Print the relative change of each benchmark's metrics."""
+        self.stdout.write('Change against baseline (%):')
+        for name, metrics in changes.items():
+            formatted = ', '.join(
+                f'{metric} {change:+}' for metric, change in metrics.items()
+            )
+            self.stdout.write(f'{name:<28}{formatted}')
@@ -0,0 +1,17 @@
+"""
+Django command to pre-generate the OpenAPI schema.
+"""
+from django.core.management.base import BaseCommand
+
+from core.schema import write_schema_files
+
+
+class Command(BaseCommand):
+    """Django command to render the schema files served by the API."""
+    help = 'Render the OpenAPI schema to SCHEMA_CACHE_DIR.'
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        for path in write_schema_files():
+            self.stdout.write(f'Wrote {path}')
+        self.stdout.write(self.style.SUCCESS('Schema generated!!!'))
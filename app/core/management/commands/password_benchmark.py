@@ -0,0 +1,42 @@
+"""
+Django command to measure the password hashing throughput of logins.
+"""
+import json
+import os
+
+from django.contrib.auth.hashers import get_hasher
+from django.core.management.base import BaseCommand
+
+from core.hashers import measure_hashing
+
+
+class Command(BaseCommand):
+    """Django command timing password checks with each hasher."""
+    help = (
+        'Measure how many password checks a second each hasher allows '
+        'with its configured work factor, checking on 1 thread and on '
+        'as many threads as CPUs.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'hashers', nargs='*', default=['pbkdf2_sha256', 'argon2'],
+            help='Algorithms of the hashers to measure.',
+        )
+        parser.add_argument('--count', type=int, default=20)
+        parser.add_argument(
+            '--threads', type=int, action='append',
+            help='Threads checking at once, may be repeated.',
+        )
+
+    def handle(self, *args, **options):
+        threads = options['threads'] or sorted({1, os.cpu_count() or 1})
+        for algorithm in options['hashers']:
+            hasher = get_hasher(algorithm)
+            for count in threads:
+                result = measure_hashing(
+                    hasher,
+                    count=options['count'],
+                    threads=count,
+                )
+                self.stdout.write(json.dumps(result))
@@ -0,0 +1,21 @@
+"""
+Django command to remove the files queued by deletions.
+"""
+from django.core.management.base import BaseCommand
+
+from core.deletion import drain_file_deletions
+
+
+class Command(BaseCommand):
+    """Django command emptying the file deletion queue."""
+    help = (
+        'Remove the stored files queued for deletion, until none is left '
+        'or the ones left cannot be removed. Several can run at once.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+
+    def handle(self, *args, **options):
+        total = drain_file_deletions(options['batch_size'])
+        self.stdout.write(f'Removed {total} files.')
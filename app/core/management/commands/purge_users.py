@@ -0,0 +1,63 @@
+"""
+Django command to delete users and their data in bulk.
+"""
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from core.deletion import delete_users, drain_file_deletions
+
+
+class Command(BaseCommand):
+    """Django command deleting users with set based statements."""
+    help = (
+        'Delete users with their recipes, tags and ingredients, in '
+        'batches, then remove their recipe images from the storage.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--id', type=int, action='append', dest='ids', default=[],
+            help='Delete the user with this id, may be repeated.',
+        )
+        parser.add_argument(
+            '--email', action='append', dest='emails', default=[],
+            help='Delete the user with this email, may be repeated.',
+        )
+        parser.add_argument(
+            '--inactive', action='store_true',
+            help='Delete every inactive user.',
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Only count the users which would be deleted.',
+        )
+
+    def handle(self, *args, **options):
+        if not (options['ids'] or options['emails'] or options['inactive']):
+            raise CommandError(
+                'Select users with --id, --email or --inactive.'
+            )
+
+        User = get_user_model()
+        selected = [User.objects.filter(pk__in=options['ids'])]
+        for email in options['emails']:
+            selected.append(User.objects.filter_by_email(email))
+        if options['inactive']:
+            selected.append(User.objects.filter(is_active=False))
+        pks = set()
+        for users in selected:
+            pks.update(users.values_list('pk', flat=True))
+        users = User.objects.filter(pk__in=pks)
+
+        if options['dry_run']:
+            self.stdout.write(f'{users.count()} users would be deleted.')
+            return
+
+        counts = delete_users(users, batch_size=options['batch_size'])
+        # Files which cannot be removed now stay queued for the file
+        # deletion worker.
+        counts['files_removed'] = drain_file_deletions()
+        self.stdout.write(json.dumps(counts))
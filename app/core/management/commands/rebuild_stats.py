@@ -0,0 +1,50 @@
+"""
+Django command to count the recipe statistics of users again.
+"""
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from core.stats import rebuild_stats
+
+
+class Command(BaseCommand):
+    """Django command repairing the recipe statistics."""
+    help = (
+        'Count the recipe statistics of users again from their recipes, '
+        'after recipes were written other ways than through the API. '
+        'Each user is counted in a transaction of their own.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--id', type=int, action='append', dest='ids', default=[],
+            help='Rebuild the stats of the user with this id, may be '
+                 'repeated. Every user by default.',
+        )
+        parser.add_argument(
+            '--email', action='append', dest='emails', default=[],
+            help='Rebuild the stats of the user with this email, may be '
+                 'repeated.',
+        )
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        if options['ids'] or options['emails']:
+            pks = set(options['ids'])
+            for email in options['emails']:
+                pks.update(
+                    User.objects.filter_by_email(email)
+                    .values_list('pk', flat=True)
+                )
+            users = User.objects.filter(pk__in=pks)
+        else:
+            users = User.objects.all()
+
+        rebuilt = 0
+        recipes = 0
+        for pk in users.order_by('pk').values_list('pk', flat=True).iterator():
+            recipes += rebuild_stats(pk).recipe_count
+            rebuilt += 1
+        self.stdout.write(json.dumps({'users': rebuilt, 'recipes': recipes}))
@@ -0,0 +1,93 @@
+"""
+Django command to generate synthetic data for load testing.
+"""
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+
+from core.seed import SeedOptions, seed_data, write_placeholder_images
+
+
+class Command(BaseCommand):
+    """Django command to bulk load production shaped data."""
+    help = (
+        'Generate users, recipes, tags and ingredients with COPY. '
+        'The same --seed and --chunk-size always produce the same data.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument(
+            '--max-recipes', type=int, default=200,
+            help='Upper bound of the Zipf distributed recipes per user.',
+        )
+        parser.add_argument(
+            '--tags', type=int, default=20,
+            help='Tags owned by each user.',
+        )
+        parser.add_argument(
+            '--ingredients', type=int, default=40,
+            help='Ingredients owned by each user.',
+        )
+        parser.add_argument(
+            '--max-tags', type=int, default=6,
+            help='Upper bound of tags per recipe.',
+        )
+        parser.add_argument(
+            '--max-ingredients', type=int, default=12,
+            help='Upper bound of ingredients per recipe.',
+        )
+        parser.add_argument(
+            '--zipf', type=float, default=1.2,
+            help='Exponent of the Zipf distributions.',
+        )
+        parser.add_argument(
+            '--image-ratio', type=float, default=0.3,
+            help='Share of recipes with a placeholder image.',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help='Users generated and loaded per transaction.',
+        )
+        parser.add_argument('--workers', type=int, default=1)
+        parser.add_argument(
+            '--password', default='seedpass123',
+            help='Password shared by every generated user.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        seed_options = SeedOptions(
+            users=options['users'],
+            max_recipes=options['max_recipes'],
+            tags=options['tags'],
+            ingredients=options['ingredients'],
+            max_tags=options['max_tags'],
+            max_ingredients=options['max_ingredients'],
+            zipf=options['zipf'],
+            image_ratio=options['image_ratio'],
+            seed=options['seed'],
+            chunk_size=options['chunk_size'],
+        )
+        if seed_options.image_ratio:
+            write_placeholder_images()
+
+        start = time.perf_counter()
+        totals = seed_data(
+            seed_options,
+            make_password(options['password']),
+            workers=options['workers'],
+            progress=self._progress,
+        )
+        elapsed = time.perf_counter() - start
+
+        for table, count in totals.items():
+            self.stdout.write(f'{table}: {count} rows')
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {sum(totals.values())} rows in {elapsed:.1f}s'
+        ))
+
+    def _progress(self, done, total):
+        self.stdout.write(f'Loaded chunk {done}/{total}')
@@ -0,0 +1,65 @@
+"""
+Django command to load test a running server with slow clients.
+"""
+import asyncio
+import json
+
+from django.core.management.base import BaseCommand
+
+from core.loadtest import LoadOptions, run_load
+
+
+class Command(BaseCommand):
+    """Django command measuring latency while slow clients hold on."""
+    help = (
+        'Measure the latency of a running server while slow clients read '
+        'their responses. Start the server in each mode first, e.g. '
+        '"uwsgi --http-socket :9000 --workers 4 --module app.wsgi" and '
+        '"uvicorn app.asgi:application --port 9000 --workers 4".'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url',
+            default='http://127.0.0.1:9000/api/recipe/recipes/',
+        )
+        parser.add_argument(
+            '--token',
+            help='API token sent in the Authorization header.',
+        )
+        parser.add_argument('--slow-clients', type=int, default=50)
+        parser.add_argument('--fast-clients', type=int, default=10)
+        parser.add_argument(
+            '--requests', type=int, default=200,
+            help='Requests made by the fast clients.',
+        )
+        parser.add_argument(
+            '--read-size', type=int, default=1024,
+            help='Bytes slow clients read at a time.',
+        )
+        parser.add_argument(
+            '--read-delay', type=float, default=0.05,
+            help='Seconds slow clients wait between reads.',
+        )
+        parser.add_argument(
+            '--label',
+            help='Name of the run in the output, e.g. the server mode.',
+        )
+
+    def handle(self, *args, **options):
+        headers = {}
+        if options['token']:
+            headers['Authorization'] = f'Token {options["token"]}'
+        load_options = LoadOptions(
+            url=options['url'],
+            headers=headers,
+            slow_clients=options['slow_clients'],
+            fast_clients=options['fast_clients'],
+            requests=options['requests'],
+            read_size=options['read_size'],
+            read_delay=options['read_delay'],
+        )
+        summary = asyncio.run(run_load(load_options))
+        if options['label']:
+            summary = {'label': options['label'], **summary}
+        self.stdout.write(json.dumps(summary))
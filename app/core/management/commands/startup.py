@@ -0,0 +1,34 @@
+"""
+Django command preparing the app when a container starts.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.startup import run_steps, startup_chains
+
+
+class Command(BaseCommand):
+    """Django command running the start up steps concurrently."""
+    help = (
+        'Wait for the database and migrate it, collect static files and '
+        'build the schema, skipping what is already up to date.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--db-timeout', type=float, default=60.0,
+            help='Seconds to wait for the database.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        start = time.perf_counter()
+        for result in run_steps(startup_chains(options['db_timeout'])):
+            status = 'skipped' if result.skipped else 'done'
+            self.stdout.write(
+                f'{result.name}: {status} in {result.seconds * 1000:.1f}ms'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Started up in {(time.perf_counter() - start) * 1000:.1f}ms'
+        ))
@@ -0,0 +1,109 @@
+"""
+Django command reporting the cold start cost of a worker.
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.warmup import parse_import_times
+
+# Runs in a fresh interpreter, so it measures the imports of the app.
+PROBE = '''
+import io, json, sys, time
+start = time.perf_counter()
+from app.wsgi import application
+loaded = time.perf_counter() - start
+print('probe: loaded', file=sys.stderr)
+
+def request(path, token):
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80',
+        'HTTP_HOST': 'localhost',
+        'wsgi.input': io.BytesIO(),
+        'wsgi.url_scheme': 'http',
+    }
+    if token:
+        environ['HTTP_AUTHORIZATION'] = f'Token {token}'
+    start = time.perf_counter()
+    b''.join(application(environ, lambda status, headers: None))
+    return time.perf_counter() - start
+
+path, token = sys.argv[1], sys.argv[2]
+first = request(path, token)
+second = request(path, token)
+print(json.dumps({'load': loaded, 'first': first, 'second': second}))
+'''
+
+
+class Command(BaseCommand):
+    """Django command comparing worker start up with and without warm-up."""
+    help = (
+        'Start fresh interpreters loading app.wsgi with and without the '
+        'warm-up and report the load time, the latency of the first two '
+        'requests and where import time goes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/api/recipe/recipes/')
+        parser.add_argument(
+            '--token',
+            default='',
+            help='API token sent in the Authorization header.',
+        )
+        parser.add_argument('--runs', type=int, default=5)
+        parser.add_argument(
+            '--top', type=int, default=10,
+            help='Number of packages listed by import time.',
+        )
+
+    def _probe(self, path, token, warm_up):
+        env = dict(
+            os.environ,
+            WARM_UP_ON_LOAD=str(int(warm_up)),
+            PYTHONPATH=str(settings.BASE_DIR),
+        )
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', PROBE, path, token],
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        load_output, _, request_output = result.stderr.partition(
+            'probe: loaded'
+        )
+        timings = json.loads(result.stdout.strip().splitlines()[-1])
+        return (
+            timings,
+            parse_import_times(load_output),
+            parse_import_times(request_output),
+        )
+
+    def handle(self, *args, **options):
+        for warm_up in (False, True):
+            runs = [
+                self._probe(options['path'], options['token'], warm_up)
+                for _ in range(options['runs'])
+            ]
+            summary = {'warm_up': warm_up}
+            for phase in ('load', 'first', 'second'):
+                summary[f'{phase}_ms'] = round(
+                    statistics.median(run[0][phase] for run in runs) * 1000,
+                    2,
+                )
+            for key, index in (('load_imports', 1), ('request_imports', 2)):
+                imports = runs[-1][index]
+                top = sorted(imports.items(), key=lambda item: -item[1])
+                summary[f'{key}_ms'] = {
+                    package: round(seconds * 1000, 2)
+                    for package, seconds in top[:options['top']]
+                }
+            self.stdout.write(json.dumps(summary))
@@ -0,0 +1,301 @@
+"""
+Prometheus metrics shared across worker processes.
+
+Each process writes its values to its own memory mapped file in
+METRICS_DIR, the metrics view sums the files of every worker. Recording
+a value is a dict lookup and a struct update, so it stays in the
+microsecond range on the request path.
+"""
+import bisect
+import functools
+import glob
+import json
+import mmap
+import os
+import struct
+import threading
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+
+INITIAL_SIZE = 64 * 1024
+HEADER = struct.Struct('<Q')
+ENTRY_HEADER = struct.Struct('<I')
+VALUE = struct.Struct('<d')
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+SIZE_BUCKETS = (
+    16 * 1024, 64 * 1024, 256 * 1024, 1024 * 1024,
+    4 * 1024 * 1024, 10 * 1024 * 1024,
+)
+
+DESCRIPTIONS = {}
+BUCKETS = {}
+
+
+class MmapValues:
+    """Float values keyed by string, stored in a memory map.
+
+    The map starts with the number of bytes used, followed by entries
+    made of the key length, the key padded to 8 bytes and the value.
+    """
+    def __init__(self, path=None):
+        self.path = path
+        self.lock = threading.Lock()
+        self.offsets = {}
+        if path:
+            self.file = os.fdopen(os.open(path, os.O_RDWR | os.O_CREAT), 'r+b')
+            if os.fstat(self.file.fileno()).st_size < INITIAL_SIZE:
+                self.file.truncate(INITIAL_SIZE)
+            self.map = mmap.mmap(self.file.fileno(), 0)
+        else:
+            self.file = None
+            self.map = mmap.mmap(-1, INITIAL_SIZE)
+        self.used = HEADER.unpack_from(self.map, 0)[0] or HEADER.size
+        for key, _, offset in read_entries(self.map):
+            self.offsets[key] = offset
+
+    def inc(self, key, amount=1.0):
+        with self.lock:
+            offset = self.offsets.get(key)
+            if offset is None:
+                offset = self._append(key)
+            value = VALUE.unpack_from(self.map, offset)[0]
+            VALUE.pack_into(self.map, offset, value + amount)
+
+    def _append(self, key):
+        encoded = key.encode()
+        padded = len(encoded) + (-(ENTRY_HEADER.size + len(encoded)) % 8)
+        size = ENTRY_HEADER.size + padded + VALUE.size
+        while self.used + size > len(self.map):
+            self._grow()
+        ENTRY_HEADER.pack_into(self.map, self.used, len(encoded))
+        start = self.used + ENTRY_HEADER.size
+        self.map[start:start + len(encoded)] = encoded
+        offset = start + padded
+        VALUE.pack_into(self.map, offset, 0.0)
+        self.used += size
+        # Readers only look at entries below the used mark, so it is
+        # moved once the entry is complete.
+        HEADER.pack_into(self.map, 0, self.used)
+        self.offsets[key] = offset
+        return offset
+
+    def _grow(self):
+        size = len(self.map) * 2
+        if self.file:
+            self.map.close()
+            self.file.truncate(size)
+            self.map = mmap.mmap(self.file.fileno(), 0)
+        else:
+            grown = mmap.mmap(-1, size)
+            grown[:len(self.map)] = self.map[:]
+            self.map.close()
+            self.map = grown
+
+    def items(self):
+        with self.lock:
+            return [(key, value) for key, value, _ in read_entries(self.map)]
+
+
+def read_entries(buffer):
+    """Yield (key, value, offset) for the entries of a metrics map."""
+    used = HEADER.unpack_from(buffer, 0)[0]
+    position = HEADER.size
+    while position < used:
+        length = ENTRY_HEADER.unpack_from(buffer, position)[0]
+        start = position + ENTRY_HEADER.size
+        key = bytes(buffer[start:start + length]).decode()
+        offset = start + length + (-(ENTRY_HEADER.size + length) % 8)
+        yield key, VALUE.unpack_from(buffer, offset)[0], offset
+        position = offset + VALUE.size
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """Return the value store of the current process."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                directory = settings.METRICS_DIR
+                path = None
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                    path = os.path.join(directory, f'metrics-{os.getpid()}.db')
+                _store = MmapValues(path)
+    return _store
+
+
+def _reset_store():
+    global _store
+    _store = None
+
+
+# Forked workers must not write into the parent's file.
+os.register_at_fork(after_in_child=_reset_store)
+
+
+@functools.lru_cache(maxsize=4096)
+def _key(name, labels):
+    return json.dumps([name, labels], separators=(',', ':'))
+
+
+def describe(name, metric_type, description, buckets=None):
+    """Register the type, help text and histogram buckets of a metric."""
+    DESCRIPTIONS[name] = (metric_type, description)
+    if buckets:
+        BUCKETS[name] = buckets
+
+
+def inc(name, labels=(), amount=1.0):
+    """Increment a counter."""
+    get_store().inc(_key(name, labels), amount)
+
+
+def observe(name, value, labels=()):
+    """Record a value in a histogram."""
+    buckets = BUCKETS[name]
+    index = bisect.bisect_left(buckets, value)
+    le = str(buckets[index]) if index < len(buckets) else '+Inf'
+    store = get_store()
+    store.inc(_key(f'{name}_bucket', labels + (('le', le),)))
+    store.inc(_key(f'{name}_sum', labels), value)
+    store.inc(_key(f'{name}_count', labels))
+
+
+def collect():
+    """Return the values of every process, summed by key."""
+    totals = {}
+    if settings.METRICS_DIR:
+        sources = []
+        pattern = os.path.join(settings.METRICS_DIR, 'metrics-*.db')
+        for path in glob.glob(pattern):
+            with open(path, 'rb') as f:
+                if os.fstat(f.fileno()).st_size:
+                    with mmap.mmap(
+                        f.fileno(), 0, access=mmap.ACCESS_READ
+                    ) as buffer:
+                        sources.append([
+                            (key, value)
+                            for key, value, _ in read_entries(buffer)
+                        ])
+    else:
+        sources = [get_store().items()]
+
+    for items in sources:
+        for key, value in items:
+            totals[key] = totals.get(key, 0.0) + value
+    return totals
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    pairs = ','.join(
+        '{}="{}"'.format(
+            name,
+            str(value).replace('\\', '\\\\').replace('"', '\\"'),
+        )
+        for name, value in labels
+    )
+    return '{' + pairs + '}'
+
+
+def render_metrics():
+    """Render all metrics in the Prometheus text format."""
+    series = {}
+    for key, value in collect().items():
+        name, labels = json.loads(key)
+        series.setdefault(name, []).append(
+            (tuple(tuple(label) for label in labels), value)
+        )
+
+    lines = []
+    for name in sorted(DESCRIPTIONS):
+        metric_type, description = DESCRIPTIONS[name]
+        lines.append(f'# HELP {name} {description}')
+        lines.append(f'# TYPE {name} {metric_type}')
+        if metric_type == 'histogram':
+            lines.extend(_render_histogram(name, series))
+        else:
+            for labels, value in sorted(series.get(name, [])):
+                lines.append(f'{name}{_format_labels(labels)} {value:g}')
+    return '\n'.join(lines) + '\n'
+
+
+def _render_histogram(name, series):
+    """Render cumulative buckets, sum and count of a histogram."""
+    groups = {}
+    for labels, value in series.get(f'{name}_bucket', []):
+        le = dict(labels)['le']
+        base = tuple(label for label in labels if label[0] != 'le')
+        groups.setdefault(base, {})[le] = value
+
+    les = [str(bucket) for bucket in BUCKETS[name]] + ['+Inf']
+    lines = []
+    for base, counts in sorted(groups.items()):
+        cumulative = 0.0
+        for le in les:
+            cumulative += counts.get(le, 0.0)
+            labels = _format_labels(base + (('le', le),))
+            lines.append(f'{name}_bucket{labels} {cumulative:g}')
+    for suffix in ('sum', 'count'):
+        for labels, value in sorted(series.get(f'{name}_{suffix}', [])):
+            lines.append(
+                f'{name}_{suffix}{_format_labels(labels)} {value:g}'
+            )
+    return lines
+
+
+def metrics_view(request):
+    """Expose the metrics to a Prometheus scraper."""
+    token = settings.METRICS_TOKEN
+    if token:
+        if request.headers.get('Authorization') != f'Bearer {token}':
+            raise Http404
+    elif not settings.DEBUG:
+        raise Http404
+
+    return HttpResponse(
+        render_metrics(),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
+
+
+describe(
+    'http_requests_total', 'counter',
+    'Requests by route, method and status code.',
+)
+describe(
+    'http_request_duration_seconds', 'histogram',
+    'Request latency by route and method.',
+    buckets=LATENCY_BUCKETS,
+)
+describe(
+    'http_requests_shed_total', 'counter',
+    'Requests refused while the worker was overloaded, by reason.',
+)
+describe(
+    'db_queries_total', 'counter',
+    'Database queries run by requests, by route and method.',
+)
+describe(
+    'db_query_duration_seconds_total', 'counter',
+    'Time spent in database queries, by route and method.',
+)
+describe(
+    'recipe_image_upload_bytes', 'histogram',
+    'Size of uploaded recipe images.',
+    buckets=SIZE_BUCKETS,
+)
+describe(
+    'recipe_image_upload_duration_seconds', 'histogram',
+    'Time spent validating and storing uploaded recipe images.',
+    buckets=LATENCY_BUCKETS,
+)
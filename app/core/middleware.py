@@ -0,0 +1,358 @@
+"""
+Custom middleware.
+"""
+import asyncio
+import logging
+import threading
+import time
+import zlib
+
+from django.conf import settings
+from django.http import JsonResponse
+from django.utils.cache import patch_vary_headers
+
+from core import metrics
+from core.queries import (
+    collect_context_queries,
+    collect_queries,
+    get_query_budget,
+)
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIBLE_TYPES = (
+    'text/',
+    'application/json',
+    'application/msgpack',
+    'application/vnd.oai.openapi',
+    'application/javascript',
+    'application/xml',
+)
+
+
+class AsyncCapableMiddleware:
+    """Base for middleware running natively in sync and async stacks.
+
+    Subclasses implement call() for WSGI requests and acall() for ASGI
+    ones, so serving async views does not hop to a thread per
+    middleware.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = asyncio.iscoroutinefunction(get_response)
+        if self.is_async:
+            # Django awaits callables carrying this marker, like it
+            # does for MiddlewareMixin.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.acall(request)
+        return self.call(request)
+
+
+class QueryCountMiddleware(AsyncCapableMiddleware):
+    """Record the SQL queries run by each request.
+
+    The numbers are added as response headers when DEBUG is on and are
+    logged otherwise. Requests over their view's query budget are
+    logged as warnings.
+    """
+    def call(self, request):
+        with collect_queries() as stats:
+            request.query_stats = stats
+            response = self.get_response(request)
+        return self.report(request, response, stats)
+
+    async def acall(self, request):
+        # Async views query from worker threads, which the context
+        # follows but per-connection wrappers do not.
+        with collect_context_queries() as stats:
+            request.query_stats = stats
+            response = await self.get_response(request)
+        return self.report(request, response, stats)
+
+    def report(self, request, response, stats):
+        budget = getattr(request, 'query_budget', None)
+        if settings.DEBUG:
+            response['X-DB-Queries'] = stats.count
+            response['X-DB-Time'] = f'{stats.time * 1000:.2f}'
+            response['X-DB-Duplicate-Queries'] = stats.duplicates
+            if budget is not None:
+                response['X-DB-Query-Budget'] = budget
+        else:
+            logger.info(
+                '%s %s queries=%d db_ms=%.2f duplicates=%d',
+                request.method,
+                request.path,
+                stats.count,
+                stats.time * 1000,
+                stats.duplicates,
+            )
+
+        if budget is not None and stats.count > budget:
+            logger.warning(
+                'Query budget exceeded for %s %s: %d queries, budget %d',
+                request.method,
+                request.path,
+                stats.count,
+                budget,
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.query_budget = get_query_budget(view_func, request.method)
+
+
+class MetricsMiddleware(AsyncCapableMiddleware):
+    """Record request counts, latency and query counts per route."""
+    def call(self, request):
+        start = time.perf_counter()
+        response = self.get_response(request)
+        self.record(request, response, time.perf_counter() - start)
+        return response
+
+    async def acall(self, request):
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        self.record(request, response, time.perf_counter() - start)
+        return response
+
+    def record(self, request, response, elapsed):
+        match = request.resolver_match
+        labels = (
+            ('route', match.route if match else 'unmatched'),
+            ('method', request.method),
+        )
+        metrics.inc(
+            'http_requests_total',
+            labels + (('status', str(response.status_code)),),
+        )
+        metrics.observe('http_request_duration_seconds', elapsed, labels)
+        stats = getattr(request, 'query_stats', None)
+        if stats is not None:
+            metrics.inc('db_queries_total', labels, stats.count)
+            metrics.inc('db_query_duration_seconds_total', labels, stats.time)
+
+
+class LoadSheddingMiddleware(AsyncCapableMiddleware):
+    """Turn requests away with 503 while the worker is overloaded.
+
+    Requests which waited in front of the workers for longer than
+    LOAD_SHED_MAX_QUEUE_SECONDS, going by the X-Request-Start header of
+    the proxy, are refused, as are requests beyond the
+    LOAD_SHED_MAX_CONCURRENCY served at once by the worker. Refusing
+    costs next to nothing, so the queue drains and the requests which
+    are served keep a bounded latency.
+    """
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.active = 0
+        self.lock = threading.Lock()
+
+    def call(self, request):
+        if request.path_info in settings.LOAD_SHED_EXEMPT_PATHS:
+            return self.get_response(request)
+        reason = self.admit(request)
+        if reason:
+            return self.shed(reason)
+        try:
+            return self.get_response(request)
+        finally:
+            self.release()
+
+    async def acall(self, request):
+        if request.path_info in settings.LOAD_SHED_EXEMPT_PATHS:
+            return await self.get_response(request)
+        reason = self.admit(request)
+        if reason:
+            return self.shed(reason)
+        try:
+            return await self.get_response(request)
+        finally:
+            self.release()
+
+    def admit(self, request):
+        """Count the request in, or return why it is refused."""
+        max_queue = settings.LOAD_SHED_MAX_QUEUE_SECONDS
+        if max_queue:
+            waited = queue_seconds(request)
+            if waited is not None and waited > max_queue:
+                return 'queue'
+
+        with self.lock:
+            limit = settings.LOAD_SHED_MAX_CONCURRENCY
+            if limit and self.active >= limit:
+                return 'concurrency'
+            self.active += 1
+        return None
+
+    def release(self):
+        with self.lock:
+            self.active -= 1
+
+    def shed(self, reason):
+        metrics.inc('http_requests_shed_total', (('reason', reason),))
+        response = JsonResponse(
+            {'detail': 'The server is overloaded, retry later.'},
+            status=503,
+        )
+        response['Retry-After'] = str(settings.LOAD_SHED_RETRY_AFTER)
+        return response
+
+
+def queue_seconds(request):
+    """Return how long the request waited before reaching the worker.
+
+    The proxy sets X-Request-Start to t= followed by the time it got the
+    request, in seconds since the epoch.
+    """
+    header = request.META.get('HTTP_X_REQUEST_START', '')
+    if header.startswith('t='):
+        header = header[2:]
+    try:
+        started = float(header)
+    except ValueError:
+        return None
+    return max(time.time() - started, 0.0)
+
+
+class GzipCompressor:
+    """Gzip stream with the interface of brotli.Compressor."""
+    def __init__(self):
+        self.compressor = zlib.compressobj(
+            settings.COMPRESSION_GZIP_LEVEL,
+            zlib.DEFLATED,
+            zlib.MAX_WBITS | 16,
+        )
+
+    def process(self, data):
+        return self.compressor.compress(data)
+
+    def flush(self):
+        return self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self.compressor.flush()
+
+
+def brotli_compressor():
+    return brotli.Compressor(quality=settings.COMPRESSION_BROTLI_QUALITY)
+
+
+def accepted_encodings(header):
+    """Return the q-value of each coding in an Accept-Encoding header."""
+    accepted = {}
+    for item in header.split(','):
+        coding, _, params = item.partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding] = quality
+    return accepted
+
+
+class CompressionMiddleware(AsyncCapableMiddleware):
+    """Compress responses with brotli or gzip, per Accept-Encoding.
+
+    Responses under COMPRESSION_MIN_SIZE bytes are left alone, as are
+    content types that do not compress well. Streaming responses are
+    compressed chunk by chunk and flushed after each one, so they are
+    never buffered.
+    """
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.compressors = {'gzip': GzipCompressor}
+        if brotli is not None:
+            self.compressors = {'br': brotli_compressor, **self.compressors}
+
+    def call(self, request):
+        return self.compress(request, self.get_response(request))
+
+    async def acall(self, request):
+        return self.compress(request, await self.get_response(request))
+
+    def compress(self, request, response):
+        """Return the response compressed as the client accepts."""
+        if not self.compressible(response):
+            return response
+        # Whether or not this one is compressed, the response depends on
+        # Accept-Encoding, and caches must keep the variants apart.
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = self.select_encoding(request, response)
+        if encoding is None:
+            return response
+
+        compressor = self.compressors[encoding]()
+        if response.streaming:
+            response.streaming_content = self.compress_stream(
+                compressor,
+                response.streaming_content,
+            )
+            del response['Content-Length']
+        else:
+            compressed = compressor.process(response.content)
+            compressed += compressor.finish()
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+
+        response['Content-Encoding'] = encoding
+        # The compressed body is no longer byte for byte the one the
+        # strong ETag was computed for.
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        return response
+
+    def compressible(self, response):
+        """Return whether the type of the response may be compressed."""
+        if response.has_header('Content-Encoding'):
+            return False
+        if response.status_code == 206:
+            return False
+        content_type = response.get('Content-Type', '')
+        return content_type.startswith(COMPRESSIBLE_TYPES)
+
+    def select_encoding(self, request, response):
+        """Return the coding to compress the response with, if any."""
+        if response.streaming:
+            length = response.get('Content-Length')
+            if length and int(length) < settings.COMPRESSION_MIN_SIZE:
+                return None
+        elif len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return None
+
+        accepted = accepted_encodings(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        best, best_quality = None, 0.0
+        for encoding in self.compressors:
+            quality = accepted.get(encoding, accepted.get('*', 0.0))
+            if quality > best_quality:
+                best, best_quality = encoding, quality
+        return best
+
+    def compress_stream(self, compressor, chunks):
+        for chunk in chunks:
+            data = compressor.process(chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
@@ -0,0 +1,28 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+# Autocomplete matches UPPER(name) by prefix with LIKE and by trigram
+# similarity, both served by a trigram index on the same expression.
+INDEX_SQL = (
+    'CREATE INDEX {table}_name_upper_trgm '
+    'ON {table} USING gin (UPPER(name) gin_trgm_ops)'
+)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_recipe_image'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunSQL(
+            INDEX_SQL.format(table='core_tag'),
+            reverse_sql='DROP INDEX core_tag_name_upper_trgm',
+        ),
+        migrations.RunSQL(
+            INDEX_SQL.format(table='core_ingredient'),
+            reverse_sql='DROP INDEX core_ingredient_name_upper_trgm',
+        ),
+    ]
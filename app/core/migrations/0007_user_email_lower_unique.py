@@ -0,0 +1,61 @@
+from django.db import IntegrityError, migrations
+from django.db.models import Count
+from django.db.models.functions import Lower
+
+INDEX_NAME = 'core_user_email_lower_uniq'
+
+
+def email_conflicts(users):
+    """Return the accounts of users sharing an email but for its case."""
+    users = users.annotate(email_lower=Lower('email'))
+    duplicates = (
+        users
+        .values('email_lower')
+        .annotate(accounts=Count('id'))
+        .filter(accounts__gt=1)
+        .values_list('email_lower', flat=True)
+    )
+    conflicts = {}
+    for user in (
+        users
+        .filter(email_lower__in=duplicates)
+        .order_by('email_lower', 'id')
+    ):
+        conflicts.setdefault(user.email_lower, []).append(
+            (user.id, user.email),
+        )
+    return conflicts
+
+
+def check_email_conflicts(apps, schema_editor):
+    User = apps.get_model('core', 'User')
+    conflicts = email_conflicts(
+        User.objects.using(schema_editor.connection.alias),
+    )
+    if conflicts:
+        lines = [
+            f'  {email}: ' + ', '.join(
+                f'{email} (id {pk})' for pk, email in accounts
+            )
+            for email, accounts in conflicts.items()
+        ]
+        raise IntegrityError(
+            'Accounts differing only by the case of their email must be '
+            'merged or renamed before emails are unique regardless of '
+            'case:\n' + '\n'.join(lines)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_name_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_email_conflicts, migrations.RunPython.noop),
+        migrations.RunSQL(
+            f'CREATE UNIQUE INDEX {INDEX_NAME} ON core_user (LOWER(email))',
+            reverse_sql=f'DROP INDEX {INDEX_NAME}',
+        ),
+    ]
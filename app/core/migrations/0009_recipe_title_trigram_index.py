@@ -0,0 +1,21 @@
+from django.db import migrations
+
+INDEX_NAME = 'core_recipe_title_upper_trgm'
+
+
+class Migration(migrations.Migration):
+    # Built concurrently, without blocking writes to the recipes while
+    # it scans them, which cannot run in a transaction.
+    atomic = False
+
+    dependencies = [
+        ('core', '0008_filedeletion'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            f'CREATE INDEX CONCURRENTLY {INDEX_NAME} '
+            'ON core_recipe USING gin (UPPER(title) gin_trgm_ops)',
+            reverse_sql=f'DROP INDEX CONCURRENTLY {INDEX_NAME}',
+        ),
+    ]
@@ -7,6 +7,8 @@ import os
 from django.conf import settings
 
 from django.db import models
+from django.db.models import Value
+from django.db.models.functions import Lower
 from django.contrib.auth.models import (
     AbstractBaseUser,
     BaseUserManager,
@@ -40,6 +42,15 @@ class UserManager(BaseUserManager):
         user.save(using=self._db)
         return user
 
+    def filter_by_email(self, email):
+        """Return the users with the email, whatever its case.
+
+        Served by the unique index on LOWER(email).
+        """
+        return self.annotate(email_lower=Lower('email')).filter(
+            email_lower=Lower(Value(email)),
+        )
+
 
 class User(AbstractBaseUser, PermissionsMixin):
     """User in the system."""
@@ -93,3 +104,40 @@ class Ingredient(models.Model):
 
     def __str__(self) -> str:
         return self.name
+
+
+class FileDeletion(models.Model):
+    """Stored file queued for removal once its row was deleted."""
+    name = models.CharField(max_length=255)
+    queued_at = models.DateTimeField(auto_now_add=True)
+    attempts = models.PositiveIntegerField(default=0)
+
+    def __str__(self) -> str:
+        return self.name
+
+
+class RecipeStats(models.Model):
+    """Totals of a user's recipes, kept up to date by core.stats."""
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+    )
+    recipe_count = models.PositiveIntegerField(default=0)
+    price_total = models.DecimalField(
+        max_digits=14, decimal_places=2, default=0,
+    )
+    price_min = models.DecimalField(max_digits=5, decimal_places=2, null=True)
+    price_max = models.DecimalField(max_digits=5, decimal_places=2, null=True)
+    time_total = models.BigIntegerField(default=0)
+    time_min = models.IntegerField(null=True)
+    time_max = models.IntegerField(null=True)
+    # Recipes in each bucket of core.stats.TIME_BUCKETS.
+    time_histogram = models.JSONField(default=list)
+    # Recipes using each tag and ingredient, by id.
+    tag_counts = models.JSONField(default=dict)
+    ingredient_counts = models.JSONField(default=dict)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f'{self.user} ({self.recipe_count} recipes)'
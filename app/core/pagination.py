@@ -0,0 +1,183 @@
+"""
+Pagination of large tables.
+
+An exact COUNT(*) reads every matching row. Above
+APPROXIMATE_COUNT_THRESHOLD rows the count is estimated instead: from
+pg_class.reltuples, kept up to date by autovacuum, when nothing is
+filtered, and from the planner's row estimate otherwise.
+"""
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.paginator import (
+    EmptyPage,
+    InvalidPage,
+    PageNotAnInteger,
+    Paginator,
+)
+from django.db import connections
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from core.queries import raise_query_budget
+
+
+def estimate_count(queryset):
+    """Return the estimated rows of the queryset, None if unknown."""
+    connection = connections[queryset.db]
+    with connection.cursor() as cursor:
+        if not queryset.query.where:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class '
+                'WHERE oid = %s::regclass',
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+            # Tables never analyzed have -1.
+            if row is None or row[0] < 0:
+                return None
+            return row[0]
+
+        sql, params = queryset.order_by().query.sql_with_params()
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    return plan[0]['Plan']['Plan Rows']
+
+
+def approximate_count(queryset, threshold=None):
+    """Return the count of the queryset, estimated if above threshold."""
+    if threshold is None:
+        threshold = settings.APPROXIMATE_COUNT_THRESHOLD
+    estimate = estimate_count(queryset)
+    if estimate is not None and estimate > threshold:
+        return estimate
+    return queryset.count()
+
+
+class ApproximateCountPaginator(Paginator):
+    """Paginator estimating the count of large tables."""
+
+    @cached_property
+    def count(self):
+        return approximate_count(self.object_list)
+
+
+def count_or_estimate(queryset, threshold=None):
+    """Return the number of rows of the queryset and whether it is exact.
+
+    Rows are counted up to threshold. Past it the planner's estimate is
+    returned, raised to threshold + 1 when the planner guessed lower.
+    """
+    if threshold is None:
+        threshold = settings.APPROXIMATE_COUNT_THRESHOLD
+    count = queryset.order_by()[:threshold + 1].count()
+    if count <= threshold:
+        return count, True
+    estimate = estimate_count(queryset) or 0
+    return max(estimate, threshold + 1), False
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator whose count is only exact up to a threshold.
+
+    Pages past an estimated count are still served, so clients can page
+    through to the last row.
+    """
+
+    @cached_property
+    def counted(self):
+        return count_or_estimate(self.object_list)
+
+    @property
+    def count(self):
+        return self.counted[0]
+
+    @property
+    def count_exact(self):
+        return self.counted[1]
+
+    def validate_number(self, number):
+        if self.count_exact:
+            return super().validate_number(number)
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger(_('That page number is not an integer'))
+        if number < 1:
+            raise EmptyPage(_('That page number is less than 1'))
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        top = bottom + self.per_page
+        if self.count_exact and top + self.orphans >= self.count:
+            top = self.count
+        return self._get_page(self.object_list[bottom:top], number, self)
+
+
+class EstimatedCountPagination(PageNumberPagination):
+    """Page number pagination for clients asking for a page_size.
+
+    Lists are returned whole otherwise. count_exact in the response
+    tells whether count was counted or estimated.
+    """
+    page_size = None
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    django_paginator_class = EstimatedCountPaginator
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        paginator = self.django_paginator_class(queryset, page_size)
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(
+                page_number=page_number, message=str(exc),
+            ))
+        # Counting, and estimating past the threshold.
+        raise_query_budget(request, 1 if paginator.count_exact else 2)
+        self.request = request
+        # Left a queryset, for views serializing it with values().
+        return self.page.object_list
+
+    def get_paginated_response(self, data):
+        paginator = self.page.paginator
+        if paginator.count_exact:
+            self.has_next = self.page.has_next()
+        else:
+            # A full page may be followed by more rows.
+            self.has_next = len(data) == paginator.per_page
+        return Response(OrderedDict([
+            ('count', paginator.count),
+            ('count_exact', paginator.count_exact),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(
+            url, self.page_query_param, self.page.number + 1,
+        )
+
+    def get_paginated_response_schema(self, schema):
+        paginated = super().get_paginated_response_schema(schema)
+        paginated['properties']['count_exact'] = {
+            'type': 'boolean',
+            'description': 'Whether count is exact or estimated.',
+        }
+        return {'oneOf': [schema, paginated]}
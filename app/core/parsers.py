@@ -0,0 +1,50 @@
+"""
+Parsers for the API.
+"""
+from django.conf import settings
+
+from rest_framework import parsers
+from rest_framework.exceptions import ParseError
+
+from core.renderers import (
+    MessagePackRenderer,
+    ORJSONRenderer,
+    msgpack,
+    orjson,
+)
+
+
+class ORJSONParser(parsers.JSONParser):
+    """Parse JSON with orjson, falling back to the stdlib parser.
+
+    orjson only reads UTF-8 and rejects NaN and Infinity, other
+    encodings go through the stdlib parser.
+    """
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or encoding.lower().replace('-', '') != 'utf8':
+            return super().parse(stream, media_type, parser_context)
+
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
+
+
+class MessagePackParser(parsers.BaseParser):
+    """Parse MessagePack request bodies.
+
+    Map keys must be strings, decimals are expected as strings or
+    floats like in JSON.
+    """
+    media_type = 'application/msgpack'
+    renderer_class = MessagePackRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), raw=False)
+        except (ValueError, TypeError, msgpack.UnpackException) as exc:
+            raise ParseError(f'MessagePack parse error - {exc}')
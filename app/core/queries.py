@@ -0,0 +1,98 @@
+"""
+SQL query statistics and per-view query budgets.
+
+Views declare the most queries a request may run in ``query_budget``,
+keyed by viewset action or, for plain API views, by HTTP method.
+"""
+import contextlib
+import contextvars
+import time
+from collections import Counter
+
+from django.db import connections
+
+_context_stats = contextvars.ContextVar('query_stats', default=None)
+
+
+class QueryStats:
+    """Database execute wrapper counting queries and their time."""
+    def __init__(self):
+        self.count = 0
+        self.time = 0.0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.time += time.perf_counter() - start
+            self.count += 1
+            self.statements[sql] += 1
+
+    @property
+    def duplicates(self):
+        """Number of repeated executions of the same SQL, N+1 style."""
+        return sum(n - 1 for n in self.statements.values() if n > 1)
+
+    def duplicated_statements(self):
+        """Return the statements that ran more than once."""
+        return {sql: n for sql, n in self.statements.items() if n > 1}
+
+
+@contextlib.contextmanager
+def collect_queries():
+    """Collect QueryStats for every database used inside the block."""
+    stats = QueryStats()
+    with contextlib.ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(stats))
+        yield stats
+
+
+@contextlib.contextmanager
+def collect_context_queries():
+    """Collect QueryStats for the queries of the current context.
+
+    Unlike collect_queries this follows the context into the threads
+    sync_to_async runs code in, which is where async views query.
+    """
+    stats = QueryStats()
+    token = _context_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _context_stats.reset(token)
+
+
+def forward_to_context_stats(execute, sql, params, many, context):
+    """Execute wrapper passing queries to the context's QueryStats."""
+    stats = _context_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    return stats(execute, sql, params, many, context)
+
+
+def install_context_wrapper(sender, connection, **kwargs):
+    """Add the context execute wrapper to a new database connection."""
+    if forward_to_context_stats not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, forward_to_context_stats)
+
+
+def raise_query_budget(request, queries):
+    """Allow a request more queries than its view's budget."""
+    request = getattr(request, '_request', request)
+    if getattr(request, 'query_budget', None) is not None:
+        request.query_budget += queries
+
+
+def get_query_budget(view_func, method):
+    """Return the query budget a view declares for a method, if any."""
+    view_class = getattr(view_func, 'cls', None)
+    budgets = getattr(view_class, 'query_budget', None)
+    if not budgets:
+        return None
+    method = method.lower()
+    actions = getattr(view_func, 'actions', None)
+    key = actions.get(method) if actions else method
+    return budgets.get(key)
@@ -0,0 +1,86 @@
+"""
+Renderers for the API.
+"""
+from decimal import Decimal
+
+from rest_framework import renderers
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+LINE_SEPARATOR = '\u2028'.encode()
+PARAGRAPH_SEPARATOR = '\u2029'.encode()
+
+
+class ORJSONRenderer(renderers.JSONRenderer):
+    """Render JSON with orjson, falling back to the stdlib renderer.
+
+    The output matches JSONRenderer: compact, UTF-8, with U+2028 and
+    U+2029 escaped. Values orjson does not handle itself, like Decimal
+    and lazy strings, go through DRF's JSON encoder. Indented output is
+    left to the stdlib renderer.
+    """
+    options = 0 if orjson is None else (
+        orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+    )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+
+        ret = orjson.dumps(
+            data,
+            default=self.encoder_class().default,
+            option=self.options,
+        )
+        return ret.replace(LINE_SEPARATOR, b'\\u2028').replace(
+            PARAGRAPH_SEPARATOR, b'\\u2029'
+        )
+
+
+def encode_msgpack_default(obj):
+    """Convert values MessagePack has no type for.
+
+    Decimals become fixed point strings, which is what the serializers
+    return for decimal fields anyway. Everything else is converted like
+    in JSON: dates and times to ISO 8601 strings, lazy strings to str.
+    """
+    if isinstance(obj, Decimal):
+        return f'{obj:f}'
+    return JSONEncoder().default(obj)
+
+
+class MessagePackRenderer(renderers.BaseRenderer):
+    """Render MessagePack.
+
+    The encoded values match the JSON ones: decimals are strings, image
+    fields are absolute URL strings or nil and bytes are bin values.
+    """
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(
+            data,
+            default=encode_msgpack_default,
+            use_bin_type=True,
+        )
@@ -0,0 +1,156 @@
+"""
+Routing of API reads to the read replicas.
+
+Views with ReplicaReadMixin run the queries of GET, HEAD and OPTIONS
+requests on a replica from REPLICA_DATABASES, picked at random. Writes
+always go to the primary. A user who just wrote is pinned to the primary
+for REPLICA_PIN_SECONDS, so they read their own writes while the
+replicas catch up.
+"""
+import contextlib
+import contextvars
+import os
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+from rest_framework import status
+from rest_framework.permissions import SAFE_METHODS
+
+from core.shared_table import SharedTable
+
+_read_database = contextvars.ContextVar('read_database', default=None)
+
+
+@contextlib.contextmanager
+def read_from(alias):
+    """Run the reads of the block on the given database."""
+    token = _read_database.set(alias)
+    try:
+        yield
+    finally:
+        _read_database.reset(token)
+
+
+class ReplicaRouter:
+    """Send reads to the database picked for the request, if any."""
+
+    def db_for_read(self, model, **hints):
+        return _read_database.get()
+
+    def db_for_write(self, model, **hints):
+        # Objects read from a replica are saved to the primary.
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        if db in settings.REPLICA_DATABASES:
+            return False
+        return None
+
+
+class PinTable(SharedTable):
+    """Times until which users read from the primary, by user."""
+
+    def pin(self, key, until, now=None):
+        """Pin key until the given time."""
+        if now is None:
+            now = time.time()
+        with self.locked():
+            offset, key_hash, slot = self.find(key)
+            if slot is not None:
+                until = max(until, slot[0])
+            self.write(offset, key_hash, until, now)
+
+    def pinned_until(self, key):
+        """Return the time the pin of key ends, 0 without a pin."""
+        with self.locked():
+            _, _, slot = self.find(key)
+        return slot[0] if slot else 0.0
+
+
+_pins = None
+_pins_lock = threading.Lock()
+
+
+def get_pin_table():
+    """Return the pin table of the current process."""
+    global _pins
+    if _pins is None:
+        with _pins_lock:
+            if _pins is None:
+                directory = settings.REPLICA_PIN_DIR
+                path = None
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                    path = os.path.join(directory, 'pins.db')
+                _pins = PinTable(path, settings.REPLICA_PIN_SLOTS)
+    return _pins
+
+
+def _reset_pin_table():
+    global _pins
+    _pins = None
+
+
+# Forked workers open the file again, flock() locks belong to it.
+os.register_at_fork(after_in_child=_reset_pin_table)
+
+
+def pin_to_primary(user):
+    """Send the reads of the user to the primary for a while."""
+    now = time.time()
+    get_pin_table().pin(
+        str(user.pk), now + settings.REPLICA_PIN_SECONDS, now,
+    )
+
+
+def is_pinned(user):
+    """Return whether the user wrote too recently to read a replica."""
+    return get_pin_table().pinned_until(str(user.pk)) > time.time()
+
+
+def choose_read_database(request):
+    """Return the replica serving the request, None for the primary."""
+    replicas = settings.REPLICA_DATABASES
+    if not replicas or request.method not in SAFE_METHODS:
+        return None
+    if request.user.is_authenticated and is_pinned(request.user):
+        return None
+    return random.choice(replicas)
+
+
+class ReplicaReadMixin:
+    """Serve safe requests of a DRF view from a read replica."""
+
+    def initial(self, request, *args, **kwargs):
+        # Authentication runs first and reads from the primary, so
+        # tokens created moments ago are found.
+        super().initial(request, *args, **kwargs)
+        alias = choose_read_database(request)
+        if alias is not None:
+            self._read_database_token = _read_database.set(alias)
+
+    def dispatch(self, request, *args, **kwargs):
+        self._read_database_token = None
+        try:
+            response = super().dispatch(request, *args, **kwargs)
+        finally:
+            if self._read_database_token is not None:
+                _read_database.reset(self._read_database_token)
+                self._read_database_token = None
+
+        request = self.request
+        if (
+            settings.REPLICA_DATABASES
+            and request.method not in SAFE_METHODS
+            and status.is_success(response.status_code)
+            and request.user.is_authenticated
+        ):
+            pin_to_primary(request.user)
+        return response
@@ -0,0 +1,97 @@
+"""
+Pre-generated OpenAPI schema served with an ETag.
+"""
+import hashlib
+import threading
+from pathlib import Path
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+
+from drf_spectacular.renderers import (
+    OpenApiJsonRenderer,
+    OpenApiYamlRenderer,
+)
+from drf_spectacular.settings import spectacular_settings
+from drf_spectacular.utils import extend_schema
+from drf_spectacular.views import SCHEMA_KWARGS, SpectacularAPIView
+
+SCHEMA_RENDERERS = {
+    'yaml': OpenApiYamlRenderer,
+    'json': OpenApiJsonRenderer,
+}
+
+_artifacts = {}
+_lock = threading.Lock()
+
+
+def generate_schema():
+    """Introspect the API and return the schema as a dict."""
+    generator = spectacular_settings.DEFAULT_GENERATOR_CLASS()
+    return generator.get_schema(request=None, public=True)
+
+
+def render_schema(schema, fmt):
+    """Render a schema dict into bytes for the given format."""
+    return SCHEMA_RENDERERS[fmt]().render(schema, renderer_context={})
+
+
+def schema_file_path(fmt):
+    """Return the path of the pre-generated schema for a format."""
+    return Path(settings.SCHEMA_CACHE_DIR) / f'schema.{fmt}'
+
+
+def write_schema_files():
+    """Generate the schema once and write every format to disk."""
+    schema = generate_schema()
+    directory = Path(settings.SCHEMA_CACHE_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for fmt in SCHEMA_RENDERERS:
+        path = schema_file_path(fmt)
+        path.write_bytes(render_schema(schema, fmt))
+        paths.append(path)
+    clear_schema_cache()
+    return paths
+
+
+def clear_schema_cache():
+    """Forget the schema artifacts memoized in this process."""
+    with _lock:
+        _artifacts.clear()
+
+
+def get_schema_artifact(fmt):
+    """Return (content, etag) for a format, generating it if needed."""
+    artifact = _artifacts.get(fmt)
+    if artifact is not None:
+        return artifact
+
+    with _lock:
+        if fmt not in _artifacts:
+            path = schema_file_path(fmt)
+            if path.is_file():
+                content = path.read_bytes()
+            else:
+                content = render_schema(generate_schema(), fmt)
+            etag = '"%s"' % hashlib.sha256(content).hexdigest()
+            _artifacts[fmt] = (content, etag)
+        return _artifacts[fmt]
+
+
+class CachedSchemaView(SpectacularAPIView):
+    """Serve the pre-generated OpenAPI schema."""
+
+    @extend_schema(**SCHEMA_KWARGS)
+    def get(self, request, *args, **kwargs):
+        if request.GET.get('lang'):
+            return super().get(request, *args, **kwargs)
+
+        renderer = request.accepted_renderer
+        content, etag = get_schema_artifact(renderer.format)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = HttpResponse(content, content_type=renderer.media_type)
+        response['ETag'] = etag
+        return response
@@ -0,0 +1,307 @@
+"""
+Synthetic data generation for load and scale testing.
+
+Users are split into chunks which are generated independently, so the
+same seed and chunk size always produce the same rows regardless of how
+many processes load them. Rows are written with COPY.
+"""
+import bisect
+import csv
+import io
+import itertools
+import multiprocessing
+import random
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.color import no_style
+from django.db import connection, connections, transaction
+
+from core.models import (
+    User,
+    Recipe,
+    Tag,
+    Ingredient,
+)
+from core.stats import rebuild_stats
+
+TAG_NAMES = [
+    'Vegetarian', 'Vegan', 'Breakfast', 'Lunch', 'Dinner', 'Dessert',
+    'Quick', 'Healthy', 'Comfort food', 'Gluten free', 'Spicy', 'Baking',
+    'Summer', 'Winter', 'Holiday', 'Kids', 'Budget', 'Meal prep',
+    'Italian', 'Mexican', 'Indian', 'Japanese', 'Thai', 'French',
+]
+INGREDIENT_NAMES = [
+    'Salt', 'Pepper', 'Olive oil', 'Butter', 'Garlic', 'Onion', 'Flour',
+    'Sugar', 'Eggs', 'Milk', 'Rice', 'Pasta', 'Tomato', 'Chicken', 'Beef',
+    'Lemon', 'Basil', 'Cheese', 'Potato', 'Carrot', 'Ginger', 'Chili',
+    'Cream', 'Honey', 'Yogurt', 'Spinach', 'Mushroom', 'Tofu', 'Beans',
+]
+TITLE_ADJECTIVES = [
+    'Easy', 'Classic', 'Roasted', 'Creamy', 'Crispy', 'Grilled', 'Spicy',
+    'Slow cooked', 'Lemony', 'Rustic', 'Quick', 'Smoky', 'Sweet',
+]
+TITLE_DISHES = [
+    'soup', 'salad', 'curry', 'stew', 'pasta', 'tacos', 'pie', 'risotto',
+    'stir fry', 'cake', 'bread', 'pancakes', 'omelette', 'burger', 'bowl',
+]
+PLACEHOLDER_IMAGES = [
+    f'uploads/recipe/placeholder-{i}.jpg' for i in range(10)
+]
+
+
+class SeedOptions:
+    """Shape of the generated data."""
+    def __init__(
+        self,
+        users=1000,
+        max_recipes=200,
+        tags=20,
+        ingredients=40,
+        max_tags=6,
+        max_ingredients=12,
+        zipf=1.2,
+        image_ratio=0.3,
+        seed=0,
+        chunk_size=1000,
+    ):
+        self.users = users
+        self.max_recipes = max_recipes
+        self.tags = tags
+        self.ingredients = ingredients
+        self.max_tags = min(max_tags, tags)
+        self.max_ingredients = min(max_ingredients, ingredients)
+        self.zipf = zipf
+        self.image_ratio = image_ratio
+        self.seed = seed
+        self.chunk_size = chunk_size
+
+
+class Zipf:
+    """Sample integers 1..n with probability proportional to 1 / k**s."""
+    def __init__(self, n, s):
+        weights = [1 / k ** s for k in range(1, n + 1)]
+        self.cumulative = list(itertools.accumulate(weights))
+
+    def sample(self, rng):
+        point = rng.random() * self.cumulative[-1]
+        return bisect.bisect_left(self.cumulative, point) + 1
+
+    def sample_distinct(self, rng, count):
+        """Return count distinct zero based indexes, popular ones first."""
+        picked = set()
+        while len(picked) < count:
+            picked.add(self.sample(rng) - 1)
+        return picked
+
+
+def _next_id(model):
+    """Return the first id above the rows already in a table."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT COALESCE(MAX(id), 0) + 1 FROM {model._meta.db_table}'
+        )
+        return cursor.fetchone()[0]
+
+
+def plan_chunks(options):
+    """Split the users into chunks with pre-assigned id ranges."""
+    rng = random.Random(options.seed)
+    recipes_per_user = Zipf(options.max_recipes, options.zipf)
+    user_id = _next_id(User)
+    recipe_id = _next_id(Recipe)
+    tag_id = _next_id(Tag)
+    ingredient_id = _next_id(Ingredient)
+
+    chunks = []
+    starts = range(0, options.users, options.chunk_size)
+    for index, start in enumerate(starts):
+        size = min(options.chunk_size, options.users - start)
+        recipe_counts = [recipes_per_user.sample(rng) for _ in range(size)]
+        chunks.append({
+            'index': index,
+            'user_id': user_id,
+            'recipe_id': recipe_id,
+            'tag_id': tag_id,
+            'ingredient_id': ingredient_id,
+            'recipe_counts': recipe_counts,
+        })
+        user_id += size
+        recipe_id += sum(recipe_counts)
+        tag_id += size * options.tags
+        ingredient_id += size * options.ingredients
+    return chunks
+
+
+def _names(base, count, rng):
+    """Return count unique names, drawn from base in a random order."""
+    names = rng.sample(base, min(count, len(base)))
+    for i in range(len(names), count):
+        names.append(f'{base[i % len(base)]} {i // len(base) + 1}')
+    return names
+
+
+def generate_chunk(chunk, options, password):
+    """Generate the CSV rows for a chunk, keyed by table."""
+    rng = random.Random(options.seed * 1000003 + chunk['index'])
+    tag_picker = Zipf(options.tags, options.zipf)
+    ingredient_picker = Zipf(options.ingredients, options.zipf)
+    tag_count = Zipf(options.max_tags, options.zipf)
+    ingredient_count = Zipf(options.max_ingredients, options.zipf)
+    tables = {
+        User: [], Tag: [], Ingredient: [], Recipe: [],
+        Recipe.tags.through: [], Recipe.ingredients.through: [],
+    }
+
+    recipe_id = chunk['recipe_id']
+    for offset, recipes in enumerate(chunk['recipe_counts']):
+        user_id = chunk['user_id'] + offset
+        tag_base = chunk['tag_id'] + offset * options.tags
+        ingredient_base = (
+            chunk['ingredient_id'] + offset * options.ingredients
+        )
+        tables[User].append([
+            user_id, password, f'seed{user_id}@example.com',
+            f'Seed user {user_id}', 't', 'f', 'f',
+        ])
+        for i, name in enumerate(_names(TAG_NAMES, options.tags, rng)):
+            tables[Tag].append([tag_base + i, user_id, name])
+        for i, name in enumerate(
+            _names(INGREDIENT_NAMES, options.ingredients, rng)
+        ):
+            tables[Ingredient].append([ingredient_base + i, user_id, name])
+
+        for _ in range(recipes):
+            title = (
+                f'{rng.choice(TITLE_ADJECTIVES)} {rng.choice(TITLE_DISHES)}'
+            )
+            image = None
+            if rng.random() < options.image_ratio:
+                image = rng.choice(PLACEHOLDER_IMAGES)
+            tables[Recipe].append([
+                recipe_id, user_id, title,
+                f'{title} made the way we like it at home.',
+                min(int(rng.lognormvariate(3.4, 0.6)) + 1, 600),
+                f'{min(rng.lognormvariate(2.3, 0.7), 999.99):.2f}',
+                f'https://example.com/recipes/{recipe_id}',
+                image,
+            ])
+            for i in tag_picker.sample_distinct(rng, tag_count.sample(rng)):
+                tables[Recipe.tags.through].append([recipe_id, tag_base + i])
+            for i in ingredient_picker.sample_distinct(
+                rng, ingredient_count.sample(rng)
+            ):
+                tables[Recipe.ingredients.through].append(
+                    [recipe_id, ingredient_base + i]
+                )
+            recipe_id += 1
+
+    return tables
+
+
+COLUMNS = {
+    User: [
+        'id', 'password', 'email', 'name',
+        'is_active', 'is_staff', 'is_superuser',
+    ],
+    Tag: ['id', 'user_id', 'name'],
+    Ingredient: ['id', 'user_id', 'name'],
+    Recipe: [
+        'id', 'user_id', 'title', 'description',
+        'time_minutes', 'price', 'link', 'image',
+    ],
+    Recipe.tags.through: ['recipe_id', 'tag_id'],
+    Recipe.ingredients.through: ['recipe_id', 'ingredient_id'],
+}
+
+
+def copy_rows(cursor, model, rows):
+    """Load rows into a model's table with COPY."""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+    columns = ', '.join(COLUMNS[model])
+    cursor.copy_expert(
+        f'COPY {model._meta.db_table} ({columns}) '
+        f'FROM STDIN WITH (FORMAT csv)',
+        buffer,
+    )
+
+
+def load_chunk(chunk, options, password):
+    """Generate and load one chunk in a single transaction.
+
+    COPY bypasses the recipe statistics, so those of the chunk's users
+    are counted in the same transaction.
+    """
+    tables = generate_chunk(chunk, options, password)
+    with transaction.atomic(), connection.cursor() as cursor:
+        for model, rows in tables.items():
+            copy_rows(cursor, model, rows)
+        first = chunk['user_id']
+        for user_id in range(first, first + len(chunk['recipe_counts'])):
+            rebuild_stats(user_id)
+    return {model._meta.db_table: len(rows) for model, rows in tables.items()}
+
+
+def _load_chunk_in_worker(args):
+    return load_chunk(*args)
+
+
+def write_placeholder_images():
+    """Save the placeholder images referenced by seeded recipes."""
+    # Pillow is only needed here, not by the commands importing seed.
+    from PIL import Image
+
+    for i, name in enumerate(PLACEHOLDER_IMAGES):
+        if default_storage.exists(name):
+            continue
+        buffer = io.BytesIO()
+        color = (40 + i * 20, 160, 220 - i * 15)
+        Image.new('RGB', (64, 64), color).save(buffer, format='JPEG')
+        default_storage.save(name, ContentFile(buffer.getvalue()))
+
+
+def reset_sequences():
+    """Move the id sequences past the explicitly inserted ids."""
+    statements = connection.ops.sequence_reset_sql(
+        no_style(),
+        [User, Recipe, Tag, Ingredient],
+    )
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+        for model in COLUMNS:
+            cursor.execute(f'ANALYZE {model._meta.db_table}')
+
+
+def seed_data(options, password, workers=1, progress=None):
+    """Generate and load all chunks, in parallel when workers > 1."""
+    chunks = plan_chunks(options)
+    tasks = [(chunk, options, password) for chunk in chunks]
+    totals = dict.fromkeys(
+        (model._meta.db_table for model in COLUMNS), 0
+    )
+
+    if workers > 1:
+        # Forked workers must not share the parent's connection.
+        connections.close_all()
+        pool = multiprocessing.get_context('fork').Pool(workers)
+        results = pool.imap_unordered(_load_chunk_in_worker, tasks)
+    else:
+        pool = None
+        results = map(_load_chunk_in_worker, tasks)
+
+    try:
+        for done, counts in enumerate(results, start=1):
+            for table, count in counts.items():
+                totals[table] += count
+            if progress:
+                progress(done, len(tasks))
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+
+    reset_sequences()
+    return totals
@@ -0,0 +1,85 @@
+"""
+Fixed size hash tables held in memory maps.
+
+Every worker process mapping the same file sees the same table, which
+lets them share small per-client state without a database or cache
+round trip. Without a file each process keeps a table of its own.
+"""
+import contextlib
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+import threading
+
+# Key hash, a value and the time the slot was written.
+SLOT = struct.Struct('<Qdd')
+# Slots looked at for a key before the least recently written one of
+# them is taken over.
+PROBES = 8
+
+
+class SharedTable:
+    """Hash table of slots holding a value per key.
+
+    Only the least recently written of the PROBES slots a key may use is
+    ever taken over, never a slot picked at random.
+    """
+    def __init__(self, path=None, slots=4096):
+        self.slots = slots
+        self.lock = threading.Lock()
+        size = slots * SLOT.size
+        if path:
+            self.file = os.fdopen(os.open(path, os.O_RDWR | os.O_CREAT), 'r+b')
+            if os.fstat(self.file.fileno()).st_size < size:
+                self.file.truncate(size)
+            self.map = mmap.mmap(self.file.fileno(), size)
+        else:
+            self.file = None
+            self.map = mmap.mmap(-1, size)
+
+    @contextlib.contextmanager
+    def locked(self):
+        """Hold the table against threads and other processes."""
+        with self.lock:
+            if self.file is None:
+                yield
+                return
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self.file.fileno(), fcntl.LOCK_UN)
+
+    def find(self, key):
+        """Return the slot of key, to be called with the table locked.
+
+        Returns the offset of the slot, the hash of key and the value
+        and time of the slot, or None when the slot is free or taken
+        over from another key.
+        """
+        digest = hashlib.blake2b(key.encode(), digest_size=8).digest()
+        # 0 marks an empty slot.
+        key_hash = int.from_bytes(digest, 'little') or 1
+        start = key_hash % self.slots
+
+        oldest = None
+        for probe in range(PROBES):
+            offset = (start + probe) % self.slots * SLOT.size
+            slot_hash, value, updated = SLOT.unpack_from(self.map, offset)
+            if slot_hash == key_hash:
+                return offset, key_hash, (value, updated)
+            if slot_hash == 0:
+                return offset, key_hash, None
+            if oldest is None or updated < oldest[1]:
+                oldest = (offset, updated)
+        return oldest[0], key_hash, None
+
+    def write(self, offset, key_hash, value, now):
+        """Store the value of a key in the slot find() returned."""
+        SLOT.pack_into(self.map, offset, key_hash, value, now)
+
+    def clear(self):
+        with self.locked():
+            self.map[:] = bytes(len(self.map))
@@ -0,0 +1,160 @@
+"""
+Container start up steps.
+
+The database is polled with a backoff starting well under a second,
+collectstatic is skipped when the static files hash to what was last
+collected and migrate when no migration is pending. Steps which do not
+depend on each other run concurrently.
+"""
+import dataclasses
+import hashlib
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.management import call_command
+from django.db import connections
+from django.db.migrations.executor import MigrationExecutor
+from django.db.utils import OperationalError
+
+logger = logging.getLogger(__name__)
+
+STATIC_HASH_FILE = '.collectstatic.sha256'
+
+
+@dataclasses.dataclass
+class StepResult:
+    name: str
+    skipped: bool
+    seconds: float
+
+
+def wait_for_database(
+    alias='default',
+    timeout=60.0,
+    initial_delay=0.05,
+    max_delay=2.0,
+):
+    """Wait until the database accepts connections, return the attempts.
+
+    The delay between attempts doubles up to max_delay. The last error
+    is raised once timeout seconds have passed.
+    """
+    deadline = time.monotonic() + timeout
+    delay = initial_delay
+    attempts = 0
+    while True:
+        attempts += 1
+        try:
+            connections[alias].ensure_connection()
+            return attempts
+        except OperationalError:
+            if time.monotonic() + delay > deadline:
+                raise
+            logger.info('database unavailable, retrying in %.2fs', delay)
+            time.sleep(delay)
+            delay = min(delay * 2, max_delay)
+
+
+def static_files_hash():
+    """Return a hash of the static files collectstatic would copy."""
+    entries = []
+    for finder in finders.get_finders():
+        for path, storage in finder.list(['CVS', '.*', '*~']):
+            prefix = getattr(storage, 'prefix', None)
+            entries.append((os.path.join(prefix or '', path), storage, path))
+
+    digest = hashlib.sha256(settings.STATICFILES_STORAGE.encode())
+    for prefixed_path, storage, path in sorted(
+        entries,
+        key=lambda entry: entry[0],
+    ):
+        digest.update(prefixed_path.encode() + b'\0')
+        with storage.open(path) as f:
+            for chunk in iter(lambda: f.read(65536), b''):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def collect_static():
+    """Run collectstatic unless the static files did not change.
+
+    Returns whether it was skipped.
+    """
+    marker = Path(settings.STATIC_ROOT) / STATIC_HASH_FILE
+    current = static_files_hash()
+    if marker.is_file() and marker.read_text() == current:
+        return True
+
+    call_command('collectstatic', interactive=False, stdout=StringIO())
+    marker.write_text(current)
+    return False
+
+
+def pending_migrations(alias='default'):
+    """Return the migrations migrate would apply."""
+    executor = MigrationExecutor(connections[alias])
+    return executor.migration_plan(executor.loader.graph.leaf_nodes())
+
+
+def migrate():
+    """Apply pending migrations, returning whether there were none."""
+    if not pending_migrations():
+        return True
+    call_command('migrate', interactive=False, stdout=StringIO())
+    return False
+
+
+def build_schema():
+    """Write the schema files served by the API."""
+    call_command('build_schema', stdout=StringIO())
+    return False
+
+
+def _run_chain(steps):
+    """Run steps one after the other, in a thread of its own."""
+    results = []
+    try:
+        for name, func in steps:
+            start = time.perf_counter()
+            skipped = bool(func())
+            result = StepResult(name, skipped, time.perf_counter() - start)
+            logger.info(
+                'startup step %s %s in %.1fms',
+                name,
+                'skipped' if skipped else 'done',
+                result.seconds * 1000,
+            )
+            results.append(result)
+    finally:
+        connections.close_all()
+    return results
+
+
+def run_steps(chains):
+    """Run chains of steps concurrently, returning every step's result.
+
+    A chain is a list of (name, func) pairs, where func returns whether
+    the step had nothing to do.
+    """
+    with ThreadPoolExecutor(max_workers=len(chains)) as executor:
+        futures = [executor.submit(_run_chain, chain) for chain in chains]
+        return [result for future in futures for result in future.result()]
+
+
+def startup_chains(db_timeout=60.0):
+    """Return the steps run when a container starts."""
+    def wait_for_db():
+        wait_for_database(timeout=db_timeout)
+        return False
+
+    return [
+        [('wait_for_db', wait_for_db), ('migrate', migrate)],
+        [('collectstatic', collect_static)],
+        [('build_schema', build_schema)],
+    ]
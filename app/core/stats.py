@@ -0,0 +1,277 @@
+"""
+Recipe statistics of each user, kept up to date on writes.
+
+A RecipeStats row holds the totals of a user's recipes: their number,
+the sums, minimums and maximums of price and time_minutes, a histogram
+of the times and the number of recipes using each tag and ingredient.
+The recipe API applies each write to the row, locked for the length of
+the write, so reading the statistics does not aggregate the recipes.
+
+Removing the recipe holding a minimum or maximum leaves it unknown, it
+is then recomputed from the user's recipes with a single aggregate.
+Recipes written other ways, such as through the admin, are not counted
+until rebuild_stats is run. seed_data counts the users it loads.
+"""
+import bisect
+import contextlib
+import dataclasses
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Max, Min, Q, Sum
+
+from core.models import Ingredient, Recipe, RecipeStats, Tag
+from core.queries import raise_query_budget
+
+# Upper bounds of the time_minutes buckets, the last bucket holding the
+# longer recipes. Changing them requires rebuild_stats.
+TIME_BUCKETS = (10, 20, 30, 60, 120)
+
+# Queries counting the stats of a user who has none, on top of those
+# locking them.
+COUNT_QUERIES = 5
+
+COUNT_FIELDS = {
+    'tags': 'tag_counts',
+    'ingredients': 'ingredient_counts',
+}
+
+
+def time_bucket(minutes):
+    """Return the index of the histogram bucket counting minutes."""
+    return bisect.bisect_left(TIME_BUCKETS, minutes)
+
+
+@dataclasses.dataclass
+class Entry:
+    """What the statistics count of a recipe."""
+    price: Decimal
+    time_minutes: int
+    tags: list = dataclasses.field(default_factory=list)
+    ingredients: list = dataclasses.field(default_factory=list)
+
+
+def recipe_entry(recipe):
+    """Return the entry of a saved recipe, with its tags and ingredients."""
+    return Entry(
+        price=recipe.price,
+        time_minutes=recipe.time_minutes,
+        tags=list(recipe.tags.values_list('pk', flat=True)),
+        ingredients=list(recipe.ingredients.values_list('pk', flat=True)),
+    )
+
+
+def compute_stats(user_id):
+    """Return unsaved statistics counted from the user's recipes."""
+    recipes = Recipe.objects.filter(user_id=user_id)
+    bounds = (None,) + TIME_BUCKETS + (None,)
+    buckets = {}
+    for index, (lower, upper) in enumerate(zip(bounds, bounds[1:])):
+        condition = Q()
+        if lower is not None:
+            condition &= Q(time_minutes__gt=lower)
+        if upper is not None:
+            condition &= Q(time_minutes__lte=upper)
+        buckets[f'bucket_{index}'] = Count('pk', filter=condition)
+    totals = recipes.aggregate(
+        recipe_count=Count('pk'),
+        price_total=Sum('price'),
+        price_min=Min('price'),
+        price_max=Max('price'),
+        time_total=Sum('time_minutes'),
+        time_min=Min('time_minutes'),
+        time_max=Max('time_minutes'),
+        **buckets,
+    )
+    histogram = [totals.pop(name) for name in buckets]
+
+    counts = {}
+    for field, counts_field in COUNT_FIELDS.items():
+        through = Recipe._meta.get_field(field).remote_field.through
+        column = f'{Recipe._meta.get_field(field).m2m_reverse_field_name()}_id'
+        rows = (
+            through.objects
+            .filter(recipe__user_id=user_id)
+            .values_list(column)
+            .annotate(recipes=Count('pk'))
+        )
+        counts[counts_field] = {str(pk): n for pk, n in rows}
+
+    return RecipeStats(
+        user_id=user_id,
+        recipe_count=totals['recipe_count'],
+        price_total=totals['price_total'] or 0,
+        price_min=totals['price_min'],
+        price_max=totals['price_max'],
+        time_total=totals['time_total'] or 0,
+        time_min=totals['time_min'],
+        time_max=totals['time_max'],
+        time_histogram=histogram,
+        **counts,
+    )
+
+
+def lock_stats(user_id, request=None):
+    """Return the user's statistics, locked until the transaction ends.
+
+    A user without statistics yet has them counted from their recipes,
+    and the query budget of request raised for it.
+    """
+    locked = RecipeStats.objects.select_for_update()
+    stats = locked.filter(user_id=user_id).first()
+    if stats is None:
+        if request is not None:
+            raise_query_budget(request, COUNT_QUERIES)
+        # A concurrent first write waits on the conflicting row, then
+        # locks the one inserted here.
+        RecipeStats.objects.bulk_create(
+            [compute_stats(user_id)], ignore_conflicts=True,
+        )
+        stats = locked.get(user_id=user_id)
+    return stats
+
+
+def ensure_stats(user_id, request=None):
+    """Return the user's statistics, counting them if they have none."""
+    with transaction.atomic(savepoint=False):
+        return lock_stats(user_id, request)
+
+
+def rebuild_stats(user_id):
+    """Count the user's statistics again from their recipes."""
+    with transaction.atomic():
+        lock_stats(user_id)
+        stats = compute_stats(user_id)
+        stats.save()
+    return stats
+
+
+class StatsUpdate:
+    """Changes of a write applied to locked statistics."""
+    def __init__(self, stats):
+        self.stats = stats
+        self.stale_extremes = False
+
+    def add(self, entry):
+        """Count a recipe written with the values of entry."""
+        stats = self.stats
+        stats.recipe_count += 1
+        stats.price_total += entry.price
+        stats.time_total += entry.time_minutes
+        stats.price_min = _extreme(min, stats.price_min, entry.price)
+        stats.price_max = _extreme(max, stats.price_max, entry.price)
+        stats.time_min = _extreme(min, stats.time_min, entry.time_minutes)
+        stats.time_max = _extreme(max, stats.time_max, entry.time_minutes)
+        stats.time_histogram[time_bucket(entry.time_minutes)] += 1
+        _count(stats.tag_counts, entry.tags, 1)
+        _count(stats.ingredient_counts, entry.ingredients, 1)
+
+    def remove(self, entry):
+        """Stop counting a recipe which had the values of entry."""
+        stats = self.stats
+        stats.recipe_count -= 1
+        stats.price_total -= entry.price
+        stats.time_total -= entry.time_minutes
+        if (
+            entry.price in (stats.price_min, stats.price_max)
+            or entry.time_minutes in (stats.time_min, stats.time_max)
+        ):
+            self.stale_extremes = True
+        stats.time_histogram[time_bucket(entry.time_minutes)] -= 1
+        _count(stats.tag_counts, entry.tags, -1)
+        _count(stats.ingredient_counts, entry.ingredients, -1)
+
+    def forget(self, field, pk):
+        """Stop counting a deleted tag or ingredient."""
+        getattr(self.stats, COUNT_FIELDS[field]).pop(str(pk), None)
+
+    def save(self):
+        stats = self.stats
+        if self.stale_extremes:
+            extremes = Recipe.objects.filter(
+                user_id=stats.user_id,
+            ).aggregate(
+                price_min=Min('price'),
+                price_max=Max('price'),
+                time_min=Min('time_minutes'),
+                time_max=Max('time_minutes'),
+            )
+            for name, value in extremes.items():
+                setattr(stats, name, value)
+        stats.save()
+
+
+def _extreme(function, current, value):
+    return value if current is None else function(current, value)
+
+
+def _count(counts, pks, change):
+    for pk in pks:
+        key = str(pk)
+        counts[key] = counts.get(key, 0) + change
+        if counts[key] <= 0:
+            del counts[key]
+
+
+@contextlib.contextmanager
+def updating_stats(user_id, request=None):
+    """Hold the user's statistics for a recipe write in the block.
+
+    The block runs in a transaction and applies its changes to the
+    yielded StatsUpdate, which is saved at the end of the block.
+    """
+    # Without a savepoint when nested, the write and its stats fail
+    # together with the enclosing transaction.
+    with transaction.atomic(savepoint=False):
+        update = StatsUpdate(lock_stats(user_id, request))
+        yield update
+        update.save()
+
+
+def _top(model, counts, limit):
+    ranked = sorted(
+        ((int(pk), n) for pk, n in counts.items()),
+        key=lambda item: (-item[1], item[0]),
+    )[:limit]
+    if not ranked:
+        return []
+    names = dict(
+        model.objects
+        .filter(pk__in=[pk for pk, _ in ranked])
+        .values_list('pk', 'name')
+    )
+    return [
+        {'id': pk, 'name': names[pk], 'recipe_count': n}
+        for pk, n in ranked if pk in names
+    ]
+
+
+def summarize(stats, top=5):
+    """Return the statistics as served by the API.
+
+    top is the number of the most used tags and ingredients listed.
+    """
+    count = stats.recipe_count
+    price_avg = time_avg = None
+    if count:
+        price_avg = (stats.price_total / count).quantize(Decimal('0.01'))
+        time_avg = round(stats.time_total / count, 1)
+    return {
+        'recipe_count': count,
+        'price': {
+            'avg': price_avg,
+            'min': stats.price_min,
+            'max': stats.price_max,
+        },
+        'time_minutes': {
+            'avg': time_avg,
+            'min': stats.time_min,
+            'max': stats.time_max,
+        },
+        'time_histogram': [
+            {'max_minutes': upper, 'count': n}
+            for upper, n in zip(TIME_BUCKETS + (None,), stats.time_histogram)
+        ],
+        'top_tags': _top(Tag, stats.tag_counts, top),
+        'top_ingredients': _top(Ingredient, stats.ingredient_counts, top),
+    }
@@ -0,0 +1,47 @@
+"""
+Test helpers shared by the apps.
+"""
+import contextlib
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.urls import resolve
+
+from core.queries import collect_queries, get_query_budget
+
+
+class TestRunner(DiscoverRunner):
+    """Test runner turning the rate limits off.
+
+    The test client always comes from the same address, so the buckets
+    would fill up depending on which tests ran before. The throttling
+    tests turn them back on.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        settings.THROTTLE_ENABLED = False
+        settings.THROTTLE_DIR = None
+
+
+class QueryBudgetTestMixin:
+    """TestCase mixin enforcing the query budgets declared on views."""
+
+    @contextlib.contextmanager
+    def assertWithinQueryBudget(self, method, url):
+        """Fail if the block runs more queries than the view allows."""
+        budget = get_query_budget(resolve(url.split('?')[0]).func, method)
+        if budget is None:
+            self.fail(f'No query budget declared for {method} {url}')
+
+        with collect_queries() as stats:
+            yield stats
+
+        if stats.count > budget:
+            statements = '\n'.join(
+                f'{n}x {sql}' for sql, n in stats.statements.items()
+            )
+            self.fail(
+                f'{method} {url} ran {stats.count} queries, '
+                f'budget is {budget}:\n{statements}'
+            )
@@ -1,10 +1,17 @@
 """
 Test for the Django admin modifications.
 """
+from decimal import Decimal
+from unittest.mock import patch
+
 from django.test import TestCase, Client
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
+from core.models import FileDeletion, Ingredient, Recipe, Tag
+
 
 class AdminSiteTests(TestCase):
     """Tests for Django Admin."""
@@ -42,3 +49,126 @@ class AdminSiteTests(TestCase):
         res = self.client.get(url)
 
         self.assertEqual(res.status_code, 200)
+
+    def test_delete_user(self):
+        """Test deleting a user from the admin deletes their data."""
+        Tag.objects.create(user=self.user, name='Vegan')
+        url = reverse('admin:core_user_delete', args=[self.user.id])
+
+        res = self.client.get(url)
+        self.assertContains(res, 'Tags: 1')
+
+        res = self.client.post(url, {'post': 'yes'})
+
+        self.assertEqual(res.status_code, 302)
+        self.assertFalse(
+            get_user_model().objects.filter(pk=self.user.pk).exists()
+        )
+        self.assertFalse(Tag.objects.exists())
+
+    def test_delete_user_removes_images(self):
+        """Test the images of deleted users are removed after commit."""
+        Recipe.objects.create(
+            user=self.user,
+            title='Soup',
+            time_minutes=5,
+            price=Decimal('1.00'),
+            image='uploads/recipe/missing.jpg',
+        )
+        url = reverse('admin:core_user_delete', args=[self.user.id])
+
+        with patch('core.admin.process_file_deletions') as patched_process:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post(url, {'post': 'yes'})
+
+        patched_process.assert_called_once_with()
+        self.assertEqual(FileDeletion.objects.count(), 1)
+
+
+class LargeTableAdminTests(TestCase):
+    """Test the admin of the recipes, tags and ingredients."""
+    def setUp(self):
+        self.client = Client()
+        self.admin_user = get_user_model().objects.create_superuser(
+            email='admin@example.com',
+            password='passwordtes',
+        )
+        self.client.force_login(self.admin_user)
+
+    def _create_recipes(self, count):
+        start = Recipe.objects.count()
+        for i in range(start, start + count):
+            user = get_user_model().objects.create_user(
+                email=f'user{i}@example.com',
+                password='testpass123',
+            )
+            Recipe.objects.create(
+                user=user,
+                title=f'Soup {i}',
+                time_minutes=5,
+                price=Decimal('1.00'),
+            )
+
+    def test_changelists(self):
+        """Test the changelists search their rows."""
+        user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        Tag.objects.create(user=user, name='Vegan')
+        Ingredient.objects.create(user=user, name='Salt')
+        self._create_recipes(1)
+
+        for model, term, match in [
+            ('recipe', 'soup', 'Soup 0'),
+            ('tag', 'VEG', 'Vegan'),
+            ('ingredient', 'sal', 'Salt'),
+        ]:
+            url = reverse(f'admin:core_{model}_changelist')
+            res = self.client.get(url, {'q': term})
+            self.assertContains(res, match)
+
+    def test_recipe_changelist_queries(self):
+        """Test the recipe owners are loaded with the recipes."""
+        url = reverse('admin:core_recipe_changelist')
+
+        def queries():
+            with CaptureQueriesContext(connection) as captured:
+                self.client.get(url)
+            return len(captured)
+
+        self._create_recipes(1)
+        baseline = queries()
+        self._create_recipes(5)
+
+        self.assertEqual(queries(), baseline)
+
+    @patch('core.pagination.estimate_count', return_value=2000000)
+    def test_approximate_count(self, patched_estimate):
+        """Test large tables show an estimated count."""
+        self._create_recipes(1)
+        url = reverse('admin:core_recipe_changelist')
+
+        with self.settings(APPROXIMATE_COUNT_THRESHOLD=1000):
+            res = self.client.get(url)
+
+        self.assertContains(res, '2000000 recipes')
+
+    def test_export_csv(self):
+        """Test the selected rows are streamed as CSV."""
+        self._create_recipes(2)
+        url = reverse('admin:core_recipe_changelist')
+
+        res = self.client.post(url, {
+            'action': 'export_as_csv',
+            '_selected_action': Recipe.objects.values_list('pk', flat=True),
+        })
+
+        self.assertTrue(res.streaming)
+        lines = b''.join(res.streaming_content).decode().splitlines()
+        self.assertEqual(
+            lines[0].split(',')[:3],
+            ['id', 'title', 'user__email'],
+        )
+        self.assertEqual(len(lines), 3)
+        self.assertIn('user1@example.com', lines[2])
@@ -0,0 +1,59 @@
+"""
+Tests for the benchmark suite.
+"""
+from django.test import TestCase
+
+from core import benchmark
+from core.models import Recipe
+
+
+class BenchmarkTests(TestCase):
+    """Test seeding and running benchmarks."""
+    def setUp(self):
+        self.shape = benchmark.DataShape(
+            users=2,
+            recipes=3,
+            tags=2,
+            ingredients=1,
+        )
+        self.users = benchmark.seed(self.shape)
+
+    def test_seed_creates_data_shape(self):
+        """Test seeding creates the requested number of rows."""
+        user = self.users[0]
+        recipes = Recipe.objects.filter(user=user)
+
+        self.assertEqual(len(self.users), 2)
+        self.assertEqual(recipes.count(), 3)
+        for recipe in recipes:
+            self.assertEqual(recipe.tags.count(), 2)
+            self.assertEqual(recipe.ingredients.count(), 1)
+
+    def test_run_benchmarks_reports_metrics(self):
+        """Test running benchmarks reports latency and query counts."""
+        context = benchmark.BenchmarkContext(self.users[0], self.shape)
+
+        results = benchmark.run_benchmarks(
+            context,
+            names=['recipe-list', 'recipe-create'],
+            iterations=2,
+            warmup=0,
+        )
+
+        self.assertEqual(set(results), {'recipe-list', 'recipe-create'})
+        for result in results.values():
+            self.assertGreater(result['p99_ms'], 0)
+            self.assertGreater(result['queries'], 0)
+        self.assertEqual(Recipe.objects.filter(user=self.users[0]).count(), 3)
+
+    def test_compare_results(self):
+        """Test comparing results against a baseline."""
+        baseline = {'recipe-list': {'p50_ms': 10.0, 'queries': 4}}
+        current = {'recipe-list': {'p50_ms': 12.0, 'queries': 2}}
+
+        changes = benchmark.compare_results(baseline, current)
+
+        self.assertEqual(
+            changes,
+            {'recipe-list': {'p50_ms': 20.0, 'queries': -50.0}},
+        )
@@ -0,0 +1,108 @@
+"""
+Tests for the PostgreSQL backend with persistent connections.
+"""
+import time
+from unittest.mock import patch
+
+from django.db import connection
+from django.test import TransactionTestCase
+
+from core import metrics
+
+
+def _metric(name, **labels):
+    key = metrics._key(
+        name,
+        (('alias', 'default'),) + tuple(labels.items()),
+    )
+    return metrics.collect().get(key, 0.0)
+
+
+class DatabaseWrapperTests(TransactionTestCase):
+    """Test reusing and health checking connections."""
+
+    def setUp(self):
+        connection.ensure_connection()
+        self.settings_dict = dict(connection.settings_dict)
+        connection.settings_dict['CONN_MAX_AGE'] = 600
+        connection.settings_dict['CONN_HEALTH_CHECKS'] = True
+
+    def tearDown(self):
+        connection.settings_dict.update(self.settings_dict)
+
+    def test_reuses_connection(self):
+        """Test a healthy connection is kept between requests."""
+        raw = connection.connection
+        connection.close_at = time.monotonic() + 600
+        reused = _metric('db_connections_reused_total')
+
+        connection.close_if_unusable_or_obsolete()
+        connection.ensure_connection()
+
+        self.assertIs(connection.connection, raw)
+        self.assertEqual(_metric('db_connections_reused_total'), reused + 1)
+
+    def test_closes_after_max_age(self):
+        """Test connections are closed once they reach their max age."""
+        connection.close_at = time.monotonic() - 1
+        closed = _metric('db_connections_closed_total', reason='max_age')
+
+        connection.close_if_unusable_or_obsolete()
+
+        self.assertIsNone(connection.connection)
+        self.assertEqual(
+            _metric('db_connections_closed_total', reason='max_age'),
+            closed + 1,
+        )
+
+    def test_replaces_unhealthy_connection(self):
+        """Test a connection failing its health check is replaced."""
+        raw = connection.connection
+        connection.close_at = time.monotonic() + 600
+        opened = _metric('db_connections_opened_total')
+
+        connection.close_if_unusable_or_obsolete()
+        with patch.object(connection, 'is_usable', return_value=False):
+            connection.ensure_connection()
+
+        self.assertIsNot(connection.connection, raw)
+        self.assertEqual(_metric('db_connections_opened_total'), opened + 1)
+        self.assertTrue(connection.health_check_done)
+
+    def test_checks_once_per_request(self):
+        """Test the health check runs on first use only."""
+        connection.close_at = time.monotonic() + 600
+        reused = _metric('db_connections_reused_total')
+
+        with patch.object(
+            connection, 'is_usable', return_value=True,
+        ) as patched_usable:
+            for _ in range(2):
+                # request_started, queries, then request_finished.
+                connection.close_if_unusable_or_obsolete()
+                connection.ensure_connection()
+                connection.ensure_connection()
+                connection.close_if_unusable_or_obsolete()
+
+        self.assertEqual(patched_usable.call_count, 2)
+        self.assertEqual(_metric('db_connections_reused_total'), reused + 2)
+
+    def test_no_health_check_without_queries(self):
+        """Test requests which do not query leave the connection alone."""
+        connection.close_at = time.monotonic() + 600
+
+        with patch.object(connection, 'is_usable') as patched_usable:
+            connection.close_if_unusable_or_obsolete()
+            connection.close_if_unusable_or_obsolete()
+
+        patched_usable.assert_not_called()
+
+    def test_no_health_check_without_persistence(self):
+        """Test connections opened per request are not checked."""
+        connection.settings_dict['CONN_MAX_AGE'] = 0
+        connection.health_check_done = False
+
+        with patch.object(connection, 'is_usable') as patched_usable:
+            connection.ensure_connection()
+
+        patched_usable.assert_not_called()
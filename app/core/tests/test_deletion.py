@@ -0,0 +1,186 @@
+"""
+Tests for deleting users in bulk.
+"""
+import os
+import tempfile
+from decimal import Decimal
+from io import StringIO
+from unittest.mock import Mock, patch
+
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from rest_framework.authtoken.models import Token
+
+from core import deletion
+from core.models import FileDeletion, Ingredient, Recipe, Tag
+
+
+def create_user(email):
+    return get_user_model().objects.create_user(
+        email=email,
+        password='testpass123',
+    )
+
+
+def create_recipes(user, count, image=''):
+    """Create recipes with a tag and an ingredient each."""
+    tag = Tag.objects.create(user=user, name='Vegan')
+    ingredient = Ingredient.objects.create(user=user, name='Salt')
+    for i in range(count):
+        recipe = Recipe.objects.create(
+            user=user,
+            title=f'Recipe {i}',
+            time_minutes=5,
+            price=Decimal('1.00'),
+            image=image and f'{image}-{i}.jpg',
+        )
+        recipe.tags.add(tag)
+        recipe.ingredients.add(ingredient)
+    return tag
+
+
+class DeleteUsersTests(TestCase):
+    """Test deleting users with set based statements."""
+
+    def setUp(self):
+        self.user = create_user('user@example.com')
+        self.other = create_user('other@example.com')
+
+    def test_deletes_user_data(self):
+        """Test the users and everything they own are deleted."""
+        tag = create_recipes(self.user, 3, image='uploads/recipe/a')
+        create_recipes(self.other, 1)
+        Token.objects.create(user=self.user)
+        # A recipe of another user tagged with a tag of the user.
+        Recipe.objects.get(user=self.other).tags.add(tag)
+
+        counts = deletion.delete_users(
+            get_user_model().objects.filter(pk=self.user.pk),
+            batch_size=2,
+        )
+
+        self.assertEqual(counts['core.Recipe'], 3)
+        self.assertEqual(counts['core.Tag'], 1)
+        self.assertEqual(counts['core.User'], 1)
+        self.assertEqual(counts['files'], 3)
+        self.assertFalse(
+            get_user_model().objects.filter(pk=self.user.pk).exists()
+        )
+        self.assertFalse(Token.objects.filter(user=self.user.pk).exists())
+        self.assertEqual(Recipe.objects.count(), 1)
+        self.assertEqual(Tag.objects.count(), 1)
+        self.assertEqual(Ingredient.objects.count(), 1)
+        self.assertEqual(Recipe.tags.through.objects.count(), 1)
+        self.assertEqual(
+            sorted(FileDeletion.objects.values_list('name', flat=True)),
+            [f'uploads/recipe/a-{i}.jpg' for i in range(3)],
+        )
+
+    def test_queries_do_not_grow_with_recipes(self):
+        """Test the statements run depend on batches, not on rows."""
+        def queries(user, recipes):
+            create_recipes(user, recipes)
+            with CaptureQueriesContext(connection) as captured:
+                deletion.delete_users(
+                    get_user_model().objects.filter(pk=user.pk),
+                )
+            return len(captured)
+
+        self.assertEqual(queries(self.user, 2), queries(self.other, 20))
+
+
+class FileDeletionTests(TestCase):
+    """Test removing the queued files."""
+
+    def test_removes_files(self):
+        """Test queued files are removed from the storage."""
+        with tempfile.TemporaryDirectory() as media_root:
+            with override_settings(MEDIA_ROOT=media_root):
+                name = default_storage.save('uploads/a.jpg', StringIO('x'))
+                FileDeletion.objects.create(name=name)
+
+                removed = deletion.process_file_deletions()
+
+                self.assertEqual(removed, 1)
+                self.assertFalse(
+                    os.path.exists(os.path.join(media_root, name))
+                )
+        self.assertFalse(FileDeletion.objects.exists())
+
+    def test_failures_stay_queued(self):
+        """Test files which cannot be removed are retried later."""
+        FileDeletion.objects.create(name='a.jpg')
+        storage = Mock()
+        storage.delete.side_effect = PermissionError
+
+        with self.assertLogs('core.deletion', 'WARNING'):
+            removed = deletion.process_file_deletions(storage=storage)
+
+        self.assertEqual(removed, 0)
+        self.assertEqual(FileDeletion.objects.get().attempts, 1)
+
+    def test_drain_stops_after_max_batches(self):
+        """Test draining removes at most max_batches batches."""
+        for i in range(5):
+            FileDeletion.objects.create(name=f'{i}.jpg')
+
+        removed = deletion.drain_file_deletions(
+            batch_size=2, max_batches=2, storage=Mock(),
+        )
+
+        self.assertEqual(removed, 4)
+        self.assertEqual(FileDeletion.objects.count(), 1)
+
+
+class PurgeUsersCommandTests(TestCase):
+    """Test the purge_users command."""
+
+    def setUp(self):
+        self.user = create_user('user@example.com')
+        create_recipes(self.user, 2)
+
+    def test_purge_by_email(self):
+        """Test users are deleted by email, in any case."""
+        out = StringIO()
+        call_command('purge_users', email=['USER@example.com'], stdout=out)
+
+        self.assertFalse(get_user_model().objects.exists())
+        self.assertIn('"core.Recipe": 2', out.getvalue())
+
+    def test_purge_removes_images(self):
+        """Test the images of purged users are removed from the storage."""
+        other = create_user('other@example.com')
+        create_recipes(other, 2, image='uploads/recipe/b')
+        out = StringIO()
+
+        with patch('core.deletion.default_storage') as storage:
+            call_command('purge_users', ids=[other.pk], stdout=out)
+
+        self.assertEqual(storage.delete.call_count, 2)
+        self.assertIn('"files_removed": 2', out.getvalue())
+        self.assertFalse(FileDeletion.objects.exists())
+
+    def test_dry_run(self):
+        """Test a dry run only counts the users."""
+        inactive = create_user('inactive@example.com')
+        inactive.is_active = False
+        inactive.save()
+        out = StringIO()
+
+        call_command(
+            'purge_users', ids=[self.user.pk], inactive=True, dry_run=True,
+            stdout=out,
+        )
+
+        self.assertIn('2 users would be deleted', out.getvalue())
+        self.assertEqual(get_user_model().objects.count(), 2)
+
+    def test_requires_selection(self):
+        """Test the users to delete must be selected."""
+        with self.assertRaises(CommandError):
+            call_command('purge_users')
@@ -0,0 +1,62 @@
+"""
+Tests for looking users up by email regardless of case.
+"""
+from importlib import import_module
+
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, connection
+from django.test import TestCase
+
+migration = import_module('core.migrations.0007_user_email_lower_unique')
+
+
+class EmailLookupTests(TestCase):
+    """Test the case insensitive email index."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='Test@example.com',
+            password='testpass123',
+        )
+
+    def test_filter_by_email(self):
+        """Test users are found by email in any case."""
+        users = get_user_model().objects.filter_by_email('tEST@EXAMPLE.COM')
+
+        self.assertEqual(list(users), [self.user])
+
+    def test_lookup_uses_index(self):
+        """Test the lookup is an index scan."""
+        users = get_user_model().objects.filter_by_email('test@example.com')
+
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        plan = users.explain()
+
+        self.assertIn(migration.INDEX_NAME, plan)
+
+    def test_unique_regardless_of_case(self):
+        """Test the index rejects emails differing only by case."""
+        with self.assertRaises(IntegrityError):
+            get_user_model().objects.create_user(
+                email='TEST@example.com',
+                password='testpass123',
+            )
+
+    def test_migration_reports_conflicts(self):
+        """Test conflicting accounts are listed by the migration."""
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP INDEX {migration.INDEX_NAME}')
+        other = get_user_model().objects.create_user(
+            email='TEST@example.com',
+            password='testpass123',
+        )
+
+        conflicts = migration.email_conflicts(get_user_model().objects.all())
+
+        self.assertEqual(conflicts, {
+            'test@example.com': [
+                (self.user.id, 'Test@example.com'),
+                (other.id, 'TEST@example.com'),
+            ],
+        })
@@ -0,0 +1,125 @@
+"""
+Tests for the configurable password hashers.
+"""
+import json
+import threading
+from io import StringIO
+
+from asgiref.sync import async_to_sync
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import get_hasher
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from django.test import override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import hashers
+from core.async_views import async_pool_view
+
+TOKEN_URL = reverse('user:token')
+
+FAST_HASHERS = [
+    'core.hashers.PBKDF2PasswordHasher',
+    'core.hashers.Argon2PasswordHasher',
+]
+
+
+@override_settings(
+    PASSWORD_HASHERS=FAST_HASHERS,
+    PASSWORD_PBKDF2_ITERATIONS=1000,
+    PASSWORD_ARGON2_TIME_COST=1,
+    PASSWORD_ARGON2_MEMORY_COST=1024,
+    PASSWORD_ARGON2_PARALLELISM=1,
+)
+class RehashOnLoginTests(TestCase):
+    """Test passwords are rehashed when users log in."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.client = APIClient()
+
+    def _login(self):
+        res = self.client.post(TOKEN_URL, {
+            'email': 'user@example.com',
+            'password': 'testpass123',
+        })
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        return self.user.password
+
+    def test_work_factor_comes_from_settings(self):
+        """Test the iterations setting is used for new passwords."""
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$1000$'))
+
+    def test_rehash_when_iterations_change(self):
+        """Test logging in upgrades the PBKDF2 iterations."""
+        with self.settings(PASSWORD_PBKDF2_ITERATIONS=2000):
+            password = self._login()
+
+        self.assertTrue(password.startswith('pbkdf2_sha256$2000$'))
+
+    def test_rehash_when_hasher_changes(self):
+        """Test logging in moves users to the preferred hasher."""
+        with self.settings(PASSWORD_HASHERS=FAST_HASHERS[::-1]):
+            password = self._login()
+            self.assertTrue(password.startswith('argon2$'))
+            self.assertIn('m=1024,t=1,p=1', password)
+
+            with self.settings(PASSWORD_ARGON2_TIME_COST=2):
+                password = self._login()
+
+        self.assertIn('m=1024,t=2,p=1', password)
+
+
+@override_settings(PASSWORD_PBKDF2_ITERATIONS=1000)
+class HashingThroughputTests(SimpleTestCase):
+    """Test measuring the password hashing throughput."""
+
+    def test_measure_hashing(self):
+        """Test the checks are timed on the given threads."""
+        result = hashers.measure_hashing(
+            get_hasher('pbkdf2_sha256'),
+            count=4,
+            threads=2,
+        )
+
+        self.assertEqual(result['hasher'], 'pbkdf2_sha256')
+        self.assertEqual(result['threads'], 2)
+        self.assertGreater(result['checks_per_second'], 0)
+
+    def test_password_benchmark_command(self):
+        """Test the command reports each hasher and thread count."""
+        out = StringIO()
+
+        call_command(
+            'password_benchmark', 'pbkdf2_sha256',
+            count=2, threads=[1, 2], stdout=out,
+        )
+
+        results = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual([r['threads'] for r in results], [1, 2])
+
+
+@override_settings(PASSWORD_HASH_THREADS=2)
+class HashPoolViewTests(SimpleTestCase):
+    """Test serving views from the hashing thread pool."""
+
+    def test_view_runs_in_pool(self):
+        """Test the async view calls the view in a pool thread."""
+        def view(request):
+            return HttpResponse(threading.current_thread().name)
+
+        async_view = async_pool_view(view, hashers.get_hash_executor)
+        request = RequestFactory().post('/')
+
+        res = async_to_sync(async_view)(request)
+
+        self.assertTrue(res.content.startswith(b'hash'))
@@ -0,0 +1,55 @@
+"""
+Tests for the slow client load test.
+"""
+import asyncio
+
+from django.test import SimpleTestCase
+
+from core.loadtest import LoadOptions, percentile, run_load
+
+BODY = b'x' * 20000
+
+
+async def _serve(reader, writer):
+    await reader.readuntil(b'\r\n\r\n')
+    writer.write(
+        b'HTTP/1.1 200 OK\r\nContent-Length: %d\r\n\r\n' % len(BODY) + BODY
+    )
+    await writer.drain()
+    writer.close()
+
+
+class LoadTestTests(SimpleTestCase):
+    """Test running the load test against a server."""
+
+    def test_percentile(self):
+        """Test picking percentiles of latencies."""
+        values = list(range(1, 101))
+
+        self.assertEqual(percentile(values, 0.5), 51)
+        self.assertEqual(percentile(values, 0.99), 100)
+        self.assertEqual(percentile([], 0.5), 0.0)
+
+    def test_run_load(self):
+        """Test fast requests are measured while slow clients read."""
+        async def run():
+            server = await asyncio.start_server(_serve, '127.0.0.1', 0)
+            port = server.sockets[0].getsockname()[1]
+            options = LoadOptions(
+                url=f'http://127.0.0.1:{port}/api/recipe/recipes/',
+                headers={'Authorization': 'Token abc'},
+                slow_clients=2,
+                fast_clients=2,
+                requests=10,
+                read_size=8192,
+                read_delay=0.001,
+            )
+            async with server:
+                return await run_load(options)
+
+        summary = asyncio.run(run())
+
+        self.assertEqual(summary['requests'], 10)
+        self.assertEqual(summary['errors'], 0)
+        self.assertGreater(summary['p99_ms'], 0)
+        self.assertGreater(summary['slow_responses'], 0)
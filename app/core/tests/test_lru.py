@@ -0,0 +1,36 @@
+"""
+Tests for the in-process LRU cache.
+"""
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+
+from core.lru import LRUCache
+
+
+class LRUCacheTests(SimpleTestCase):
+    """Test evicting and expiring entries."""
+
+    def test_evicts_least_recently_used(self):
+        """Test the oldest unused entry is dropped when full."""
+        cache = LRUCache(maxsize=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), 3)
+
+    @patch('core.lru.time.monotonic')
+    def test_entries_expire(self, patched_monotonic):
+        """Test entries are dropped after ttl seconds."""
+        patched_monotonic.return_value = 100.0
+        cache = LRUCache(ttl=10)
+        cache.set('a', 1)
+
+        patched_monotonic.return_value = 109.0
+        self.assertEqual(cache.get('a'), 1)
+        patched_monotonic.return_value = 110.0
+        self.assertEqual(cache.get('a', 'missing'), 'missing')
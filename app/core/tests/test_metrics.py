@@ -0,0 +1,141 @@
+"""
+Tests for the metrics store and endpoint.
+"""
+import os
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import metrics
+
+METRICS_URL = reverse('metrics')
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+class MmapValuesTests(TestCase):
+    """Test the memory mapped value store."""
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, 'metrics-1.db')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_inc_and_reopen(self):
+        """Test values survive reopening the file."""
+        store = metrics.MmapValues(self.path)
+        store.inc('a')
+        store.inc('a', 2.5)
+        store.inc('b')
+
+        reopened = metrics.MmapValues(self.path)
+        reopened.inc('b')
+
+        self.assertEqual(dict(reopened.items()), {'a': 3.5, 'b': 2.0})
+
+    def test_grows_past_initial_size(self):
+        """Test the map grows when it runs out of space."""
+        store = metrics.MmapValues()
+        keys = [f'metric_with_a_long_name_{i}' for i in range(5000)]
+        for key in keys:
+            store.inc(key)
+
+        self.assertEqual(len(store.items()), len(keys))
+        self.assertGreater(len(store.map), metrics.INITIAL_SIZE)
+
+
+class MetricsTests(TestCase):
+    """Test recording and exposing metrics."""
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.override = override_settings(
+            METRICS_DIR=self.tmp_dir.name,
+            METRICS_TOKEN='secret',
+        )
+        self.override.enable()
+        metrics._reset_store()
+        self.client = APIClient()
+
+    def tearDown(self):
+        metrics._reset_store()
+        self.override.disable()
+        self.tmp_dir.cleanup()
+
+    def scrape(self):
+        res = self.client.get(
+            METRICS_URL,
+            HTTP_AUTHORIZATION='Bearer secret',
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.content.decode()
+
+    def test_sums_worker_files(self):
+        """Test values of every worker process are added up."""
+        for pid in [100, 200]:
+            path = os.path.join(self.tmp_dir.name, f'metrics-{pid}.db')
+            metrics.MmapValues(path).inc(
+                metrics._key('http_requests_total', (('status', '200'),)),
+                pid,
+            )
+
+        self.assertIn('http_requests_total{status="200"} 300', self.scrape())
+
+    def test_records_requests(self):
+        """Test requests are counted with latency and queries."""
+        user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.client.force_authenticate(user)
+        self.client.get(RECIPES_URL)
+        self.client.force_authenticate(None)
+
+        output = self.scrape()
+
+        self.assertIn(
+            'http_requests_total{route="api/recipe/recipes/$",'
+            'method="GET",status="200"} 1',
+            output,
+        )
+        self.assertIn(
+            'http_request_duration_seconds_bucket{route="api/recipe/'
+            'recipes/$",method="GET",le="+Inf"} 1',
+            output,
+        )
+        self.assertIn('db_queries_total{route="api/recipe/recipes/$"', output)
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test histogram buckets include the smaller ones."""
+        metrics.observe('recipe_image_upload_bytes', 100 * 1024)
+        metrics.observe('recipe_image_upload_bytes', 1024)
+
+        output = self.scrape()
+
+        buckets = [
+            ('16384', 1), ('65536', 1), ('262144', 2), ('10485760', 2),
+            ('+Inf', 2),
+        ]
+        for le, count in buckets:
+            self.assertIn(
+                f'recipe_image_upload_bytes_bucket{{le="{le}"}} {count}',
+                output,
+            )
+        self.assertIn('recipe_image_upload_bytes_sum 103424', output)
+
+    def test_requires_token(self):
+        """Test the endpoint is hidden without the token."""
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(METRICS_TOKEN=None)
+    def test_hidden_without_token_outside_debug(self):
+        """Test the endpoint is hidden when no token is configured."""
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
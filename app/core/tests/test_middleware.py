@@ -0,0 +1,271 @@
+"""
+Tests for custom middleware.
+"""
+from decimal import Decimal
+import gzip
+import json
+import time
+from unittest import skipUnless
+from unittest.mock import patch
+import zlib
+
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from django.test import override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core.middleware import (
+    CompressionMiddleware,
+    LoadSheddingMiddleware,
+    accepted_encodings,
+    brotli,
+)
+from core.models import Recipe, Tag
+from recipe.serializers import RecipeSerializer
+
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+class QueryCountMiddlewareTests(TestCase):
+    """Test recording the queries of each request."""
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        tag = Tag.objects.create(user=self.user, name='Dinner')
+        for i in range(3):
+            recipe = Recipe.objects.create(
+                user=self.user,
+                title=f'Recipe {i}',
+                time_minutes=5,
+                price=Decimal('1.00'),
+            )
+            recipe.tags.add(tag)
+
+    @override_settings(DEBUG=True)
+    def test_debug_headers(self):
+        """Test query statistics are returned as headers in debug."""
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res['X-DB-Queries'], '2')
+        self.assertEqual(res['X-DB-Duplicate-Queries'], '0')
+        self.assertEqual(res['X-DB-Query-Budget'], '3')
+        self.assertGreater(float(res['X-DB-Time']), 0)
+
+    def test_logs_without_debug(self):
+        """Test query statistics are logged outside debug."""
+        with self.assertLogs('core.middleware', 'INFO') as logs:
+            res = self.client.get(RECIPES_URL)
+
+        self.assertNotIn('X-DB-Queries', res)
+        self.assertIn(f'GET {RECIPES_URL} queries=2', logs.output[0])
+
+    @patch.dict(
+        'recipe.views.RecipeViewSet.query_budget',
+        {'list': 1},
+    )
+    def test_logs_budget_exceeded(self):
+        """Test requests over their budget are logged as warnings."""
+        with self.assertLogs('core.middleware', 'WARNING') as logs:
+            self.client.get(RECIPES_URL)
+
+        self.assertIn('Query budget exceeded', logs.output[0])
+
+    @patch('recipe.views.FastRecipeListSerializer')
+    @override_settings(DEBUG=True)
+    def test_counts_duplicate_queries(self, patched_serializer):
+        """Test repeated statements are reported as duplicates."""
+        patched_serializer.side_effect = (
+            lambda queryset, fields: RecipeSerializer(queryset, many=True)
+        )
+
+        with self.assertLogs('core.middleware', 'WARNING'):
+            res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res['X-DB-Duplicate-Queries'], '4')
+
+
+BODY = json.dumps([{'title': f'Recipe {i}'} for i in range(200)]).encode()
+
+
+@override_settings(COMPRESSION_MIN_SIZE=1024)
+class CompressionMiddlewareTests(SimpleTestCase):
+    """Test compressing responses."""
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def _get(self, response, accept_encoding='gzip'):
+        request = self.factory.get('/', HTTP_ACCEPT_ENCODING=accept_encoding)
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def test_accepted_encodings(self):
+        """Test parsing Accept-Encoding with quality values."""
+        self.assertEqual(
+            accepted_encodings('gzip;q=0.5, br ,identity; q=0, *;q=x'),
+            {'gzip': 0.5, 'br': 1.0, 'identity': 0.0, '*': 0.0},
+        )
+
+    def test_gzip(self):
+        """Test a large response is gzipped."""
+        response = HttpResponse(BODY, content_type='application/json')
+        response['ETag'] = '"abc"'
+
+        res = self._get(response)
+
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+        self.assertEqual(res['Vary'], 'Accept-Encoding')
+        self.assertEqual(res['ETag'], 'W/"abc"')
+        self.assertEqual(int(res['Content-Length']), len(res.content))
+        self.assertEqual(gzip.decompress(res.content), BODY)
+
+    def test_skips_small_responses(self):
+        """Test responses under the threshold are not compressed."""
+        response = HttpResponse(BODY[:100], content_type='application/json')
+
+        res = self._get(response)
+
+        self.assertNotIn('Content-Encoding', res)
+        self.assertEqual(res['Vary'], 'Accept-Encoding')
+        self.assertEqual(res.content, BODY[:100])
+
+    def test_skips_unaccepted_and_binary(self):
+        """Test compression needs an accepted coding and content type."""
+        cases = [
+            ('application/json', 'identity', 'Accept-Encoding'),
+            ('application/json', 'gzip;q=0', 'Accept-Encoding'),
+            ('image/jpeg', 'gzip', None),
+        ]
+        for content_type, accept_encoding, vary in cases:
+            with self.subTest(content_type, accept=accept_encoding):
+                response = HttpResponse(BODY, content_type=content_type)
+
+                res = self._get(response, accept_encoding)
+
+                self.assertNotIn('Content-Encoding', res)
+                self.assertEqual(res.get('Vary'), vary)
+
+    @override_settings(COMPRESSION_GZIP_LEVEL=1)
+    def test_gzip_level(self):
+        """Test the gzip level comes from the settings."""
+        response = HttpResponse(BODY, content_type='application/json')
+
+        with patch(
+            'core.middleware.zlib.compressobj',
+            wraps=zlib.compressobj,
+        ) as patched_compressobj:
+            res = self._get(response)
+
+        self.assertEqual(patched_compressobj.call_args[0][0], 1)
+        self.assertEqual(gzip.decompress(res.content), BODY)
+
+    def test_streaming_is_not_buffered(self):
+        """Test each streamed chunk is compressed and flushed."""
+        produced = []
+
+        def chunks():
+            for i in range(3):
+                produced.append(i)
+                yield BODY
+
+        response = StreamingHttpResponse(
+            chunks(),
+            content_type='application/json',
+        )
+        res = self._get(response)
+
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+        self.assertNotIn('Content-Length', res)
+        stream = iter(res.streaming_content)
+        decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+        self.assertEqual(decompressor.decompress(next(stream)), BODY)
+        self.assertEqual(produced, [0])
+        rest = b''.join(decompressor.decompress(chunk) for chunk in stream)
+        self.assertEqual(rest, BODY * 2)
+
+    @skipUnless(brotli, 'brotli is not installed')
+    def test_prefers_brotli(self):
+        """Test brotli is used when accepted as much as gzip."""
+        response = HttpResponse(BODY, content_type='application/json')
+
+        res = self._get(response, 'gzip, deflate, br')
+
+        self.assertEqual(res['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(res.content), BODY)
+
+    @skipUnless(brotli, 'brotli is not installed')
+    def test_quality_selects_gzip(self):
+        """Test a higher quality for gzip wins over brotli."""
+        response = HttpResponse(BODY, content_type='application/json')
+
+        res = self._get(response, 'gzip, br;q=0.5')
+
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+
+
+@override_settings(
+    LOAD_SHED_MAX_QUEUE_SECONDS=2,
+    LOAD_SHED_MAX_CONCURRENCY=1,
+    LOAD_SHED_RETRY_AFTER=3,
+)
+class LoadSheddingMiddlewareTests(SimpleTestCase):
+    """Test refusing requests while overloaded."""
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.middleware = LoadSheddingMiddleware(
+            lambda request: HttpResponse('ok'),
+        )
+
+    def test_serves_requests(self):
+        """Test requests are served under the limits."""
+        request = self.factory.get(
+            '/', HTTP_X_REQUEST_START=f't={time.time() - 0.5:.3f}',
+        )
+
+        res = self.middleware(request)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(self.middleware.active, 0)
+
+    def test_sheds_requests_queued_too_long(self):
+        """Test requests which queued too long get a 503."""
+        request = self.factory.get(
+            '/', HTTP_X_REQUEST_START=f't={time.time() - 5:.3f}',
+        )
+
+        res = self.middleware(request)
+
+        self.assertEqual(res.status_code, 503)
+        self.assertEqual(res['Retry-After'], '3')
+        self.assertEqual(self.middleware.active, 0)
+
+    def test_sheds_requests_over_concurrency(self):
+        """Test requests over the concurrency limit get a 503."""
+        responses = []
+
+        def view(request):
+            responses.append(self.middleware(self.factory.get('/')))
+            return HttpResponse('ok')
+
+        self.middleware.get_response = view
+
+        res = self.middleware(self.factory.get('/'))
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(responses[0].status_code, 503)
+        self.assertEqual(self.middleware.active, 0)
+
+    def test_exempt_paths(self):
+        """Test the metrics endpoint is served regardless."""
+        request = self.factory.get(
+            '/api/metrics/', HTTP_X_REQUEST_START=f't={time.time() - 5}',
+        )
+
+        res = self.middleware(request)
+
+        self.assertEqual(res.status_code, 200)
@@ -0,0 +1,66 @@
+"""
+Tests for the pagination of large tables.
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+
+from core.models import Recipe
+from core.pagination import (
+    approximate_count,
+    count_or_estimate,
+    estimate_count,
+)
+
+
+class ApproximateCountTests(TestCase):
+    """Test estimating counts."""
+
+    def setUp(self):
+        user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        Recipe.objects.bulk_create([
+            Recipe(
+                user=user,
+                title=f'Recipe {i}',
+                time_minutes=i,
+                price=Decimal('1.00'),
+            )
+            for i in range(20)
+        ])
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE core_recipe')
+
+    def test_estimate_unfiltered(self):
+        """Test the row count of the table comes from its statistics."""
+        self.assertEqual(estimate_count(Recipe.objects.all()), 20)
+
+    def test_estimate_filtered(self):
+        """Test filtered counts come from the planner."""
+        estimate = estimate_count(Recipe.objects.filter(time_minutes__lt=5))
+
+        self.assertGreater(estimate, 0)
+        self.assertLessEqual(estimate, 20)
+
+    def test_exact_below_threshold(self):
+        """Test small counts are exact."""
+        recipes = Recipe.objects.filter(time_minutes__lt=5)
+
+        self.assertEqual(approximate_count(recipes, threshold=100), 5)
+        self.assertEqual(
+            approximate_count(recipes, threshold=0),
+            estimate_count(recipes),
+        )
+
+    def test_count_or_estimate(self):
+        """Test rows are counted up to the threshold, estimated past it."""
+        recipes = Recipe.objects.filter(time_minutes__lt=10)
+
+        self.assertEqual(count_or_estimate(recipes, threshold=10), (10, True))
+        count, exact = count_or_estimate(recipes, threshold=5)
+        self.assertFalse(exact)
+        self.assertGreaterEqual(count, 6)
@@ -0,0 +1,68 @@
+"""
+Tests for the API parsers.
+"""
+import io
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+
+from rest_framework.exceptions import ParseError
+
+from core.parsers import ORJSONParser, MessagePackParser
+from core.renderers import msgpack
+
+BODY = '{"title": "Crème brûlée", "price": "5.50", "tags": [{"id": 1}]}'
+EXPECTED = {'title': 'Crème brûlée', 'price': '5.50', 'tags': [{'id': 1}]}
+
+
+class ORJSONParserTests(SimpleTestCase):
+    """Test parsing JSON request bodies."""
+
+    def test_parse(self):
+        """Test a UTF-8 body is parsed."""
+        data = ORJSONParser().parse(io.BytesIO(BODY.encode()))
+
+        self.assertEqual(data, EXPECTED)
+
+    def test_parse_other_encoding(self):
+        """Test bodies in other encodings use the stdlib parser."""
+        data = ORJSONParser().parse(
+            io.BytesIO(BODY.encode('latin-1')),
+            parser_context={'encoding': 'latin-1'},
+        )
+
+        self.assertEqual(data, EXPECTED)
+
+    def test_invalid_json(self):
+        """Test invalid JSON raises a parse error."""
+        for body in [b'{"title": ', b'{"price": NaN}']:
+            with self.subTest(body=body):
+                with self.assertRaises(ParseError):
+                    ORJSONParser().parse(io.BytesIO(body))
+
+    @patch('core.parsers.orjson', None)
+    def test_fallback_without_orjson(self):
+        """Test the stdlib parser is used when orjson is missing."""
+        data = ORJSONParser().parse(io.BytesIO(BODY.encode()))
+
+        self.assertEqual(data, EXPECTED)
+
+
+class MessagePackParserTests(SimpleTestCase):
+    """Test parsing MessagePack request bodies."""
+
+    def test_parse(self):
+        """Test a body is parsed."""
+        body = msgpack.packb(EXPECTED)
+
+        data = MessagePackParser().parse(io.BytesIO(body))
+
+        self.assertEqual(data, EXPECTED)
+
+    def test_invalid_body(self):
+        """Test invalid or truncated bodies raise a parse error."""
+        body = msgpack.packb(EXPECTED)
+        for invalid in [body[:-3], body + b'\x01', b'\xc1', b'\x81\x01\x02']:
+            with self.subTest(body=invalid):
+                with self.assertRaises(ParseError):
+                    MessagePackParser().parse(io.BytesIO(invalid))
@@ -0,0 +1,98 @@
+"""
+Tests for the API renderers.
+"""
+import datetime
+from decimal import Decimal
+import uuid
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.serializer_helpers import ReturnList
+
+from core.renderers import ORJSONRenderer, MessagePackRenderer, msgpack
+
+PAYLOAD = ReturnList([
+    {
+        'id': 1,
+        'title': 'Crème brûlée\u2028and\u2029',
+        'price': Decimal('5.50'),
+        'created': datetime.datetime(
+            2021, 5, 1, 12, 30, 15, 123456, tzinfo=timezone.utc,
+        ),
+        'day': datetime.date(2021, 5, 1),
+        'time': datetime.time(8, 15, 0, 999),
+        'duration': datetime.timedelta(minutes=5),
+        'uuid': uuid.UUID('12345678123456781234567812345678'),
+        'label': gettext_lazy('Recipe'),
+        'tags': [{'id': 2, 'name': 'Dessert'}],
+        'scores': {1: 'one'},
+        'link': None,
+    },
+], serializer=None)
+
+
+class ORJSONRendererTests(SimpleTestCase):
+    """Test the orjson renderer matches the stdlib renderer."""
+
+    def test_output_matches_json_renderer(self):
+        """Test values render byte for byte like JSONRenderer."""
+        expected = JSONRenderer().render(PAYLOAD)
+
+        self.assertEqual(ORJSONRenderer().render(PAYLOAD), expected)
+
+    def test_escapes_line_separators(self):
+        """Test U+2028 and U+2029 are escaped."""
+        res = ORJSONRenderer().render({'text': '\u2028\u2029'})
+
+        self.assertEqual(res, b'{"text":"\\u2028\\u2029"}')
+
+    def test_none_renders_empty(self):
+        """Test no data renders an empty body."""
+        self.assertEqual(ORJSONRenderer().render(None), b'')
+
+    def test_indent_uses_stdlib(self):
+        """Test indented output is rendered like JSONRenderer."""
+        media_type = 'application/json; indent=4'
+
+        res = ORJSONRenderer().render(PAYLOAD, media_type)
+
+        self.assertEqual(res, JSONRenderer().render(PAYLOAD, media_type))
+
+    @patch('core.renderers.orjson', None)
+    def test_fallback_without_orjson(self):
+        """Test the stdlib renderer is used when orjson is missing."""
+        res = ORJSONRenderer().render(PAYLOAD)
+
+        self.assertEqual(res, JSONRenderer().render(PAYLOAD))
+
+
+class MessagePackRendererTests(SimpleTestCase):
+    """Test rendering MessagePack."""
+
+    def test_render(self):
+        """Test values are encoded like their JSON counterparts."""
+        res = msgpack.unpackb(
+            MessagePackRenderer().render(PAYLOAD),
+            strict_map_key=False,
+        )
+
+        self.assertEqual(res[0]['price'], '5.50')
+        self.assertEqual(res[0]['created'], '2021-05-01T12:30:15.123456Z')
+        self.assertEqual(res[0]['day'], '2021-05-01')
+        self.assertEqual(res[0]['label'], 'Recipe')
+        self.assertEqual(res[0]['tags'], [{'id': 2, 'name': 'Dessert'}])
+        self.assertIsNone(res[0]['link'])
+
+    def test_render_bytes_as_bin(self):
+        """Test bytes are encoded as bin values."""
+        res = MessagePackRenderer().render({'data': b'\x00'})
+
+        self.assertEqual(res, b'\x81\xa4data\xc4\x01\x00')
+
+    def test_none_renders_empty(self):
+        """Test no data renders an empty body."""
+        self.assertEqual(MessagePackRenderer().render(None), b'')
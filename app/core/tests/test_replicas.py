@@ -0,0 +1,140 @@
+"""
+Tests for routing reads to the read replicas.
+"""
+from decimal import Decimal
+from unittest.mock import Mock, patch
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import replicas
+from core.models import Recipe
+
+RECIPES_URL = reverse('recipe:recipe-list')
+ME_URL = reverse('user:me')
+
+
+class ReplicaRouterTests(SimpleTestCase):
+    """Test the database router."""
+
+    def setUp(self):
+        self.router = replicas.ReplicaRouter()
+
+    def test_reads_use_database_of_block(self):
+        """Test reads go to the database picked for the block."""
+        self.assertIsNone(self.router.db_for_read(Recipe))
+
+        with replicas.read_from('replica_0'):
+            self.assertEqual(self.router.db_for_read(Recipe), 'replica_0')
+
+        self.assertIsNone(self.router.db_for_read(Recipe))
+
+    def test_writes_go_to_primary(self):
+        """Test objects read from a replica are saved to the primary."""
+        recipe = Recipe()
+        recipe._state.db = 'replica_0'
+
+        with replicas.read_from('replica_0'):
+            alias = self.router.db_for_write(Recipe, instance=recipe)
+
+        self.assertEqual(alias, 'default')
+
+    @override_settings(REPLICA_DATABASES=['replica_0'])
+    def test_no_migrations_on_replicas(self):
+        """Test migrations are not run on replicas."""
+        self.assertFalse(self.router.allow_migrate('replica_0', 'core'))
+        self.assertIsNone(self.router.allow_migrate('default', 'core'))
+
+
+# The primary stands in for the replica, the database picked for each
+# request is read from choose_read_database.
+@override_settings(REPLICA_DATABASES=['default'], REPLICA_PIN_DIR=None)
+class ReplicaReadMixinTests(TestCase):
+    """Test the API views reading from replicas."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        replicas._reset_pin_table()
+
+    def tearDown(self):
+        replicas._reset_pin_table()
+
+    def _read_database(self, method, url, data=None):
+        """Return the response and the database picked for reads."""
+        picked = []
+        choose = replicas.choose_read_database
+
+        def record(request):
+            picked.append(choose(request))
+            return picked[-1]
+
+        with patch('core.replicas.choose_read_database', side_effect=record):
+            res = getattr(self.client, method)(url, data)
+        return res, picked[0]
+
+    def test_reads_from_replica(self):
+        """Test safe requests read from a replica."""
+        for url in [RECIPES_URL, ME_URL]:
+            res, alias = self._read_database('get', url)
+
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertEqual(alias, 'default')
+
+    def test_reads_after_write_use_primary(self):
+        """Test a user reads from the primary right after a write."""
+        payload = {
+            'title': 'Soup',
+            'time_minutes': 10,
+            'price': Decimal('2.50'),
+        }
+
+        res, alias = self._read_database('post', RECIPES_URL, payload)
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertIsNone(alias)
+
+        res, alias = self._read_database('get', RECIPES_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIsNone(alias)
+        self.assertEqual(res.data[0]['title'], 'Soup')
+
+    def test_failed_write_does_not_pin(self):
+        """Test a rejected write leaves the user on the replicas."""
+        res, _ = self._read_database('post', RECIPES_URL, {'title': ''})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        _, alias = self._read_database('get', RECIPES_URL)
+        self.assertEqual(alias, 'default')
+
+    def test_pin_expires(self):
+        """Test users are pinned for REPLICA_PIN_SECONDS."""
+        with patch('core.replicas.time.time', return_value=1000.0):
+            replicas.pin_to_primary(self.user)
+            self.assertTrue(replicas.is_pinned(self.user))
+
+        with patch('core.replicas.time.time', return_value=1005.0):
+            self.assertFalse(replicas.is_pinned(self.user))
+
+    @override_settings(REPLICA_PIN_SLOTS=4096)
+    def test_many_writers_stay_pinned(self):
+        """Test pins of many users writing at once are all kept."""
+        users = [Mock(pk=pk) for pk in range(1, 1001)]
+        for user in users:
+            replicas.pin_to_primary(user)
+
+        self.assertTrue(all(replicas.is_pinned(user) for user in users))
+
+    @override_settings(REPLICA_DATABASES=[])
+    def test_primary_without_replicas(self):
+        """Test everything reads from the primary without replicas."""
+        _, alias = self._read_database('get', RECIPES_URL)
+
+        self.assertIsNone(alias)
@@ -0,0 +1,91 @@
+"""
+Tests for the pre-generated OpenAPI schema.
+"""
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import schema
+
+SCHEMA_URL = reverse('api_schema')
+
+
+class SchemaTests(SimpleTestCase):
+    """Test building and serving the cached schema."""
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.override = override_settings(SCHEMA_CACHE_DIR=self.tmp_dir.name)
+        self.override.enable()
+        schema.clear_schema_cache()
+        self.client = APIClient()
+
+    def tearDown(self):
+        schema.clear_schema_cache()
+        self.override.disable()
+        self.tmp_dir.cleanup()
+
+    def test_build_schema_command_writes_files(self):
+        """Test the command writes a schema file per format."""
+        call_command('build_schema', stdout=StringIO())
+
+        for fmt in schema.SCHEMA_RENDERERS:
+            path = Path(self.tmp_dir.name) / f'schema.{fmt}'
+            self.assertTrue(path.is_file())
+        self.assertIn(b'/api/recipe/recipes/', path.read_bytes())
+
+    def test_serves_pre_generated_file(self):
+        """Test the view serves the artifact without introspecting."""
+        call_command('build_schema', stdout=StringIO())
+        schema.clear_schema_cache()
+
+        with patch('core.schema.generate_schema') as patched_generate:
+            res = self.client.get(SCHEMA_URL, {'format': 'json'})
+
+        patched_generate.assert_not_called()
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        path = Path(self.tmp_dir.name) / 'schema.json'
+        self.assertEqual(res.content, path.read_bytes())
+        self.assertIn('ETag', res)
+
+    def test_generates_and_memoizes_without_file(self):
+        """Test the schema is generated once when no file exists."""
+        with patch(
+            'core.schema.generate_schema',
+            wraps=schema.generate_schema,
+        ) as patched_generate:
+            res1 = self.client.get(SCHEMA_URL)
+            res2 = self.client.get(SCHEMA_URL)
+
+        self.assertEqual(patched_generate.call_count, 1)
+        self.assertEqual(res1.status_code, status.HTTP_200_OK)
+        self.assertEqual(res1.content, res2.content)
+        self.assertIn(b'openapi', res1.content)
+
+    def test_not_modified_with_matching_etag(self):
+        """Test a matching If-None-Match returns 304."""
+        res = self.client.get(SCHEMA_URL)
+
+        res = self.client.get(SCHEMA_URL, HTTP_IF_NONE_MATCH=res['ETag'])
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res.content, b'')
+
+    def test_advertises_msgpack(self):
+        """Test the schema lists the MessagePack media type."""
+        content = schema.generate_schema()
+
+        recipes = content['paths']['/api/recipe/recipes/']
+        self.assertIn('application/msgpack', recipes['post']['requestBody'][
+            'content'
+        ])
+        self.assertIn('application/msgpack', recipes['get']['responses'][
+            '200'
+        ]['content'])
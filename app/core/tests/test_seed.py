@@ -0,0 +1,95 @@
+"""
+Tests for the synthetic data generator.
+"""
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from core import seed
+from core.models import (
+    User,
+    Recipe,
+    RecipeStats,
+    Tag,
+)
+from core.stats import compute_stats
+
+
+class SeedDataTests(TestCase):
+    """Test generating and loading seed data."""
+    def setUp(self):
+        self.options = seed.SeedOptions(
+            users=5,
+            max_recipes=4,
+            tags=3,
+            ingredients=4,
+            max_tags=2,
+            max_ingredients=3,
+            chunk_size=2,
+        )
+
+    def test_chunks_are_deterministic(self):
+        """Test the same seed generates the same rows."""
+        chunk = seed.plan_chunks(self.options)[1]
+
+        first = seed.generate_chunk(chunk, self.options, 'hash')
+        second = seed.generate_chunk(chunk, self.options, 'hash')
+
+        self.assertEqual(first, second)
+
+    def test_chunks_cover_all_users(self):
+        """Test the chunks split the users into contiguous id ranges."""
+        chunks = seed.plan_chunks(self.options)
+
+        self.assertEqual(
+            [len(chunk['recipe_counts']) for chunk in chunks],
+            [2, 2, 1],
+        )
+        self.assertEqual(chunks[1]['user_id'], chunks[0]['user_id'] + 2)
+
+    def test_seed_data_loads_rows(self):
+        """Test loading the generated rows with COPY."""
+        totals = seed.seed_data(self.options, 'hash')
+
+        self.assertEqual(User.objects.count(), 5)
+        self.assertEqual(Tag.objects.count(), 15)
+        self.assertEqual(Recipe.objects.count(), totals['core_recipe'])
+        recipe = Recipe.objects.order_by('id').first()
+        self.assertTrue(1 <= recipe.tags.count() <= 2)
+        self.assertTrue(
+            all(tag.user_id == recipe.user_id for tag in recipe.tags.all())
+        )
+
+    def test_seed_data_counts_stats(self):
+        """Test the stats of the seeded users match their recipes."""
+        seed.seed_data(self.options, 'hash')
+
+        self.assertEqual(RecipeStats.objects.count(), 5)
+        for stored in RecipeStats.objects.all():
+            counted = compute_stats(stored.user_id)
+            for field in ['recipe_count', 'price_total', 'price_min',
+                          'price_max', 'time_total', 'time_min', 'time_max',
+                          'time_histogram', 'tag_counts',
+                          'ingredient_counts']:
+                self.assertEqual(
+                    getattr(stored, field), getattr(counted, field), field,
+                )
+
+    def test_sequences_reset_after_seed(self):
+        """Test new rows get ids after the seeded ones."""
+        seed.seed_data(self.options, 'hash')
+        last_seeded = User.objects.order_by('-id').first()
+
+        user = User.objects.create_user('new@example.com', 'pass123')
+
+        self.assertGreater(user.id, last_seeded.id)
+
+    @patch('core.management.commands.seed_data.write_placeholder_images')
+    def test_seed_data_command(self, patched_images):
+        """Test the seed_data command loads the requested users."""
+        call_command('seed_data', users=3, max_recipes=2, stdout=StringIO())
+
+        patched_images.assert_called_once()
+        self.assertEqual(User.objects.count(), 3)
@@ -0,0 +1,124 @@
+"""
+Tests for the container start up steps.
+"""
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.db import connections
+from django.db.utils import OperationalError
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from core import startup
+
+
+@patch('time.sleep')
+class WaitForDatabaseTests(SimpleTestCase):
+    """Test polling the database."""
+
+    def test_backoff(self, patched_sleep):
+        """Test the delay between attempts doubles up to a maximum."""
+        with patch.object(
+            connections['default'],
+            'ensure_connection',
+            side_effect=[OperationalError] * 4 + [None],
+        ):
+            attempts = startup.wait_for_database(max_delay=0.3)
+
+        self.assertEqual(attempts, 5)
+        self.assertEqual(
+            [call.args[0] for call in patched_sleep.call_args_list],
+            [0.05, 0.1, 0.2, 0.3],
+        )
+
+    def test_timeout(self, patched_sleep):
+        """Test the error is raised once the timeout passes."""
+        with patch.object(
+            connections['default'],
+            'ensure_connection',
+            side_effect=OperationalError,
+        ):
+            with self.assertRaises(OperationalError):
+                startup.wait_for_database(timeout=0.01)
+
+        patched_sleep.assert_not_called()
+
+
+@patch('core.startup.call_command')
+class CollectStaticTests(SimpleTestCase):
+    """Test skipping collectstatic."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.settings_override = override_settings(
+            STATIC_ROOT=self.tmp_dir.name,
+        )
+        self.settings_override.enable()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        self.tmp_dir.cleanup()
+
+    def test_skips_unchanged_files(self, patched_call):
+        """Test collectstatic runs again only when the files change."""
+        self.assertFalse(startup.collect_static())
+        self.assertTrue(startup.collect_static())
+        self.assertEqual(patched_call.call_count, 1)
+
+        marker = Path(self.tmp_dir.name) / startup.STATIC_HASH_FILE
+        self.assertEqual(marker.read_text(), startup.static_files_hash())
+
+        with patch('core.startup.static_files_hash', return_value='new'):
+            self.assertFalse(startup.collect_static())
+        self.assertEqual(patched_call.call_count, 2)
+
+
+class StartupTests(TestCase):
+    """Test the start up steps and command."""
+
+    @patch('core.startup.call_command')
+    def test_migrate_skipped_without_pending(self, patched_call):
+        """Test migrate only runs with pending migrations."""
+        self.assertEqual(startup.pending_migrations(), [])
+        self.assertTrue(startup.migrate())
+        patched_call.assert_not_called()
+
+        with patch('core.startup.pending_migrations', return_value=[1]):
+            self.assertFalse(startup.migrate())
+        patched_call.assert_called_once()
+
+    def test_run_steps(self):
+        """Test chains run concurrently and steps in order."""
+        calls = []
+
+        def step(name, skipped):
+            def func():
+                calls.append(name)
+                return skipped
+            return name, func
+
+        with patch('core.startup.connections.close_all'):
+            results = startup.run_steps([
+                [step('first', False), step('second', True)],
+                [step('other', False)],
+            ])
+
+        self.assertEqual(
+            [(result.name, result.skipped) for result in results],
+            [('first', False), ('second', True), ('other', False)],
+        )
+        self.assertLess(calls.index('first'), calls.index('second'))
+
+    @patch('core.startup.startup_chains')
+    def test_command_reports_steps(self, patched_chains):
+        """Test the command prints the time of each step."""
+        patched_chains.return_value = [[('migrate', lambda: True)]]
+
+        stdout = StringIO()
+        with patch('core.startup.connections.close_all'):
+            call_command('startup', db_timeout=5, stdout=stdout)
+
+        patched_chains.assert_called_once_with(5)
+        self.assertIn('migrate: skipped in', stdout.getvalue())
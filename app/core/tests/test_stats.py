@@ -0,0 +1,166 @@
+"""
+Tests for the recipe statistics kept on writes.
+"""
+import json
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from core import stats
+from core.models import Ingredient, Recipe, RecipeStats, Tag
+
+FIELDS = [
+    'recipe_count', 'price_total', 'price_min', 'price_max', 'time_total',
+    'time_min', 'time_max', 'time_histogram', 'tag_counts',
+    'ingredient_counts',
+]
+
+
+def create_recipe(user, price, time_minutes, tags=(), ingredients=()):
+    recipe = Recipe.objects.create(
+        user=user,
+        title='Recipe',
+        time_minutes=time_minutes,
+        price=Decimal(price),
+    )
+    recipe.tags.add(*tags)
+    recipe.ingredients.add(*ingredients)
+    return recipe
+
+
+class RecipeStatsTests(TestCase):
+    """Test counting and updating the statistics."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.tag = Tag.objects.create(user=self.user, name='Vegan')
+        self.ingredient = Ingredient.objects.create(
+            user=self.user, name='Salt',
+        )
+
+    def assertCounted(self):
+        """Assert the stored stats match counting the recipes again."""
+        stored = RecipeStats.objects.get(user=self.user)
+        counted = stats.compute_stats(self.user.pk)
+        for field in FIELDS:
+            self.assertEqual(
+                getattr(stored, field), getattr(counted, field), field,
+            )
+
+    def test_time_bucket(self):
+        """Test the histogram buckets include their upper bound."""
+        self.assertEqual(stats.time_bucket(0), 0)
+        self.assertEqual(stats.time_bucket(10), 0)
+        self.assertEqual(stats.time_bucket(11), 1)
+        self.assertEqual(stats.time_bucket(121), len(stats.TIME_BUCKETS))
+
+    def test_compute_stats(self):
+        """Test counting the stats from the recipes."""
+        create_recipe(self.user, '2.00', 5, tags=[self.tag])
+        create_recipe(
+            self.user, '6.00', 45,
+            tags=[self.tag], ingredients=[self.ingredient],
+        )
+
+        counted = stats.compute_stats(self.user.pk)
+
+        self.assertEqual(counted.recipe_count, 2)
+        self.assertEqual(counted.price_total, Decimal('8.00'))
+        self.assertEqual(counted.price_min, Decimal('2.00'))
+        self.assertEqual(counted.time_max, 45)
+        self.assertEqual(counted.time_histogram, [1, 0, 0, 1, 0, 0])
+        self.assertEqual(counted.tag_counts, {str(self.tag.pk): 2})
+        self.assertEqual(
+            counted.ingredient_counts, {str(self.ingredient.pk): 1},
+        )
+
+    def test_first_write_counts_existing_recipes(self):
+        """Test a user without stats has them counted when locked."""
+        create_recipe(self.user, '3.00', 15, tags=[self.tag])
+
+        with stats.updating_stats(self.user.pk) as update:
+            recipe = create_recipe(self.user, '1.00', 90, tags=[self.tag])
+            update.add(stats.recipe_entry(recipe))
+
+        self.assertCounted()
+
+    def test_remove_recomputes_extremes(self):
+        """Test removing the recipe holding the minimum recomputes it."""
+        cheap = create_recipe(self.user, '1.00', 5)
+        create_recipe(self.user, '4.00', 25)
+        create_recipe(self.user, '9.00', 130)
+        stats.ensure_stats(self.user.pk)
+
+        with stats.updating_stats(self.user.pk) as update:
+            entry = stats.recipe_entry(cheap)
+            cheap.delete()
+            update.remove(entry)
+
+        stored = RecipeStats.objects.get(user=self.user)
+        self.assertEqual(stored.price_min, Decimal('4.00'))
+        self.assertEqual(stored.time_min, 25)
+        self.assertCounted()
+
+    def test_remove_last_recipe(self):
+        """Test removing every recipe leaves empty stats."""
+        recipe = create_recipe(
+            self.user, '1.00', 5,
+            tags=[self.tag], ingredients=[self.ingredient],
+        )
+        stats.ensure_stats(self.user.pk)
+
+        with stats.updating_stats(self.user.pk) as update:
+            entry = stats.recipe_entry(recipe)
+            recipe.delete()
+            update.remove(entry)
+
+        stored = RecipeStats.objects.get(user=self.user)
+        self.assertEqual(stored.recipe_count, 0)
+        self.assertIsNone(stored.price_min)
+        self.assertEqual(stored.tag_counts, {})
+        self.assertCounted()
+
+    def test_rebuild_stats_command(self):
+        """Test rebuild_stats repairs stats left behind by other writes."""
+        create_recipe(self.user, '2.00', 5, tags=[self.tag])
+        stats.ensure_stats(self.user.pk)
+        # Written without updating the stats.
+        create_recipe(self.user, '8.00', 200, ingredients=[self.ingredient])
+        out = StringIO()
+
+        call_command('rebuild_stats', '--email', 'USER@example.com',
+                     stdout=out)
+
+        self.assertEqual(
+            json.loads(out.getvalue()), {'users': 1, 'recipes': 2},
+        )
+        self.assertCounted()
+
+    def test_summarize(self):
+        """Test the summary of the stats, with the top tags named."""
+        other = Tag.objects.create(user=self.user, name='Quick')
+        create_recipe(self.user, '1.00', 5, tags=[self.tag, other])
+        create_recipe(self.user, '2.50', 10, tags=[other])
+
+        summary = stats.summarize(stats.ensure_stats(self.user.pk), top=1)
+
+        self.assertEqual(summary['recipe_count'], 2)
+        self.assertEqual(summary['price']['avg'], Decimal('1.75'))
+        self.assertEqual(summary['time_minutes']['avg'], 7.5)
+        self.assertEqual(
+            summary['time_histogram'][0], {'max_minutes': 10, 'count': 2},
+        )
+        self.assertEqual(
+            summary['time_histogram'][-1], {'max_minutes': None, 'count': 0},
+        )
+        self.assertEqual(
+            summary['top_tags'],
+            [{'id': other.pk, 'name': 'Quick', 'recipe_count': 2}],
+        )
+        self.assertEqual(summary['top_ingredients'], [])
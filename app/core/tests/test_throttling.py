@@ -0,0 +1,145 @@
+"""
+Tests for the shared rate limits.
+"""
+import os
+import tempfile
+
+from pathlib import Path
+from unittest import skipUnless
+
+from django.conf import settings
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import throttling
+
+TOKEN_URL = reverse('user:token')
+PROXY_DIR = Path(settings.BASE_DIR).parent / 'proxy'
+
+
+def throttle_rates(**rates):
+    """Return REST_FRAMEWORK settings with the given rates."""
+    return {
+        **settings.REST_FRAMEWORK,
+        'DEFAULT_THROTTLE_RATES': {
+            **settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'],
+            **rates,
+        },
+    }
+
+
+class BucketTableTests(SimpleTestCase):
+    """Test the token bucket table."""
+
+    def test_burst_then_refill(self):
+        """Test a bucket allows a burst, then refills over time."""
+        table = throttling.BucketTable(slots=16)
+
+        for _ in range(3):
+            self.assertEqual(table.take('a', 3, 1.0, now=100.0), 0)
+        self.assertAlmostEqual(table.take('a', 3, 1.0, now=100.0), 1.0)
+        self.assertAlmostEqual(table.take('a', 3, 1.0, now=100.5), 0.5)
+        self.assertEqual(table.take('a', 3, 1.0, now=101.0), 0)
+        self.assertEqual(table.take('b', 3, 1.0, now=101.0), 0)
+
+    def test_full_table_reuses_oldest_slot(self):
+        """Test keys take over the least recently used slot."""
+        table = throttling.BucketTable(slots=4)
+        for i in range(4):
+            table.take(f'key-{i}', 1, 0.001, now=float(i))
+
+        self.assertEqual(table.take('other', 1, 0.001, now=10.0), 0)
+        self.assertEqual(table.take('key-0', 1, 0.001, now=10.0), 0)
+        self.assertGreater(table.take('key-3', 1, 0.001, now=10.0), 0)
+
+    def test_shared_between_maps_of_file(self):
+        """Test tables mapping the same file share their buckets."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'buckets.db')
+            first = throttling.BucketTable(path, slots=16)
+            second = throttling.BucketTable(path, slots=16)
+
+            self.assertEqual(first.take('a', 1, 1.0, now=0.0), 0)
+            self.assertGreater(second.take('a', 1, 1.0, now=0.0), 0)
+
+
+@override_settings(
+    THROTTLE_ENABLED=True,
+    THROTTLE_DIR=None,
+    REST_FRAMEWORK=throttle_rates(login='2/min'),
+)
+class LoginThrottleTests(TestCase):
+    """Test the rate limit of logins."""
+
+    def setUp(self):
+        throttling._reset_table()
+        self.client = APIClient()
+
+    def tearDown(self):
+        throttling._reset_table()
+
+    def test_logins_throttled(self):
+        """Test logins over the rate get a 429 with Retry-After."""
+        payload = {'email': 'user@example.com', 'password': 'wrong'}
+        for _ in range(2):
+            res = self.client.post(TOKEN_URL, payload)
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.post(TOKEN_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(res['Retry-After'], '30')
+
+        other = APIClient(REMOTE_ADDR='10.0.0.2')
+        res = other.post(TOKEN_URL, payload)
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_spoofed_forwarded_for_throttled(self):
+        """Test clients cannot pose as others with X-Forwarded-For."""
+        payload = {'email': 'user@example.com', 'password': 'wrong'}
+        statuses = []
+        with override_settings(REST_FRAMEWORK={
+            **settings.REST_FRAMEWORK, 'NUM_PROXIES': 1,
+        }):
+            for i in range(3):
+                # The proxy appends the address the client connected
+                # from to whatever the client sent.
+                res = self.client.post(
+                    TOKEN_URL, payload,
+                    HTTP_X_FORWARDED_FOR=f'10.1.1.{i}, 10.0.0.9',
+                )
+                statuses.append(res.status_code)
+
+        self.assertEqual(statuses, [
+            status.HTTP_400_BAD_REQUEST,
+            status.HTTP_400_BAD_REQUEST,
+            status.HTTP_429_TOO_MANY_REQUESTS,
+        ])
+
+    @override_settings(THROTTLE_ENABLED=False)
+    def test_throttling_disabled(self):
+        """Test THROTTLE_ENABLED turns the rate limits off."""
+        payload = {'email': 'user@example.com', 'password': 'wrong'}
+        for _ in range(3):
+            res = self.client.post(TOKEN_URL, payload)
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@skipUnless(PROXY_DIR.is_dir(), 'proxy configuration not available')
+class ProxyConfigTests(SimpleTestCase):
+    """Test the proxy sets the X-Forwarded-For the throttles trust."""
+
+    def test_forwarded_for_overwritten(self):
+        """Test each proxy mode replaces the header of the client."""
+        for name, directive in [
+            ('default.conf.tpl', 'uwsgi_param HTTP_X_FORWARDED_FOR'),
+            ('asgi.conf.tpl', 'proxy_set_header X-Forwarded-For'),
+        ]:
+            with self.subTest(name):
+                config = ' '.join((PROXY_DIR / name).read_text().split())
+                self.assertIn(
+                    f'{directive} $proxy_add_x_forwarded_for;', config,
+                )
@@ -0,0 +1,110 @@
+"""
+Tests for the Server-Timing instrumentation.
+"""
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.queries import collect_queries
+from core.timing import PhaseTimer, ServerTimingMixin
+
+RECIPES_URL = reverse('recipe:recipe-list')
+ME_URL = reverse('user:me')
+
+
+def header_phases(response):
+    """Return the phase names of a Server-Timing header."""
+    return [
+        metric.split(';')[0]
+        for metric in response['Server-Timing'].split(', ')
+    ]
+
+
+class ServerTimingTests(TestCase):
+    """Test timing the phases of API requests."""
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.client = APIClient()
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=1)
+    def test_sampled_request_has_phases(self):
+        """Test a sampled request reports every phase."""
+        self.client.force_authenticate(self.user)
+
+        for url in [RECIPES_URL, ME_URL]:
+            res = self.client.get(url)
+
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertEqual(
+                header_phases(res),
+                ['auth', 'permission', 'db', 'serialize', 'render', 'total'],
+            )
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=0)
+    def test_unsampled_request_has_no_header(self):
+        """Test requests are not timed when sampling is off."""
+        self.client.force_authenticate(self.user)
+
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotIn('Server-Timing', res)
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=1)
+    def test_denied_request_skips_handler_phases(self):
+        """Test a request rejected by permissions is still timed."""
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(
+            header_phases(res),
+            ['auth', 'permission', 'render', 'total'],
+        )
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=1)
+    def test_timing_is_logged(self):
+        """Test the phases are logged as structured data."""
+        self.client.force_authenticate(self.user)
+
+        with self.assertLogs('core.timing', 'INFO') as logs:
+            self.client.get(RECIPES_URL)
+
+        record = logs.records[0]
+        self.assertEqual(record.view, 'RecipeViewSet')
+        self.assertIn('serialize', record.phases)
+
+    def test_serialize_excludes_queries(self):
+        """Test queries run by a serializer count as database time."""
+        view = ServerTimingMixin()
+        view.timer = PhaseTimer()
+
+        def data():
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT pg_sleep(0.05)')
+            return []
+
+        serializer = type('Serializer', (), {'data': property(
+            lambda self: data(),
+        )})()
+        with collect_queries() as view.query_stats:
+            self.assertEqual(view.serialize(serializer), [])
+
+        self.assertGreaterEqual(view.query_stats.time, 0.05)
+        self.assertLess(view.timer.phases['serialize'], 0.05)
+
+    def test_phase_timer_header(self):
+        """Test formatting accumulated phases."""
+        timer = PhaseTimer()
+        timer.add('db', 0.002)
+        timer.add('db', 0.001)
+
+        header = timer.as_header()
+
+        self.assertTrue(header.startswith('db;dur=3.00, total;dur='))
@@ -0,0 +1,54 @@
+"""
+Tests for warming up the app before workers fork.
+"""
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+
+from core import warmup
+from recipe.fast_serializers import compile_fields
+from recipe.serializers import RecipeSerializer
+from user.serializers import UserSerializer
+
+IMPORT_TIMES = '''import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   django.utils
+import time:       300 |        420 | django
+import time:      1500 |       1500 | yaml
+unrelated output
+'''
+
+
+@patch('core.warmup.connections.close_all')
+@patch('gc.freeze')
+class WarmUpTests(SimpleTestCase):
+    """Test the warm-up steps."""
+
+    def test_warm_up_reports_steps(self, patched_freeze, patched_close):
+        """Test each step is timed and connections are closed."""
+        timings = warmup.warm_up()
+
+        self.assertEqual(
+            list(timings),
+            ['modules', 'urls', 'serializers', 'gc'],
+        )
+        patched_freeze.assert_called_once()
+        patched_close.assert_called_once()
+
+    def test_warm_up_builds_serializers(self, patched_freeze, patched_close):
+        """Test serializers and the recipe list fields are built."""
+        compile_fields.cache_clear()
+
+        warmup.warm_up()
+
+        serializers = warmup._project_serializers()
+        self.assertIn(RecipeSerializer, serializers)
+        self.assertIn(UserSerializer, serializers)
+        self.assertEqual(compile_fields.cache_info().currsize, 1)
+        compile_fields(tuple(RecipeSerializer.Meta.fields))
+        self.assertEqual(compile_fields.cache_info().hits, 1)
+
+    def test_parse_import_times(self, patched_freeze, patched_close):
+        """Test import times are summed by top level package."""
+        totals = warmup.parse_import_times(IMPORT_TIMES)
+
+        self.assertEqual(totals, {'django': 0.00042, 'yaml': 0.0015})
@@ -0,0 +1,143 @@
+"""
+Rate limiting shared by the worker processes.
+
+The throttles keep a token bucket per client in a memory mapped file in
+THROTTLE_DIR, which every worker of the server maps, so the limits hold
+across workers without a database or cache round trip. Without
+THROTTLE_DIR each process keeps its own buckets.
+
+A rate of 100/min lets a client burst 100 requests, then refills one
+token every 0.6 seconds, rather than resetting a fixed window.
+"""
+import os
+import threading
+import time
+
+from django.conf import settings
+
+from rest_framework.settings import api_settings
+from rest_framework.throttling import (
+    AnonRateThrottle,
+    ScopedRateThrottle,
+    SimpleRateThrottle,
+    UserRateThrottle,
+)
+
+from core import metrics
+from core.shared_table import SharedTable
+
+
+class BucketTable(SharedTable):
+    """Token buckets in a shared hash table, tokens left by client.
+
+    Buckets of clients which went quiet are full again, so losing one to
+    another key only ever lets a client through.
+    """
+
+    def take(self, key, capacity, rate, now=None):
+        """Take a token from the bucket of key.
+
+        The bucket holds up to capacity tokens and refills rate tokens a
+        second. Returns 0 when a token was taken, otherwise the seconds
+        until the next one.
+        """
+        if now is None:
+            now = time.time()
+        with self.locked():
+            offset, key_hash, slot = self.find(key)
+            if slot is None:
+                tokens = capacity
+            else:
+                tokens, updated = slot
+                tokens = min(capacity, tokens + (now - updated) * rate)
+
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / rate
+            self.write(offset, key_hash, tokens, now)
+        return wait
+
+
+_table = None
+_table_lock = threading.Lock()
+
+
+def get_table():
+    """Return the bucket table of the current process."""
+    global _table
+    if _table is None:
+        with _table_lock:
+            if _table is None:
+                directory = settings.THROTTLE_DIR
+                path = None
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                    path = os.path.join(directory, 'buckets.db')
+                _table = BucketTable(path, settings.THROTTLE_SLOTS)
+    return _table
+
+
+def _reset_table():
+    global _table
+    _table = None
+
+
+# flock() locks belong to the open file, so forked workers open their
+# own to exclude each other.
+os.register_at_fork(after_in_child=_reset_table)
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """DRF rate throttle counting requests in a shared token bucket."""
+
+    def get_rate(self):
+        # Read at request time rather than import time, so the rates can
+        # be changed in settings.
+        try:
+            return api_settings.DEFAULT_THROTTLE_RATES[self.scope]
+        except KeyError:
+            return super().get_rate()
+
+    def allow_request(self, request, view):
+        self.wait_seconds = 0.0
+        if self.rate is None or not settings.THROTTLE_ENABLED:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.wait_seconds = get_table().take(
+            self.key,
+            capacity=self.num_requests,
+            rate=self.num_requests / self.duration,
+        )
+        if self.wait_seconds:
+            metrics.inc('http_requests_throttled_total', (
+                ('scope', self.scope),
+            ))
+            return False
+        return True
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class AnonTokenBucketThrottle(AnonRateThrottle, TokenBucketThrottle):
+    """Limit the requests of anonymous clients by IP address."""
+
+
+class UserTokenBucketThrottle(UserRateThrottle, TokenBucketThrottle):
+    """Limit the requests of authenticated users."""
+
+
+class ScopedTokenBucketThrottle(ScopedRateThrottle, TokenBucketThrottle):
+    """Limit the requests to views with a throttle_scope."""
+
+
+metrics.describe(
+    'http_requests_throttled_total', 'counter',
+    'Requests rejected by the rate limits, by throttle scope.',
+)
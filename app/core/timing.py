@@ -0,0 +1,156 @@
+"""
+Per-phase latency breakdown of API requests.
+
+Sampled requests get a Server-Timing header and a log record with the
+time spent authenticating, checking permissions, querying the database,
+serializing and rendering. Serializing is the time spent reading the
+data of serializers passed to ServerTimingMixin.serialize(), without
+the queries run meanwhile, which count as database time.
+"""
+import logging
+import random
+import time
+
+from django.conf import settings
+
+from rest_framework import mixins
+from rest_framework.response import Response
+
+from core.queries import collect_queries
+
+logger = logging.getLogger(__name__)
+
+
+class PhaseTimer:
+    """Accumulate the duration of named phases of a request."""
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.phases = {}
+
+    def add(self, name, seconds):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def timed(self, name, func, *args, **kwargs):
+        """Call func, adding its duration to a phase."""
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def as_header(self):
+        """Format the phases as a Server-Timing header value."""
+        phases = dict(self.phases)
+        phases['total'] = time.perf_counter() - self.start
+        return ', '.join(
+            f'{name};dur={seconds * 1000:.2f}'
+            for name, seconds in phases.items()
+        )
+
+
+def sample_request():
+    """Return whether the current request should be timed."""
+    rate = settings.SERVER_TIMING_SAMPLE_RATE
+    return rate >= 1 or (rate > 0 and random.random() < rate)
+
+
+class ServerTimingMixin:
+    """Time the phases of the DRF request cycle for sampled requests."""
+    timer = None
+
+    def dispatch(self, request, *args, **kwargs):
+        if not sample_request():
+            return super().dispatch(request, *args, **kwargs)
+
+        self.timer = PhaseTimer()
+        with collect_queries() as self.query_stats:
+            return super().dispatch(request, *args, **kwargs)
+
+    def perform_authentication(self, request):
+        if self.timer is None:
+            return super().perform_authentication(request)
+        self.timer.timed('auth', super().perform_authentication, request)
+
+    def check_permissions(self, request):
+        if self.timer is None:
+            return super().check_permissions(request)
+        self.timer.timed('permission', super().check_permissions, request)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if self.timer is not None:
+            self._handler_db_start = self.query_stats.time
+            # Reported ahead of serialize.
+            self.timer.add('db', 0.0)
+
+    def serialize(self, serializer):
+        """Return the data of serializer, timed for sampled requests."""
+        if self.timer is None:
+            return serializer.data
+        start = time.perf_counter()
+        db_start = self.query_stats.time
+        try:
+            return serializer.data
+        finally:
+            # Querysets evaluated by the serializer are database time.
+            self.timer.add('serialize', (
+                time.perf_counter() - start
+                - (self.query_stats.time - db_start)
+            ))
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request,
+            response,
+            *args,
+            **kwargs,
+        )
+        if self.timer is None:
+            return response
+
+        # The handler did not run when authentication or permissions fail.
+        if hasattr(self, '_handler_db_start'):
+            self.timer.add(
+                'db', self.query_stats.time - self._handler_db_start,
+            )
+        if hasattr(response, 'render') and not response.is_rendered:
+            self.timer.timed('render', response.render)
+
+        response['Server-Timing'] = self.timer.as_header()
+        logger.info(
+            'server timing %s %s: %s',
+            request.method,
+            request.path,
+            response['Server-Timing'],
+            extra={
+                'view': type(self).__name__,
+                'phases': {
+                    name: round(seconds * 1000, 3)
+                    for name, seconds in self.timer.phases.items()
+                },
+            },
+        )
+        return response
+
+
+class TimedListModelMixin(mixins.ListModelMixin):
+    """List objects, timing the serializer with ServerTimingMixin."""
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(
+            queryset if page is None else page, many=True,
+        )
+        data = self.serialize(serializer)
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
+
+
+class TimedRetrieveModelMixin(mixins.RetrieveModelMixin):
+    """Retrieve an object, timing the serializer with ServerTimingMixin."""
+
+    def retrieve(self, request, *args, **kwargs):
+        serializer = self.get_serializer(self.get_object())
+        return Response(self.serialize(serializer))
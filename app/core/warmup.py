@@ -0,0 +1,133 @@
+"""
+Warm-up of the application before the server forks its workers.
+
+uwsgi loads app.wsgi in its master process and forks the workers from
+it. Importing the views, building the URL resolvers and the serializer
+fields there means every worker starts with them, sharing the memory
+copy-on-write, instead of paying for them on its first request.
+"""
+import gc
+import logging
+import time
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connections
+from django.urls import get_resolver
+from django.utils.module_loading import import_module
+
+from rest_framework import serializers
+
+logger = logging.getLogger(__name__)
+
+
+def _import_request_modules():
+    """Import the modules Django loads on the first request."""
+    import_module(settings.SESSION_ENGINE)
+    import_module(settings.MESSAGE_STORAGE.rsplit('.', 1)[0])
+    for alias in connections:
+        import_module(connections[alias].ops.compiler_module)
+
+
+def _view_classes(resolver):
+    for pattern in resolver.url_patterns:
+        if hasattr(pattern, 'url_patterns'):
+            yield from _view_classes(pattern)
+        else:
+            view_class = getattr(pattern.callback, 'cls', None)
+            if view_class is not None:
+                yield view_class
+
+
+def _resolve_urls():
+    """Import the URLconf and build the resolvers of every route."""
+    resolver = get_resolver()
+    resolver.reverse_dict
+    return set(_view_classes(resolver))
+
+
+def _project_serializers():
+    """Return the serializer classes defined by the project's apps."""
+    base_dir = Path(settings.BASE_DIR)
+    names = {
+        config.name for config in apps.get_app_configs()
+        if base_dir in Path(config.path).parents
+    }
+    found = set()
+    pending = [serializers.Serializer]
+    while pending:
+        cls = pending.pop()
+        for subclass in cls.__subclasses__():
+            pending.append(subclass)
+            if subclass.__module__.split('.')[0] in names:
+                found.add(subclass)
+    return found
+
+
+def _build_serializers(view_classes):
+    """Build the fields of every serializer, and warm up the views."""
+    for cls in _project_serializers():
+        try:
+            cls().fields
+        except Exception:
+            logger.warning('could not warm up %s', cls, exc_info=True)
+    for view_class in view_classes:
+        if hasattr(view_class, 'warm_up'):
+            view_class.warm_up()
+
+
+def warm_up():
+    """Load what requests need, returning the seconds of each step."""
+    timings = {}
+
+    start = time.perf_counter()
+    _import_request_modules()
+    timings['modules'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    view_classes = _resolve_urls()
+    timings['urls'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    _build_serializers(view_classes)
+    timings['serializers'] = time.perf_counter() - start
+
+    # Workers must not inherit connections opened on the way.
+    connections.close_all()
+
+    # Objects created so far live as long as the workers, freezing them
+    # keeps the collector from writing to their pages in every worker.
+    start = time.perf_counter()
+    gc.collect()
+    gc.freeze()
+    timings['gc'] = time.perf_counter() - start
+
+    logger.info(
+        'warmed up in %.1fms',
+        sum(timings.values()) * 1000,
+        extra={
+            'phases': {
+                name: round(seconds * 1000, 3)
+                for name, seconds in timings.items()
+            },
+        },
+    )
+    return timings
+
+
+def parse_import_times(output):
+    """Return the import time in seconds of each top level package.
+
+    output is what python -X importtime writes to stderr.
+    """
+    totals = {}
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+        package = fields[2].strip().split('.')[0]
+        totals[package] = totals.get(package, 0) + int(fields[0])
+    return {package: micros / 1e6 for package, micros in totals.items()}
@@ -0,0 +1,131 @@
+"""
+Benchmarks for the recipe API.
+"""
+from decimal import Decimal
+
+from django.db.models import Prefetch
+from django.urls import reverse
+
+from rest_framework.renderers import JSONRenderer
+
+from core.benchmark import benchmark
+from core.middleware import brotli
+from core.renderers import ORJSONRenderer
+from core.models import Recipe, Tag, Ingredient
+from recipe.fast_serializers import FastRecipeListSerializer
+from recipe.serializers import RecipeSerializer
+
+RECIPES_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+INGREDIENTS_URL = reverse('recipe:ingredient-list')
+
+
+def _first_recipe(context):
+    """Return a recipe owned by the benchmark user."""
+    return Recipe.objects.filter(user=context.user).order_by('id').first()
+
+
+def _user_recipes(context):
+    """Return the benchmark user's recipes as the list view orders them."""
+    return Recipe.objects.filter(user=context.user).order_by('-id')
+
+
+@benchmark('recipe-list')
+def recipe_list(context):
+    return lambda: context.client.get(RECIPES_URL)
+
+
+@benchmark('recipe-list-slim')
+def recipe_list_slim(context):
+    return lambda: context.client.get(RECIPES_URL, {'fields': 'id,title'})
+
+
+@benchmark('recipe-list-gzip')
+def recipe_list_gzip(context):
+    return lambda: context.client.get(RECIPES_URL, HTTP_ACCEPT_ENCODING='gzip')
+
+
+# Without brotli the request would only measure an uncompressed list.
+if brotli is not None:
+    @benchmark('recipe-list-brotli')
+    def recipe_list_brotli(context):
+        return lambda: context.client.get(
+            RECIPES_URL, HTTP_ACCEPT_ENCODING='br',
+        )
+
+
+@benchmark('recipe-serialize-model')
+def recipe_serialize_model(context):
+    """Serialize and render the user's recipes with RecipeSerializer."""
+    queryset = _user_recipes(context).prefetch_related(
+        Prefetch('tags', queryset=Tag.objects.order_by('id')),
+        Prefetch('ingredients', queryset=Ingredient.objects.order_by('id')),
+    )
+    renderer = JSONRenderer()
+    return lambda: renderer.render(
+        RecipeSerializer(queryset.all(), many=True).data
+    )
+
+
+@benchmark('recipe-serialize-fast')
+def recipe_serialize_fast(context):
+    """Serialize and render the user's recipes with the fast path."""
+    queryset = _user_recipes(context)
+    renderer = JSONRenderer()
+    return lambda: renderer.render(
+        FastRecipeListSerializer(queryset.all()).data
+    )
+
+
+@benchmark('recipe-render-stdlib')
+def recipe_render_stdlib(context):
+    """Render the user's serialized recipes with the stdlib renderer."""
+    data = FastRecipeListSerializer(_user_recipes(context)).data
+    renderer = JSONRenderer()
+    return lambda: renderer.render(data)
+
+
+@benchmark('recipe-render-orjson')
+def recipe_render_orjson(context):
+    """Render the user's serialized recipes with the orjson renderer."""
+    data = FastRecipeListSerializer(_user_recipes(context)).data
+    renderer = ORJSONRenderer()
+    return lambda: renderer.render(data)
+
+
+@benchmark('recipe-detail')
+def recipe_detail(context):
+    url = reverse('recipe:recipe-detail', args=[_first_recipe(context).id])
+    return lambda: context.client.get(url)
+
+
+@benchmark('recipe-create')
+def recipe_create(context):
+    payload = {
+        'title': 'Benchmark recipe',
+        'time_minutes': 30,
+        'price': Decimal('7.25'),
+        'tags': [{'name': 'Tag 0'}, {'name': 'Benchmark'}],
+        'ingredients': [{'name': 'Ingredient 0'}, {'name': 'Salt'}],
+    }
+    return lambda: context.client.post(RECIPES_URL, payload, format='json')
+
+
+@benchmark('recipe-update')
+def recipe_update(context):
+    url = reverse('recipe:recipe-detail', args=[_first_recipe(context).id])
+    payload = {
+        'title': 'Updated benchmark recipe',
+        'tags': [{'name': 'Tag 1'}],
+    }
+    return lambda: context.client.patch(url, payload, format='json')
+
+
+@benchmark('tag-list-assigned')
+def tag_list_assigned(context):
+    return lambda: context.client.get(TAGS_URL, {'assigned_only': 1})
+
+
+@benchmark('ingredient-list-assigned')
+def ingredient_list_assigned(context):
+    return lambda: context.client.get(INGREDIENTS_URL, {'assigned_only': 1})
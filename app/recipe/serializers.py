@@ -2,12 +2,14 @@
 Serializers for recipe API
 """
 from rest_framework import serializers
+from rest_framework.exceptions import NotFound
 
 from core.models import (
     Recipe,
     Tag,
     Ingredient
 )
+from core.stats import Entry, updating_stats
 
 
 class TagSerializer(serializers.ModelSerializer):
@@ -26,7 +28,32 @@ class IngredientSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'user']
 
 
-class RecipeSerializer(serializers.ModelSerializer):
+class TagCountSerializer(TagSerializer):
+    """Serializer for tags with the number of recipes using them."""
+    recipe_count = serializers.IntegerField(read_only=True)
+
+    class Meta(TagSerializer.Meta):
+        fields = TagSerializer.Meta.fields + ['recipe_count']
+
+
+class IngredientCountSerializer(IngredientSerializer):
+    """Serializer for ingredients with the number of recipes using them."""
+    recipe_count = serializers.IntegerField(read_only=True)
+
+    class Meta(IngredientSerializer.Meta):
+        fields = IngredientSerializer.Meta.fields + ['recipe_count']
+
+
+class SparseFieldsMixin:
+    """Keep only the fields named in the fields keyword argument."""
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class RecipeSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for recipes."""
     tags = TagSerializer(many=True, required=False)
     ingredients = IngredientSerializer(many=True, required=False)
@@ -46,51 +73,100 @@ class RecipeSerializer(serializers.ModelSerializer):
 
     def _get_or_create_tags(self, tags, recipe):
         """Handle getting or creating tags as needed"""
-        auth_user = self.context['request'].user
-        for tag in tags:
-            tag_obj, created = Tag.objects.get_or_create(
-                user=auth_user,
-                **tag,
-            )
-            recipe.tags.add(tag_obj)
+        tags = self._get_or_create(Tag, tags)
+        recipe.tags.add(*tags)
+        return tags
 
     def _get_or_create_ingredients(self, ingredients, recipe):
         """Handle getting or creating ingredients as needed"""
+        ingredients = self._get_or_create(Ingredient, ingredients)
+        recipe.ingredients.add(*ingredients)
+        return ingredients
+
+    def _get_or_create(self, model, items):
+        """Return the user's objects for the given names in bulk."""
         auth_user = self.context['request'].user
-        for ingredient in ingredients:
-            ingredient_obj, created = Ingredient.objects.get_or_create(
-                user=auth_user,
-                **ingredient,
-            )
-            recipe.ingredients.add(ingredient_obj)
+        names = list(dict.fromkeys(item['name'] for item in items))
+        if not names:
+            return []
+        existing = {
+            obj.name: obj
+            for obj in model.objects.filter(user=auth_user, name__in=names)
+        }
+        missing = [
+            model(user=auth_user, name=name)
+            for name in names if name not in existing
+        ]
+        return list(existing.values()) + model.objects.bulk_create(missing)
 
     def create(self, validated_data):
         """Create a recipe."""
         tags = validated_data.pop('tags', [])
         ingredients = validated_data.pop('ingredients', [])
-        recipe = Recipe.objects.create(**validated_data)
-        self._get_or_create_tags(tags=tags, recipe=recipe)
-        self._get_or_create_ingredients(ingredients=ingredients, recipe=recipe)
+        with updating_stats(
+            validated_data['user'].pk, self.context.get('request'),
+        ) as stats:
+            recipe = Recipe.objects.create(**validated_data)
+            tags = self._get_or_create_tags(tags=tags, recipe=recipe)
+            ingredients = self._get_or_create_ingredients(
+                ingredients=ingredients,
+                recipe=recipe
+            )
+            stats.add(Entry(
+                price=recipe.price,
+                time_minutes=recipe.time_minutes,
+                tags=[tag.pk for tag in tags],
+                ingredients=[ingredient.pk for ingredient in ingredients],
+            ))
         return recipe
 
     def update(self, instance, validated_data):
         """Updating a recipe."""
         tags = validated_data.pop('tags', None)
         ingredients = validated_data.pop('ingredients', None)
-        if tags is not None:
-            instance.tags.clear()
-            self._get_or_create_tags(tags=tags, recipe=instance)
-        if ingredients is not None:
-            instance.ingredients.clear()
-            self._get_or_create_ingredients(
-                ingredients=ingredients,
-                recipe=instance
+        with updating_stats(
+            instance.user_id, self.context.get('request'),
+        ) as stats:
+            # Read again under the lock, a concurrent write may have
+            # changed or deleted the recipe since it was fetched.
+            current = (
+                Recipe.objects.select_for_update()
+                .filter(pk=instance.pk)
+                .values('price', 'time_minutes')
+                .first()
             )
-
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
-
-        instance.save()
+            if current is None:
+                raise NotFound()
+            # Tags and ingredients left as they are do not change the
+            # stats.
+            before = Entry(current['price'], current['time_minutes'])
+            after = Entry(current['price'], current['time_minutes'])
+            if tags is not None:
+                before.tags = list(instance.tags.values_list('pk', flat=True))
+                instance.tags.clear()
+                tags = self._get_or_create_tags(tags=tags, recipe=instance)
+                after.tags = [tag.pk for tag in tags]
+            if ingredients is not None:
+                before.ingredients = list(
+                    instance.ingredients.values_list('pk', flat=True)
+                )
+                instance.ingredients.clear()
+                ingredients = self._get_or_create_ingredients(
+                    ingredients=ingredients,
+                    recipe=instance
+                )
+                after.ingredients = [
+                    ingredient.pk for ingredient in ingredients
+                ]
+
+            for attr, value in validated_data.items():
+                setattr(instance, attr, value)
+
+            instance.save()
+            after.price = instance.price
+            after.time_minutes = instance.time_minutes
+            stats.remove(before)
+            stats.add(after)
         return instance
 
 
@@ -111,3 +187,42 @@ class RecipeImageSerializer(serializers.ModelSerializer):
                 'required': 'True'
             }
         }
+
+
+class PriceStatsSerializer(serializers.Serializer):
+    """Serializer for the average and range of recipe prices."""
+    avg = serializers.DecimalField(
+        max_digits=5, decimal_places=2, allow_null=True,
+    )
+    min = serializers.DecimalField(
+        max_digits=5, decimal_places=2, allow_null=True,
+    )
+    max = serializers.DecimalField(
+        max_digits=5, decimal_places=2, allow_null=True,
+    )
+
+
+class TimeStatsSerializer(serializers.Serializer):
+    """Serializer for the average and range of recipe times."""
+    avg = serializers.FloatField(allow_null=True)
+    min = serializers.IntegerField(allow_null=True)
+    max = serializers.IntegerField(allow_null=True)
+
+
+class TimeBucketSerializer(serializers.Serializer):
+    """Serializer for a bucket of the recipe time histogram."""
+    max_minutes = serializers.IntegerField(
+        allow_null=True,
+        help_text='Longest time counted, null for the last bucket.',
+    )
+    count = serializers.IntegerField()
+
+
+class RecipeStatsSerializer(serializers.Serializer):
+    """Serializer for the statistics of the user's recipes."""
+    recipe_count = serializers.IntegerField()
+    price = PriceStatsSerializer()
+    time_minutes = TimeStatsSerializer()
+    time_histogram = TimeBucketSerializer(many=True)
+    top_tags = TagCountSerializer(many=True)
+    top_ingredients = IngredientCountSerializer(many=True)
@@ -0,0 +1,14 @@
+"""
+URL configuration serving the recipe reads from async views, for tests.
+"""
+from django.urls import path, include
+
+from core.async_views import async_read_patterns
+from recipe.urls import router
+
+urlpatterns = [
+    path(
+        'api/recipe/',
+        include((async_read_patterns(router.urls), 'recipe')),
+    ),
+]
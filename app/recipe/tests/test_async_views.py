@@ -0,0 +1,125 @@
+"""
+Tests for serving the recipe reads from async views.
+"""
+from decimal import Decimal
+import asyncio
+
+from asgiref.sync import sync_to_async
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import AsyncClient, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+
+from core.models import (
+    Recipe,
+    Tag,
+    Ingredient,
+)
+
+
+def detail_url(recipe_id):
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+@override_settings(ROOT_URLCONF='recipe.tests.async_urls', DEBUG=True)
+class AsyncReadViewTests(TransactionTestCase):
+    """Test the async recipe read views."""
+
+    def setUp(self):
+        # Pool threads would otherwise keep their connections to the
+        # test database open after the run.
+        self.conn_max_age = connection.settings_dict['CONN_MAX_AGE']
+        connection.settings_dict['CONN_MAX_AGE'] = 0
+        self.user = get_user_model().objects.create_user(
+            email='async@example.com',
+            password='testpass123',
+        )
+        token = Token.objects.create(user=self.user)
+        self.client = AsyncClient()
+        # Django 3.2's AsyncClient takes headers by their plain name.
+        self.auth = {'Authorization': f'Token {token.key}'}
+        self.tag = Tag.objects.create(user=self.user, name='Quick')
+        self.ingredient = Ingredient.objects.create(
+            user=self.user,
+            name='Rice',
+        )
+        self.recipe = Recipe.objects.create(
+            user=self.user,
+            title='Fried rice',
+            time_minutes=15,
+            price=Decimal('4.20'),
+        )
+        self.recipe.tags.add(self.tag)
+        self.recipe.ingredients.add(self.ingredient)
+
+    def tearDown(self):
+        connection.settings_dict['CONN_MAX_AGE'] = self.conn_max_age
+
+    async def test_list_recipes(self):
+        """Test listing recipes through the async view."""
+        res = await self.client.get(
+            reverse('recipe:recipe-list'), **self.auth
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        data = res.json()
+        self.assertEqual(data[0]['title'], 'Fried rice')
+        self.assertEqual(data[0]['price'], '4.20')
+        self.assertEqual(
+            data[0]['tags'],
+            [{'id': self.tag.id, 'name': 'Quick'}],
+        )
+        self.assertEqual(res['X-DB-Queries'], '3')
+        self.assertEqual(res['X-DB-Query-Budget'], '3')
+
+    async def test_retrieve_recipe(self):
+        """Test retrieving a recipe through the async view."""
+        res = await self.client.get(detail_url(self.recipe.id), **self.auth)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json()['ingredients'][0]['name'], 'Rice')
+
+    async def test_list_tags_and_ingredients(self):
+        """Test listing recipe attributes through the async views."""
+        for name in ['tag', 'ingredient']:
+            res = await self.client.get(
+                reverse(f'recipe:{name}-list'), **self.auth
+            )
+
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertEqual(len(res.json()), 1)
+
+    async def test_concurrent_reads(self):
+        """Test concurrent reads are served from the thread pool."""
+        responses = await asyncio.gather(*[
+            self.client.get(reverse('recipe:recipe-list'), **self.auth)
+            for _ in range(10)
+        ])
+
+        self.assertEqual(
+            [res.status_code for res in responses],
+            [status.HTTP_200_OK] * 10,
+        )
+
+    async def test_requires_authentication(self):
+        """Test the async views still authenticate."""
+        res = await AsyncClient().get(reverse('recipe:recipe-list'))
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_write_goes_to_sync_view(self):
+        """Test non-read methods are served by the sync view."""
+        res = await self.client.patch(
+            detail_url(self.recipe.id),
+            {'title': 'Egg fried rice'},
+            content_type='application/json',
+            **self.auth,
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        recipe = await sync_to_async(Recipe.objects.get)(id=self.recipe.id)
+        self.assertEqual(recipe.title, 'Egg fried rice')
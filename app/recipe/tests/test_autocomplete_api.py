@@ -0,0 +1,102 @@
+"""
+Tests for autocompleting tag and ingredient names.
+"""
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Ingredient, Tag
+from recipe import views
+
+TAGS_AUTOCOMPLETE_URL = reverse('recipe:tag-autocomplete')
+INGREDIENTS_AUTOCOMPLETE_URL = reverse('recipe:ingredient-autocomplete')
+
+
+class AutocompleteAPITests(TestCase):
+    """Test the autocomplete actions."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        views.autocomplete_cache.clear()
+
+    def tearDown(self):
+        views.autocomplete_cache.clear()
+
+    def test_auth_required(self):
+        """Test autocomplete requires authentication."""
+        res = APIClient().get(TAGS_AUTOCOMPLETE_URL, {'q': 've'})
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_prefix_matches_first(self):
+        """Test prefix matches ignore case, closest first."""
+        for name in ['Tomato', 'Tomatillo', 'Potato', 'Basil']:
+            Ingredient.objects.create(user=self.user, name=name)
+
+        res = self.client.get(INGREDIENTS_AUTOCOMPLETE_URL, {'q': 'tom'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item['name'] for item in res.data],
+            ['Tomato', 'Tomatillo'],
+        )
+
+    def test_fuzzy_matches(self):
+        """Test misspelled names find close matches."""
+        tomato = Ingredient.objects.create(user=self.user, name='Tomato')
+        Ingredient.objects.create(user=self.user, name='Basil')
+
+        res = self.client.get(INGREDIENTS_AUTOCOMPLETE_URL, {'q': 'tomatoe'})
+
+        self.assertEqual(res.data, [{'id': tomato.id, 'name': 'Tomato'}])
+
+    def test_limited_to_user(self):
+        """Test only the user's own names are suggested."""
+        other = get_user_model().objects.create_user(
+            email='other@example.com',
+            password='testpass123',
+        )
+        Tag.objects.create(user=other, name='Vegan')
+        tag = Tag.objects.create(user=self.user, name='Vegetarian')
+
+        res = self.client.get(TAGS_AUTOCOMPLETE_URL, {'q': 'veg'})
+
+        self.assertEqual(res.data, [{'id': tag.id, 'name': 'Vegetarian'}])
+
+    def test_limit(self):
+        """Test the number of matches is limited."""
+        for i in range(5):
+            Tag.objects.create(user=self.user, name=f'Quick {i}')
+
+        res = self.client.get(TAGS_AUTOCOMPLETE_URL, {'q': 'qu', 'limit': 3})
+
+        self.assertEqual(
+            [item['name'] for item in res.data],
+            ['Quick 0', 'Quick 1', 'Quick 2'],
+        )
+
+    def test_empty_query(self):
+        """Test an empty query returns no matches."""
+        Tag.objects.create(user=self.user, name='Dinner')
+
+        res = self.client.get(TAGS_AUTOCOMPLETE_URL, {'q': ' '})
+
+        self.assertEqual(res.data, [])
+
+    def test_hot_prefixes_cached(self):
+        """Test repeated prefixes are answered from the cache."""
+        Tag.objects.create(user=self.user, name='Dinner')
+        self.client.get(TAGS_AUTOCOMPLETE_URL, {'q': 'din'})
+
+        with self.assertNumQueries(0):
+            res = self.client.get(TAGS_AUTOCOMPLETE_URL, {'q': 'DIN'})
+
+        self.assertEqual([item['name'] for item in res.data], ['Dinner'])
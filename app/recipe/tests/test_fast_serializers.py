@@ -0,0 +1,93 @@
+"""
+Tests for the fast recipe list serializer.
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db.models import Prefetch
+from django.test import TestCase
+
+from rest_framework.renderers import JSONRenderer
+
+from core.models import (
+    Recipe,
+    Tag,
+    Ingredient,
+)
+
+from recipe.fast_serializers import FastRecipeListSerializer
+from recipe.serializers import RecipeSerializer
+
+
+class FastRecipeListSerializerTests(TestCase):
+    """Test the fast serializer matches RecipeSerializer."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='fast@example.com',
+            password='testpass123',
+        )
+        tags = [
+            Tag.objects.create(user=self.user, name=name)
+            for name in ['Vegan', 'Dessert', 'Café   line']
+        ]
+        ingredients = [
+            Ingredient.objects.create(user=self.user, name=name)
+            for name in ['Salt', 'Kale']
+        ]
+        prices = ['0.50', '5.00', '999.99', '12.30']
+        for i, price in enumerate(prices):
+            recipe = Recipe.objects.create(
+                user=self.user,
+                title=f'Recipe "{i}"',
+                time_minutes=i,
+                price=Decimal(price),
+                link='' if i % 2 else f'https://example.com/{i}',
+            )
+            recipe.tags.add(*reversed(tags[:i]))
+            recipe.ingredients.add(*ingredients[:i])
+
+    def _model_output(self, fields=None):
+        recipes = Recipe.objects.order_by('-id').prefetch_related(
+            Prefetch('tags', queryset=Tag.objects.order_by('id')),
+            Prefetch(
+                'ingredients',
+                queryset=Ingredient.objects.order_by('id'),
+            ),
+        )
+        serializer = RecipeSerializer(recipes, many=True, fields=fields)
+        return JSONRenderer().render(serializer.data)
+
+    def _fast_output(self, fields=None):
+        recipes = Recipe.objects.order_by('-id')
+        serializer = FastRecipeListSerializer(recipes, fields=fields)
+        return JSONRenderer().render(serializer.data)
+
+    def test_output_matches_model_serializer(self):
+        """Test the rendered output is byte for byte the same."""
+        self.assertEqual(self._fast_output(), self._model_output())
+
+    def test_sparse_fields_match_model_serializer(self):
+        """Test selected fields render the same in both serializers."""
+        for fields in [['id', 'price'], ['title', 'tags'], ['ingredients']]:
+            with self.subTest(fields=fields):
+                self.assertEqual(
+                    self._fast_output(fields),
+                    self._model_output(fields),
+                )
+
+    def test_nested_items_in_one_query(self):
+        """Test tags and ingredients are fetched with a single query."""
+        recipes = Recipe.objects.order_by('-id')
+
+        with self.assertNumQueries(2):
+            FastRecipeListSerializer(recipes).data
+
+    def test_empty_queryset(self):
+        """Test no nested query is run without recipes."""
+        recipes = Recipe.objects.filter(title='Missing')
+
+        with self.assertNumQueries(1):
+            data = FastRecipeListSerializer(recipes).data
+
+        self.assertEqual(data, [])
@@ -136,3 +136,27 @@ class PrivateIngredientAPITests(TestCase):
 
         res = self.client.get(INGREDIENTS_URL, {'assigned_only': 1})
         self.assertEqual(len(res.data), 1)
+
+    def test_ingredients_with_counts(self):
+        """Test assigned ingredients are listed with their recipe counts."""
+        eggs = Ingredient.objects.create(user=self.user, name='Eggs')
+        Ingredient.objects.create(user=self.user, name='Lentils')
+        for title in ['Omelette', 'Eggs Benedict']:
+            recipe = Recipe.objects.create(
+                user=self.user,
+                title=title,
+                time_minutes=10,
+                price=Decimal('4.00'),
+            )
+            recipe.ingredients.add(eggs)
+
+        res = self.client.get(
+            INGREDIENTS_URL,
+            {'assigned_only': 1, 'with_counts': 1},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data,
+            [{'id': eggs.id, 'name': 'Eggs', 'recipe_count': 2}],
+        )
@@ -0,0 +1,110 @@
+"""
+Tests for paginating the recipe, tag and ingredient lists.
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag
+
+RECIPES_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+
+
+class PaginationAPITests(TestCase):
+    """Test the opt-in pagination of lists."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.tag = Tag.objects.create(user=self.user, name='Vegan')
+        for i in range(5):
+            recipe = Recipe.objects.create(
+                user=self.user,
+                title=f'Recipe {i}',
+                time_minutes=5,
+                price=Decimal('1.00'),
+            )
+            recipe.tags.add(self.tag)
+
+    def test_unpaginated_by_default(self):
+        """Test lists are returned whole without page_size."""
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data), 5)
+
+    def test_exact_count(self):
+        """Test small lists are counted exactly."""
+        res = self.client.get(RECIPES_URL, {'page_size': 2, 'page': 2})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['count'], 5)
+        self.assertTrue(res.data['count_exact'])
+        self.assertEqual(
+            [recipe['title'] for recipe in res.data['results']],
+            ['Recipe 2', 'Recipe 1'],
+        )
+        self.assertIn('page=3', res.data['next'])
+        self.assertIn('page_size=2', res.data['previous'])
+
+    @override_settings(DEBUG=True)
+    def test_count_within_query_budget(self):
+        """Test counting the rows is allowed for in the query budget."""
+        res = self.client.get(RECIPES_URL, {'page_size': 2})
+
+        self.assertEqual(res['X-DB-Query-Budget'], '4')
+        self.assertEqual(res['X-DB-Queries'], '3')
+
+    @override_settings(APPROXIMATE_COUNT_THRESHOLD=2)
+    def test_estimated_count(self):
+        """Test lists over the threshold get an estimated count."""
+        # Filtering by tags estimates the rows of the distinct join.
+        res = self.client.get(
+            RECIPES_URL, {'page_size': 2, 'page': 3, 'tags': self.tag.id},
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        res = self.client.get(RECIPES_URL, {'page_size': 2, 'page': 3})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertFalse(res.data['count_exact'])
+        self.assertGreaterEqual(res.data['count'], 3)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertIsNone(res.data['next'])
+
+    @override_settings(APPROXIMATE_COUNT_THRESHOLD=2)
+    def test_estimated_count_serves_pages_past_estimate(self):
+        """Test pages are served beyond an estimate that is too low."""
+        res = self.client.get(RECIPES_URL, {'page_size': 1, 'page': 5})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['results'][0]['title'], 'Recipe 0')
+
+        res = self.client.get(RECIPES_URL, {'page_size': 1, 'page': 6})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['results'], [])
+
+    def test_invalid_page(self):
+        """Test pages past the exact count are not found."""
+        res = self.client.get(RECIPES_URL, {'page_size': 2, 'page': 4})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_tags_paginated(self):
+        """Test tag lists with counts are paginated."""
+        res = self.client.get(TAGS_URL, {'page_size': 1, 'with_counts': 1})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['count'], 1)
+        self.assertEqual(res.data['results'][0]['recipe_count'], 5)
@@ -0,0 +1,227 @@
+"""
+Tests for the query budgets of the recipe and user APIs.
+"""
+from decimal import Decimal
+import tempfile
+
+from PIL import Image
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse, get_resolver
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.models import (
+    Recipe,
+    Tag,
+    Ingredient,
+)
+from core.queries import get_query_budget
+from core.stats import ensure_stats
+from core.testing import QueryBudgetTestMixin
+
+RECIPES_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+INGREDIENTS_URL = reverse('recipe:ingredient-list')
+
+
+def detail_url(name, obj_id):
+    """Return a detail url for a recipe API object."""
+    return reverse(f'recipe:{name}-detail', args=[obj_id])
+
+
+class QueryBudgetDeclarationTests(TestCase):
+    """Test every API endpoint declares a query budget."""
+
+    def test_endpoints_declare_budgets(self):
+        """Test each method of each API route has a budget."""
+        resolver = get_resolver()
+        for namespace in ['recipe', 'user']:
+            patterns = resolver.namespace_dict[namespace][1].url_patterns
+            for pattern in _flatten(patterns):
+                view = pattern.callback
+                if not hasattr(view, 'cls') or view.cls.__name__ in (
+                    'APIRootView',
+                ):
+                    continue
+                methods = getattr(view, 'actions', None) or {
+                    method: method
+                    for method in view.cls.http_method_names
+                    if hasattr(view.cls, method) and method not in (
+                        'head', 'options',
+                    )
+                }
+                for method in methods:
+                    with self.subTest(view=view.cls.__name__, method=method):
+                        self.assertIsNotNone(
+                            get_query_budget(view, method)
+                        )
+
+
+def _flatten(patterns):
+    """Yield the url patterns nested in resolvers."""
+    for pattern in patterns:
+        if hasattr(pattern, 'url_patterns'):
+            yield from _flatten(pattern.url_patterns)
+        else:
+            yield pattern
+
+
+class RecipeQueryBudgetTests(QueryBudgetTestMixin, TestCase):
+    """Test the recipe APIs stay within their query budgets."""
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='budget@example.com',
+            password='testpass123',
+        )
+        token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+        self.tags = [
+            Tag.objects.create(user=self.user, name=f'Tag {i}')
+            for i in range(3)
+        ]
+        self.ingredients = [
+            Ingredient.objects.create(user=self.user, name=f'Ing {i}')
+            for i in range(3)
+        ]
+        self.recipes = []
+        for i in range(5):
+            recipe = Recipe.objects.create(
+                user=self.user,
+                title=f'Recipe {i}',
+                time_minutes=10,
+                price=Decimal('4.50'),
+            )
+            recipe.tags.add(*self.tags)
+            recipe.ingredients.add(*self.ingredients)
+            self.recipes.append(recipe)
+        # Counted once per user, the budgets are for the writes after.
+        ensure_stats(self.user.pk)
+
+        self.payload = {
+            'title': 'Budget recipe',
+            'time_minutes': 20,
+            'price': Decimal('3.20'),
+            'tags': [{'name': 'Tag 0'}, {'name': 'New tag'}],
+            'ingredients': [{'name': 'Ing 1'}, {'name': 'New ingredient'}],
+        }
+
+    def test_list_recipes(self):
+        """Test listing recipes does not query per recipe."""
+        with self.assertWithinQueryBudget('get', RECIPES_URL) as stats:
+            res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(stats.duplicates, 0)
+
+    def test_filter_recipes(self):
+        """Test filtering recipes stays within the list budget."""
+        params = {'tags': f'{self.tags[0].id},{self.tags[1].id}'}
+
+        with self.assertWithinQueryBudget('get', RECIPES_URL):
+            res = self.client.get(RECIPES_URL, params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_retrieve_recipe(self):
+        """Test retrieving a recipe."""
+        url = detail_url('recipe', self.recipes[0].id)
+
+        with self.assertWithinQueryBudget('get', url):
+            res = self.client.get(url)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_create_recipe(self):
+        """Test creating a recipe does not query per tag."""
+        with self.assertWithinQueryBudget('post', RECIPES_URL) as stats:
+            res = self.client.post(RECIPES_URL, self.payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(stats.duplicates, 0)
+
+    def test_update_recipe(self):
+        """Test fully updating a recipe."""
+        url = detail_url('recipe', self.recipes[0].id)
+
+        with self.assertWithinQueryBudget('put', url):
+            res = self.client.put(url, self.payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_partial_update_recipe(self):
+        """Test partially updating a recipe."""
+        url = detail_url('recipe', self.recipes[0].id)
+        payload = {'tags': self.payload['tags']}
+
+        with self.assertWithinQueryBudget('patch', url):
+            res = self.client.patch(url, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_delete_recipe(self):
+        """Test deleting a recipe."""
+        url = detail_url('recipe', self.recipes[0].id)
+
+        with self.assertWithinQueryBudget('delete', url):
+            res = self.client.delete(url)
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+
+    def test_upload_image(self):
+        """Test uploading an image."""
+        recipe = self.recipes[0]
+        url = reverse('recipe:recipe-upload-image', args=[recipe.id])
+
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as image_file:
+            Image.new('RGB', (10, 10)).save(image_file, format='JPEG')
+            image_file.seek(0)
+            with self.assertWithinQueryBudget('post', url):
+                res = self.client.post(
+                    url,
+                    {'image': image_file},
+                    format='multipart',
+                )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        recipe.refresh_from_db()
+        recipe.image.delete()
+
+    def test_list_tags_and_ingredients(self):
+        """Test listing recipe attributes, assigned or not."""
+        for url in [TAGS_URL, INGREDIENTS_URL]:
+            for params in [{}, {'assigned_only': 1}]:
+                with self.assertWithinQueryBudget('get', url):
+                    res = self.client.get(url, params)
+
+                self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_update_tags_and_ingredients(self):
+        """Test updating recipe attributes."""
+        urls = [
+            detail_url('tag', self.tags[0].id),
+            detail_url('ingredient', self.ingredients[0].id),
+        ]
+        for url in urls:
+            for method in ['put', 'patch']:
+                with self.assertWithinQueryBudget(method, url):
+                    res = getattr(self.client, method)(url, {'name': 'New'})
+
+                self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_delete_tags_and_ingredients(self):
+        """Test deleting recipe attributes."""
+        urls = [
+            detail_url('tag', self.tags[0].id),
+            detail_url('ingredient', self.ingredients[0].id),
+        ]
+        for url in urls:
+            with self.assertWithinQueryBudget('delete', url):
+                res = self.client.delete(url)
+
+            self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
@@ -5,6 +5,7 @@ from decimal import Decimal
 import tempfile
 import os
 
+import msgpack
 from PIL import Image
 
 from django.contrib.auth import get_user_model
@@ -504,3 +505,104 @@ class ImageUploadTestsAPI(TestCase):
         payload = {'image': 'yup im an image'}
         res = self.client.post(url, payload, format='multipart')
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class SparseFieldsAPITests(TestCase):
+    """Test selecting recipe fields with fields and exclude."""
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(
+            email='sparse@example.com',
+            password='testpass123',
+        )
+        self.client.force_authenticate(self.user)
+        self.recipe = create_recipe(user=self.user)
+        self.recipe.tags.add(Tag.objects.create(user=self.user, name='Tag'))
+
+    def test_list_selected_fields(self):
+        """Test listing only the requested fields skips related queries."""
+        with self.assertNumQueries(1):
+            res = self.client.get(RECIPES_URL, {'fields': 'id,title'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data,
+            [{'id': self.recipe.id, 'title': self.recipe.title}],
+        )
+
+    def test_list_excluded_fields(self):
+        """Test excluding fields from the list."""
+        with self.assertNumQueries(2):
+            res = self.client.get(RECIPES_URL, {'exclude': 'ingredients'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            list(res.data[0]),
+            ['id', 'title', 'time_minutes', 'price', 'link', 'tags'],
+        )
+        self.assertEqual(res.data[0]['tags'][0]['name'], 'Tag')
+
+    def test_detail_selected_fields(self):
+        """Test retrieving only some fields of a recipe."""
+        url = detail_url(self.recipe.id)
+
+        res = self.client.get(url, {'fields': 'title, description'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {
+            'title': self.recipe.title,
+            'description': self.recipe.description,
+        })
+
+    def test_unknown_field_error(self):
+        """Test requesting an unknown field returns an error."""
+        res = self.client.get(RECIPES_URL, {'fields': 'id,description'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('description', res.data['fields'])
+
+
+class MessagePackAPITests(TestCase):
+    """Test negotiating MessagePack with the recipe API."""
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(
+            email='msgpack@example.com',
+            password='testpass123',
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_list_recipes(self):
+        """Test listing recipes as MessagePack."""
+        recipe = create_recipe(user=self.user, price=Decimal('7.25'))
+
+        res = self.client.get(RECIPES_URL, HTTP_ACCEPT='application/msgpack')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'application/msgpack')
+        data = msgpack.unpackb(res.content)
+        self.assertEqual(data[0]['id'], recipe.id)
+        self.assertEqual(data[0]['price'], '7.25')
+
+    def test_create_recipe(self):
+        """Test creating a recipe from a MessagePack body."""
+        payload = {
+            'title': 'Packed recipe',
+            'time_minutes': 10,
+            'price': '2.50',
+            'tags': [{'name': 'Binary'}],
+        }
+
+        res = self.client.post(
+            RECIPES_URL,
+            msgpack.packb(payload),
+            content_type='application/msgpack',
+            HTTP_ACCEPT='application/msgpack',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        data = msgpack.unpackb(res.content)
+        recipe = Recipe.objects.get(id=data['id'])
+        self.assertEqual(recipe.price, Decimal('2.50'))
+        self.assertEqual(data['tags'][0]['name'], 'Binary')
+        self.assertIsNone(data['image'])
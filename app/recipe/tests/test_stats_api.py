@@ -0,0 +1,211 @@
+"""
+Tests for the recipe stats API.
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.exceptions import NotFound
+from rest_framework.test import APIClient, APIRequestFactory
+
+from core.models import Recipe, RecipeStats, Tag
+from core.stats import compute_stats
+from recipe.serializers import RecipeSerializer
+from recipe.views import RecipeViewSet
+
+RECIPES_URL = reverse('recipe:recipe-list')
+STATS_URL = reverse('recipe:recipe-stats')
+
+
+def detail_url(name, obj_id):
+    return reverse(f'recipe:{name}-detail', args=[obj_id])
+
+
+class RecipeStatsAPITests(TestCase):
+    """Test the stats follow the writes through the API."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create(self, **params):
+        payload = {
+            'title': 'Recipe',
+            'time_minutes': 10,
+            'price': Decimal('5.00'),
+        }
+        payload.update(params)
+        res = self.client.post(RECIPES_URL, payload, format='json')
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        return res.data['id']
+
+    def assertCounted(self):
+        """Assert the stored stats match counting the recipes again."""
+        stored = RecipeStats.objects.get(user=self.user)
+        counted = compute_stats(self.user.pk)
+        for field in ['recipe_count', 'price_total', 'price_min',
+                      'price_max', 'time_total', 'time_min', 'time_max',
+                      'time_histogram', 'tag_counts', 'ingredient_counts']:
+            self.assertEqual(
+                getattr(stored, field), getattr(counted, field), field,
+            )
+
+    def test_stats_follow_writes(self):
+        """Test creating, updating and deleting recipes updates the stats."""
+        first = self.create(
+            price=Decimal('2.00'),
+            tags=[{'name': 'Vegan'}, {'name': 'Quick'}],
+            ingredients=[{'name': 'Salt'}],
+        )
+        second = self.create(
+            time_minutes=70,
+            price=Decimal('9.99'),
+            tags=[{'name': 'Vegan'}],
+        )
+        self.assertCounted()
+
+        res = self.client.patch(
+            detail_url('recipe', second),
+            {'price': Decimal('1.50'), 'tags': [{'name': 'Quick'}]},
+            format='json',
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertCounted()
+
+        res = self.client.put(
+            detail_url('recipe', first),
+            {'title': 'Soup', 'time_minutes': 200, 'price': Decimal('4.00')},
+            format='json',
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertCounted()
+
+        res = self.client.delete(detail_url('recipe', second))
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertCounted()
+
+    def test_racing_deletes(self):
+        """Test a recipe deleted by two requests is subtracted once."""
+        self.create()
+        recipe_id = self.create(price=Decimal('2.00'))
+        # Fetched by the second request before the first deleted it.
+        stale = Recipe.objects.get(pk=recipe_id)
+
+        res = self.client.delete(detail_url('recipe', recipe_id))
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        view = RecipeViewSet(request=APIRequestFactory().delete('/'))
+        # The transaction of the request, rolled back by the error.
+        with self.assertRaises(NotFound), transaction.atomic():
+            view.perform_destroy(stale)
+
+        self.assertEqual(
+            RecipeStats.objects.get(user=self.user).recipe_count, 1,
+        )
+        self.assertCounted()
+
+    def test_racing_updates(self):
+        """Test an update subtracts the values committed before it."""
+        recipe_id = self.create(price=Decimal('2.00'), time_minutes=5)
+        self.create(price=Decimal('4.00'), time_minutes=50)
+        stale = Recipe.objects.get(pk=recipe_id)
+
+        res = self.client.patch(
+            detail_url('recipe', recipe_id),
+            {'price': Decimal('3.00'), 'time_minutes': 15},
+            format='json',
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        serializer = RecipeSerializer(
+            stale,
+            data={'price': Decimal('5.00')},
+            partial=True,
+            context={'request': None},
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+
+        self.assertCounted()
+
+    def test_deleting_tag_forgets_it(self):
+        """Test a deleted tag is no longer counted."""
+        self.create(tags=[{'name': 'Vegan'}])
+        tag = Tag.objects.get(user=self.user)
+
+        res = self.client.delete(detail_url('tag', tag.id))
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertCounted()
+
+    def test_get_stats(self):
+        """Test the stats endpoint summarizes the user's recipes."""
+        self.create(
+            time_minutes=5,
+            price=Decimal('1.00'),
+            tags=[{'name': 'Vegan'}],
+            ingredients=[{'name': 'Salt'}],
+        )
+        self.create(time_minutes=45, price=Decimal('3.00'))
+        other = get_user_model().objects.create_user(
+            email='other@example.com',
+            password='testpass123',
+        )
+        Recipe.objects.create(
+            user=other, title='Other', time_minutes=1, price=Decimal('0.10'),
+        )
+
+        res = self.client.get(STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['recipe_count'], 2)
+        self.assertEqual(
+            res.data['price'], {'avg': '2.00', 'min': '1.00', 'max': '3.00'},
+        )
+        self.assertEqual(
+            res.data['time_minutes'], {'avg': 25.0, 'min': 5, 'max': 45},
+        )
+        self.assertEqual(
+            [bucket['count'] for bucket in res.data['time_histogram']],
+            [1, 0, 0, 1, 0, 0],
+        )
+        self.assertEqual(res.data['top_tags'][0]['name'], 'Vegan')
+        self.assertEqual(res.data['top_ingredients'][0]['recipe_count'], 1)
+
+    @override_settings(DEBUG=True)
+    def test_stats_read_from_summary(self):
+        """Test the stats are read from the summary, not aggregated."""
+        self.create(tags=[{'name': 'Vegan'}], ingredients=[{'name': 'Salt'}])
+
+        res = self.client.get(STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['X-DB-Queries'], '3')
+
+    @override_settings(DEBUG=True)
+    def test_stats_counted_once(self):
+        """Test users without stats have them counted on first read."""
+        Recipe.objects.create(
+            user=self.user, title='Old', time_minutes=5, price=Decimal('2'),
+        )
+
+        res = self.client.get(STATS_URL, {'top': 0})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['recipe_count'], 1)
+        self.assertLessEqual(
+            int(res['X-DB-Queries']), int(res['X-DB-Query-Budget']),
+        )
+        self.assertTrue(RecipeStats.objects.filter(user=self.user).exists())
+
+    def test_invalid_top(self):
+        """Test top must be a number."""
+        res = self.client.get(STATS_URL, {'top': 'many'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -139,3 +139,40 @@ class PrivateTagsAPITests(TestCase):
         res = self.client.get(TAGS_URL, {'assigned_only': 1})
 
         self.assertEqual(len(res.data), 1)
+
+    def test_tags_with_counts_sorted_by_popularity(self):
+        """Test listing tags with recipe counts, most used first."""
+        breakfast = Tag.objects.create(user=self.user, name='Breakfast')
+        dinner = Tag.objects.create(user=self.user, name='Dinner')
+        Tag.objects.create(user=self.user, name='Unused')
+        for title in ['Pancakes', 'Porridge']:
+            recipe = Recipe.objects.create(
+                title=title,
+                time_minutes=5,
+                price=Decimal('3.00'),
+                user=self.user,
+            )
+            recipe.tags.add(breakfast)
+        recipe.tags.add(dinner)
+
+        res = self.client.get(TAGS_URL, {'with_counts': 1, 'sort': 'popular'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(tag['name'], tag['recipe_count']) for tag in res.data],
+            [('Breakfast', 2), ('Dinner', 1), ('Unused', 0)],
+        )
+
+    def test_unknown_sort_rejected(self):
+        """Test an unknown ordering returns a bad request."""
+        res = self.client.get(TAGS_URL, {'sort': 'newest'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_invalid_flags_rejected(self):
+        """Test flags other than 0 or 1 return a bad request."""
+        for params in [{'with_counts': 'true'}, {'assigned_only': 'yes'}]:
+            res = self.client.get(TAGS_URL, params)
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn(next(iter(params)), res.data)
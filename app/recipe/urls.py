@@ -1,10 +1,12 @@
 """
 URL mappings for the recipe app.
 """
+from django.conf import settings
 from django.urls import path, include
 
 from rest_framework.routers import DefaultRouter
 
+from core.async_views import async_read_patterns
 from recipe import views
 
 router = DefaultRouter()
@@ -19,3 +21,9 @@ app_name = 'recipe'
 urlpatterns = [
     path('', include(router.urls))
 ]
+
+if settings.ASYNC_READ_VIEWS:
+    # Serve the list and detail reads from async views under ASGI.
+    urlpatterns = [
+        path('', include(async_read_patterns(router.urls)))
+    ]
@@ -1,6 +1,21 @@
 """
 Views for the recipe API.
 """
+import time
+
+from django.conf import settings
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db.models import (
+    BooleanField,
+    Count,
+    Exists,
+    ExpressionWrapper,
+    OuterRef,
+    Prefetch,
+    Q,
+)
+from django.db.models.functions import Upper
+
 from drf_spectacular.utils import (
     extend_schema_view,
     extend_schema,
@@ -14,16 +29,57 @@ from rest_framework import (
     status,
 )
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.response import Response
 from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
 
+from core import metrics
+from core.lru import LRUCache
 from core.models import (
     Recipe,
+    RecipeStats,
     Tag,
     Ingredient,
 )
+from core.pagination import EstimatedCountPagination
+from core.queries import raise_query_budget
+from core.replicas import ReplicaReadMixin, read_from
+from core.stats import (
+    ensure_stats,
+    recipe_entry,
+    summarize,
+    updating_stats,
+)
+from core.timing import (
+    ServerTimingMixin,
+    TimedListModelMixin,
+    TimedRetrieveModelMixin,
+)
 from recipe import serializers
+from recipe.fast_serializers import FastRecipeListSerializer, compile_fields
+
+
+AUTOCOMPLETE_MAX_LIMIT = 50
+STATS_MAX_TOP = 50
+
+autocomplete_cache = LRUCache(
+    maxsize=settings.AUTOCOMPLETE_CACHE_SIZE,
+    ttl=settings.AUTOCOMPLETE_CACHE_SECONDS,
+)
+
+SPARSE_FIELDS_PARAMETERS = [
+    OpenApiParameter(
+        'fields',
+        OpenApiTypes.STR,
+        description='Comma separated list of fields to return'
+    ),
+    OpenApiParameter(
+        'exclude',
+        OpenApiTypes.STR,
+        description='Comma separated list of fields to leave out'
+    ),
+]
 
 
 @extend_schema_view(
@@ -39,20 +95,46 @@ from recipe import serializers
                 OpenApiTypes.STR,
                 description='Comma separated list of IDs to filter'
             )
-        ]
-    )
+        ] + SPARSE_FIELDS_PARAMETERS
+    ),
+    retrieve=extend_schema(parameters=SPARSE_FIELDS_PARAMETERS),
 )
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(
+    ReplicaReadMixin,
+    ServerTimingMixin,
+    TimedRetrieveModelMixin,
+    viewsets.ModelViewSet,
+):
     """View for manage recipe APIs."""
     serializer_class = serializers.RecipeDetailSerializer
     queryset = Recipe.objects.all()
     authentication_classes = [TokenAuthentication]
     permission_classes = [IsAuthenticated]
+    pagination_class = EstimatedCountPagination
+    query_budget = {
+        'list': 3,
+        'retrieve': 4,
+        'create': 12,
+        'update': 19,
+        'partial_update': 19,
+        'destroy': 11,
+        'upload_image': 3,
+        'stats': 4,
+    }
+
+    @classmethod
+    def warm_up(cls):
+        """Compile the list serializer for the default fields."""
+        compile_fields(tuple(serializers.RecipeSerializer.Meta.fields))
 
     def _params_to_ints(self, qs):
         """Convert a list of string to integers"""
         return [int(str_id) for str_id in qs.split(',')]
 
+    def _params_to_names(self, qs):
+        """Convert a comma separated string to a list of names"""
+        return [name.strip() for name in (qs or '').split(',') if name.strip()]
+
     # override query set method
     def get_queryset(self):
         """Retrieve recipes for authenticated user."""
@@ -66,7 +148,54 @@ class RecipeViewSet(viewsets.ModelViewSet):
         if ingredients:
             ingredient_ids = self._params_to_ints(ingredients)
             queryset = queryset.filter(ingredients__id__in=ingredient_ids)
-        return queryset.order_by('-id').distinct()
+        queryset = queryset.order_by('-id').distinct()
+        if self.action != 'retrieve':
+            return queryset
+
+        fields = self.get_sparse_fields()
+        related = [
+            Prefetch(name, queryset=model.objects.order_by('id'))
+            for name, model in (('tags', Tag), ('ingredients', Ingredient))
+            if fields is None or name in fields
+        ]
+        if fields is not None:
+            columns = [
+                name for name in fields
+                if name not in ('tags', 'ingredients')
+            ]
+            queryset = queryset.only('id', *columns)
+        return queryset.prefetch_related(*related)
+
+    def get_sparse_fields(self):
+        """Return the fields selected with fields/exclude, if any."""
+        if hasattr(self, '_sparse_fields'):
+            return self._sparse_fields
+
+        self._sparse_fields = None
+        params = self.request.query_params
+        if self.action in ('list', 'retrieve') and (
+            params.get('fields') or params.get('exclude')
+        ):
+            available = self.get_serializer_class().Meta.fields
+            fields = self._params_to_names(params.get('fields')) or available
+            exclude = self._params_to_names(params.get('exclude'))
+            unknown = set(fields + exclude) - set(available)
+            if unknown:
+                raise ValidationError({
+                    'fields': f'Unknown fields: {", ".join(sorted(unknown))}'
+                })
+            self._sparse_fields = [
+                name for name in available
+                if name in fields and name not in exclude
+            ]
+        return self._sparse_fields
+
+    def get_serializer(self, *args, **kwargs):
+        """Return a serializer limited to the requested fields."""
+        fields = self.get_sparse_fields()
+        if fields is not None:
+            kwargs['fields'] = fields
+        return super().get_serializer(*args, **kwargs)
 
     def get_serializer_class(self):
         """Return the serializer class for request."""
@@ -74,20 +203,89 @@ class RecipeViewSet(viewsets.ModelViewSet):
             return serializers.RecipeSerializer
         elif self.action == 'upload_image':
             return serializers.RecipeImageSerializer
+        elif self.action == 'stats':
+            return serializers.RecipeStatsSerializer
         return self.serializer_class
 
+    def list(self, request, *args, **kwargs):
+        """List recipes with the read-only fast serializer."""
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        serializer = FastRecipeListSerializer(
+            queryset if page is None else page,
+            fields=self.get_sparse_fields(),
+        )
+        data = self.serialize(serializer)
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
+
     def perform_create(self, serializer):
         """create a new recipe."""
         serializer.save(user=self.request.user)
 
+    def perform_destroy(self, instance):
+        """Delete a recipe and stop counting it in the stats."""
+        with updating_stats(instance.user_id, self.request) as stats:
+            # Read again under the lock, so a recipe deleted by a
+            # concurrent request is not subtracted twice.
+            recipe = (
+                Recipe.objects.select_for_update()
+                .filter(pk=instance.pk)
+                .first()
+            )
+            if recipe is None:
+                raise NotFound()
+            entry = recipe_entry(recipe)
+            recipe.delete()
+            stats.remove(entry)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                'top',
+                OpenApiTypes.INT,
+                description='Number of the most used tags and ingredients, '
+                            f'{STATS_MAX_TOP} at most.'
+            ),
+        ],
+    )
+    @action(methods=['GET'], detail=False)
+    def stats(self, request):
+        """Summarize the user's recipes from totals kept on writes."""
+        try:
+            top = int(request.query_params.get('top', 5))
+        except ValueError:
+            raise ValidationError({'top': 'A number is required.'})
+        top = max(0, min(top, STATS_MAX_TOP))
+
+        stats = RecipeStats.objects.filter(user=request.user).first()
+        if stats is None:
+            # Users who have not written a recipe since the stats were
+            # added have them counted once, on the primary.
+            raise_query_budget(request, 1)
+            with read_from(None):
+                stats = ensure_stats(request.user.pk, request)
+        serializer = self.get_serializer(summarize(stats, top))
+        return Response(serializer.data)
+
     @action(methods=['POST'], detail=True, url_path='upload-image')
     def upload_image(self, request, pk=None):
         """Upload an image to recipe."""
         recipe = self.get_object()
+        start = time.perf_counter()
         serializer = self.get_serializer(recipe, data=request.data)
 
         if serializer.is_valid():
             serializer.save()
+            metrics.observe(
+                'recipe_image_upload_bytes',
+                serializer.validated_data['image'].size,
+            )
+            metrics.observe(
+                'recipe_image_upload_duration_seconds',
+                time.perf_counter() - start,
+            )
             return Response(serializer.data, status=status.HTTP_200_OK)
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -101,37 +299,158 @@ class RecipeViewSet(viewsets.ModelViewSet):
                 OpenApiTypes.INT,
                 enum=[0, 1],
                 description='Filter by items assigned to recipes.'
-            )
+            ),
+            OpenApiParameter(
+                'with_counts',
+                OpenApiTypes.INT,
+                enum=[0, 1],
+                description='Include the number of recipes using each item.'
+            ),
+            OpenApiParameter(
+                'sort',
+                OpenApiTypes.STR,
+                enum=['popular'],
+                description='Order by the number of recipes, most first.'
+            ),
         ]
     )
 )
 class BaseRecipeAttrViewSet(
+    ReplicaReadMixin,
+    ServerTimingMixin,
     mixins.DestroyModelMixin,
     mixins.UpdateModelMixin,
-    mixins.ListModelMixin,
+    TimedListModelMixin,
     viewsets.GenericViewSet
 ):
     """Base viewset for recipe attributes."""
     authentication_classes = [TokenAuthentication]
     permission_classes = [IsAuthenticated]
+    pagination_class = EstimatedCountPagination
+    query_budget = {
+        'list': 2,
+        'update': 3,
+        'partial_update': 3,
+        'destroy': 6,
+        'autocomplete': 2,
+    }
+    # Name of the Recipe many to many field holding the items.
+    recipe_field = None
+    count_serializer_class = None
+    sort_orders = {
+        'popular': ('-recipe_count', 'name'),
+    }
+
+    def _flag(self, name):
+        """Return the value of a 0 or 1 query parameter."""
+        value = self.request.query_params.get(name, '0')
+        if value not in ('0', '1'):
+            raise ValidationError({name: 'Must be 0 or 1.'})
+        return value == '1'
+
+    def _with_counts(self):
+        return self.action == 'list' and self._flag('with_counts')
+
+    def _sort_order(self):
+        sort = self.request.query_params.get('sort')
+        if self.action != 'list' or not sort:
+            return None
+        if sort not in self.sort_orders:
+            raise ValidationError({'sort': f'Unknown ordering: {sort}'})
+        return self.sort_orders[sort]
 
     def get_queryset(self):
         queryset = self.queryset.filter(user=self.request.user)
-        assigned_only = bool(
-            int(self.request.query_params.get('assigned_only', 0))
-        )
-        if assigned_only:
-            queryset = queryset.filter(recipe__isnull=False)
-        return queryset.order_by('-name').distinct()
+        if self._flag('assigned_only'):
+            field = Recipe._meta.get_field(self.recipe_field)
+            links = field.remote_field.through.objects.filter(**{
+                f'{field.m2m_reverse_field_name()}_id': OuterRef('pk'),
+            })
+            queryset = queryset.filter(Exists(links))
+
+        ordering = self._sort_order()
+        if self._with_counts() or ordering:
+            # Counted from the link table in the same, grouped query.
+            queryset = queryset.annotate(recipe_count=Count('recipe'))
+        return queryset.order_by(*(ordering or ['-name']))
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                'q',
+                OpenApiTypes.STR,
+                required=True,
+                description='Start of the name, or a close spelling of it.'
+            ),
+            OpenApiParameter(
+                'limit',
+                OpenApiTypes.INT,
+                description=f'Number of matches, {AUTOCOMPLETE_MAX_LIMIT} '
+                            'at most.'
+            ),
+        ],
+    )
+    @action(methods=['GET'], detail=False)
+    def autocomplete(self, request):
+        """List names starting like q first, then close spellings."""
+        query = request.query_params.get('q', '').strip()
+        try:
+            limit = int(request.query_params.get('limit', 10))
+        except ValueError:
+            raise ValidationError({'limit': 'A number is required.'})
+        limit = max(1, min(limit, AUTOCOMPLETE_MAX_LIMIT))
+        if not query:
+            return Response([])
+
+        key = (self.queryset.model, request.user.pk, query.upper(), limit)
+        matches = autocomplete_cache.get(key)
+        if matches is None:
+            matches = self._autocomplete(query.upper(), limit)
+            autocomplete_cache.set(key, matches)
+        return Response(matches)
+
+    def _autocomplete(self, query, limit):
+        """Return the best matches, found through the trigram index."""
+        prefix = Q(upper_name__startswith=query)
+        queryset = self.queryset.filter(user=self.request.user).annotate(
+            upper_name=Upper('name'),
+        ).filter(
+            prefix | Q(upper_name__trigram_similar=query)
+        ).annotate(
+            is_prefix=ExpressionWrapper(prefix, output_field=BooleanField()),
+            similarity=TrigramSimilarity('upper_name', query),
+        ).order_by('-is_prefix', '-similarity', 'name')
+        return list(queryset.values('id', 'name')[:limit])
+
+    def perform_destroy(self, instance):
+        with updating_stats(instance.user_id, self.request) as stats:
+            stats.forget(self.recipe_field, instance.pk)
+            instance.delete()
+
+    def get_serializer(self, *args, **kwargs):
+        # Autocomplete answers with a list of items, this is what the
+        # schema generator inspects.
+        if self.action == 'autocomplete':
+            kwargs['many'] = True
+        return super().get_serializer(*args, **kwargs)
+
+    def get_serializer_class(self):
+        if self._with_counts():
+            return self.count_serializer_class
+        return self.serializer_class
 
 
 class TagViewSet(BaseRecipeAttrViewSet):
     """Manage tags in the db"""
     serializer_class = serializers.TagSerializer
+    count_serializer_class = serializers.TagCountSerializer
     queryset = Tag.objects.all()
+    recipe_field = 'tags'
 
 
 class IngredientViewSet(BaseRecipeAttrViewSet):
     """Manage ingredients from db."""
     serializer_class = serializers.IngredientSerializer
+    count_serializer_class = serializers.IngredientCountSerializer
     queryset = Ingredient.objects.all()
+    recipe_field = 'ingredients'
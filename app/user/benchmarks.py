@@ -0,0 +1,18 @@
+"""
+Benchmarks for the user API.
+"""
+from django.urls import reverse
+
+from core.benchmark import BENCHMARK_PASSWORD, benchmark
+
+TOKEN_URL = reverse('user:token')
+
+
+# Password hashing makes each login expensive, keep the run short.
+@benchmark('token-login', iterations=20)
+def token_login(context):
+    payload = {
+        'email': context.user.email,
+        'password': BENCHMARK_PASSWORD,
+    }
+    return lambda: context.anonymous_client.post(TOKEN_URL, payload)
@@ -15,7 +15,23 @@ class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = get_user_model()
         fields = ['email', 'password', 'name']
-        extra_kwargs = {'password': {'write_only': True, 'min_length': 5}}
+        extra_kwargs = {
+            'password': {'write_only': True, 'min_length': 5},
+            # Replaced by the case insensitive check of validate_email.
+            'email': {'validators': []},
+        }
+
+    def validate_email(self, value):
+        """Reject emails of other users, whatever their case."""
+        users = get_user_model().objects.filter_by_email(value)
+        if self.instance is not None:
+            users = users.exclude(pk=self.instance.pk)
+        if users.exists():
+            raise serializers.ValidationError(
+                _('user with this email already exists.'),
+                code='unique',
+            )
+        return value
 
     def create(self, validated_data):
         """Create and return a user with encrypted password."""
@@ -24,12 +40,9 @@ class UserSerializer(serializers.ModelSerializer):
     def update(self, instance, validated_data):
         """Update and return user."""
         password = validated_data.pop('password', None)
-        user = super().update(instance, validated_data)
-
         if password:
-            user.set_password(password)
-            user.save()
-        return user
+            instance.set_password(password)
+        return super().update(instance, validated_data)
 
 
 class AuthTokenSerializer(serializers.Serializer):
@@ -5,9 +5,12 @@ from django.test import TestCase
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 
+from rest_framework.authtoken.models import Token
 from rest_framework.test import APIClient
 from rest_framework import status
 
+from core.testing import QueryBudgetTestMixin
+
 
 CREATE_USER_URL = reverse('user:create')
 TOKEN_URL = reverse('user:token')
@@ -91,6 +94,32 @@ class PublicUserApiTests(TestCase):
         self.assertNotIn('token', res.data)
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
 
+    def test_create_user_email_exists_other_case(self):
+        """Test emails are unique regardless of their case."""
+        create_user(email='test@example.com', password='testpass123')
+        payload = {
+            'email': 'Test@Example.com',
+            'password': 'testpass123',
+            'name': 'Test name',
+        }
+
+        res = self.client.post(CREATE_USER_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(get_user_model().objects.count(), 1)
+
+    def test_create_token_email_any_case(self):
+        """Test logging in with the email typed in another case."""
+        create_user(email='Test@example.com', password='testpass123')
+
+        res = self.client.post(TOKEN_URL, {
+            'email': 'TEST@EXAMPLE.COM',
+            'password': 'testpass123',
+        })
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('token', res.data)
+
     def test_create_token_blank_password(self):
         """Test returns an error if payload contains blank password."""
         payload = {'email': 'test@example.com', 'password': ''}
@@ -145,3 +174,57 @@ class PrivateUserApiTests(TestCase):
         self.assertEqual(self.user.name, payload['name'])
         self.assertTrue(self.user.check_password(payload['password']))
         self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+
+class UserQueryBudgetTests(QueryBudgetTestMixin, TestCase):
+    """Test the user APIs stay within their query budgets."""
+    def setUp(self):
+        self.user = create_user(
+            email='budget@example.com',
+            password='superpass123',
+            name='Budget user',
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+
+    def test_create_user(self):
+        """Test creating a user."""
+        payload = {
+            'email': 'new@example.com',
+            'password': 'superpas123',
+            'name': 'New user',
+        }
+
+        with self.assertWithinQueryBudget('post', CREATE_USER_URL):
+            res = self.client.post(CREATE_USER_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_create_token(self):
+        """Test logging in, with and without an existing token."""
+        payload = {'email': self.user.email, 'password': 'superpass123'}
+        self.token.delete()
+        # The first login creates the token, the second one reuses it.
+        for _ in range(2):
+            with self.assertWithinQueryBudget('post', TOKEN_URL):
+                res = self.client.post(TOKEN_URL, payload)
+
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_manage_profile(self):
+        """Test retrieving and updating the profile."""
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        requests = [
+            ('get', {}),
+            ('patch', {'name': 'New name', 'password': 'newpass123'}),
+            ('put', {
+                'email': 'budget@example.com',
+                'name': 'Other name',
+                'password': 'otherpass123',
+            }),
+        ]
+        for method, payload in requests:
+            with self.assertWithinQueryBudget(method, ME_URL):
+                res = getattr(self.client, method)(ME_URL, payload)
+
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
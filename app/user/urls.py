@@ -1,14 +1,26 @@
 """
 URL mappings for the user API.
 """
+from django.conf import settings
 from django.urls import path
 
+from core.async_views import async_pool_view
+from core.hashers import get_hash_executor
 from user import views
 
 app_name = 'user'
 
+create_view = views.CreateUserView.as_view()
+token_view = views.CreateTokenView.as_view()
+
+if settings.ASYNC_READ_VIEWS and settings.PASSWORD_HASH_THREADS:
+    # Hash passwords in a bounded pool under ASGI, rather than in the
+    # one thread Django runs every sync view in.
+    create_view = async_pool_view(create_view, get_hash_executor)
+    token_view = async_pool_view(token_view, get_hash_executor)
+
 urlpatterns = [
-    path('create/', views.CreateUserView.as_view(), name='create'),
-    path('token/', views.CreateTokenView.as_view(), name='token'),
+    path('create/', create_view, name='create'),
+    path('token/', token_view, name='token'),
     path('me/', views.ManageUserView.as_view(), name='me'),
 ]
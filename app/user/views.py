@@ -5,28 +5,42 @@ from rest_framework import generics, authentication, permissions
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.settings import api_settings
 
+from core.replicas import ReplicaReadMixin
+from core.timing import ServerTimingMixin, TimedRetrieveModelMixin
 from user.serializers import (
     UserSerializer,
     AuthTokenSerializer
 )
 
 
-class CreateUserView(generics.CreateAPIView):
+class CreateUserView(ServerTimingMixin, generics.CreateAPIView):
     """Create a new user in the system."""
     serializer_class = UserSerializer
+    query_budget = {'post': 2}
 
 
-class CreateTokenView(ObtainAuthToken):
+class CreateTokenView(ServerTimingMixin, ObtainAuthToken):
     """Create a new auth token for the user."""
     serializer_class = AuthTokenSerializer
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
-
-
-class ManageUserView(generics.RetrieveUpdateAPIView):
+    parser_classes = api_settings.DEFAULT_PARSER_CLASSES
+    throttle_classes = api_settings.DEFAULT_THROTTLE_CLASSES
+    throttle_scope = 'login'
+    # One more when the password is rehashed with new settings.
+    query_budget = {'post': 6}
+
+
+class ManageUserView(
+    ReplicaReadMixin,
+    ServerTimingMixin,
+    TimedRetrieveModelMixin,
+    generics.RetrieveUpdateAPIView,
+):
     """Manage the autheticated user."""
     serializer_class = UserSerializer
     authentication_classes = [authentication.TokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
+    query_budget = {'get': 1, 'put': 3, 'patch': 3}
 
     def get_object(self):
         """Retrieve And return the authenticated user."""
@@ -8,6 +8,8 @@ server {
     location / {
         uwsgi_pass              ${APP_HOST}:${APP_PORT};
         include                 /etc/nginx/uwsgi_params;
+        uwsgi_param             HTTP_X_FORWARDED_FOR $proxy_add_x_forwarded_for;
+        uwsgi_param             HTTP_X_REQUEST_START "t=$msec";
         client_max_body_size    10M;
     }
 }
\ No newline at end of file
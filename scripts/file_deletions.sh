@@ -0,0 +1,13 @@
+#!/bin/sh
+
+set -e
+
+# Removes the stored files queued by user deletions, the ones left
+# behind by the admin and purge_users, every FILE_DELETION_INTERVAL
+# seconds.
+python manage.py wait_for_db
+
+while true; do
+    python manage.py process_file_deletions
+    sleep "${FILE_DELETION_INTERVAL:-300}"
+done
@@ -2,8 +2,24 @@
 
 set -e
 
-python manage.py wait_for_db
-python manage.py collectstatic --noinput
-python manage.py migrate
+# Waits for the database and migrates it while static files and the
+# schema are built, skipping steps with nothing to do.
+python manage.py startup
 
+# Metrics of previous workers are stale once the server restarts.
+if [ -n "$METRICS_DIR" ]; then
+    rm -rf "$METRICS_DIR"
+    mkdir -p "$METRICS_DIR"
+fi
+
+# SERVER_MODE=asgi serves the app with uvicorn, and the recipe reads with
+# async views. The proxy must run in the same mode.
+if [ "$SERVER_MODE" = "asgi" ]; then
+    exec uvicorn app.asgi:application --host 0.0.0.0 --port 9000 \
+        --workers 4 --proxy-headers --forwarded-allow-ips '*' \
+        --no-access-log
+fi
+
+# The master loads app.wsgi, which warms the app up before the workers
+# fork from it (WARM_UP_ON_LOAD), so --lazy-apps must stay off.
 uwsgi --socket :9000 --workers 4 --master --enable-threads --module app.wsgi